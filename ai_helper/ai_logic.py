@@ -13,6 +13,20 @@ class SmartAIAssistant:
     Provides intelligent responses based on keyword matching and context
     """
     
+    # Intent rules, checked in order (explanation uses explanation_keywords)
+    INTENT_KEYWORDS = [
+        ('greeting', ['hi', 'hello', 'hey', 'good morning', 'good afternoon']),
+        ('study', ['study', 'what should i study', 'what to study']),
+        ('exam', ['exam', 'examination', 'prepare', 'preparation']),
+        ('explanation', []),
+        ('hackathon', ['hackathon', 'project idea', 'idea', 'build']),
+        ('assignment', ['assignment', 'homework', 'task']),
+        ('placement', ['placement', 'job', 'career', 'internship']),
+        ('attendance', ['attendance', 'present', 'absent']),
+    ]
+    
+    INTENTS = [intent for intent, _ in INTENT_KEYWORDS] + ['other']
+    
     def __init__(self):
         self.greetings = [
             "Hello! How can I help you today?",
@@ -55,45 +69,55 @@ class SmartAIAssistant:
             "Focus on innovation and user experience!",
         ]
     
+    def detect_intent(self, query):
+        """
+        Classify a query into one of INTENTS
+        Uses the same keyword rules, in the same order, as process_query
+        """
+        query_lower = query.lower().strip()
+        
+        for intent, words in self.INTENT_KEYWORDS:
+            if intent == 'explanation':
+                if any(keyword in query_lower for keyword in self.explanation_keywords):
+                    return intent
+            elif any(word in query_lower for word in words):
+                return intent
+        
+        return 'other'
+    
     def process_query(self, query, user=None):
         """
         Main method to process user query and return AI response
         """
         query_lower = query.lower().strip()
+        intent = self.detect_intent(query)
         
-        # Check for greetings
-        if any(word in query_lower for word in ['hi', 'hello', 'hey', 'good morning', 'good afternoon']):
+        if intent == 'greeting':
             return random.choice(self.greetings)
         
-        # Check for study-related queries
-        if any(word in query_lower for word in ['study', 'what should i study', 'what to study']):
+        if intent == 'study':
             if 'today' in query_lower:
                 return self._get_study_today_response()
             return self._get_study_plan_response()
         
-        # Check for exam preparation
-        if any(word in query_lower for word in ['exam', 'examination', 'prepare', 'preparation']):
+        if intent == 'exam':
             return self._get_exam_prep_response()
         
-        # Check for explanations
-        for keyword, explain_func in self.explanation_keywords.items():
-            if keyword in query_lower:
-                return explain_func()
+        if intent == 'explanation':
+            for keyword, explain_func in self.explanation_keywords.items():
+                if keyword in query_lower:
+                    return explain_func()
         
-        # Check for hackathon ideas
-        if any(word in query_lower for word in ['hackathon', 'project idea', 'idea', 'build']):
+        if intent == 'hackathon':
             return random.choice(self.hackathon_responses)
         
-        # Check for assignment help
-        if any(word in query_lower for word in ['assignment', 'homework', 'task']):
+        if intent == 'assignment':
             return self._get_assignment_response()
         
-        # Check for placement/career guidance
-        if any(word in query_lower for word in ['placement', 'job', 'career', 'internship']):
+        if intent == 'placement':
             return self._get_placement_guidance()
         
-        # Check for attendance
-        if any(word in query_lower for word in ['attendance', 'present', 'absent']):
+        if intent == 'attendance':
             return self._get_attendance_info()
         
         # Default intelligent response
@@ -0,0 +1,190 @@
+"""
+Archival of old AI queries into compressed monthly segments
+Each month is an append-only JSONL.gz file (one gzip member per batch)
+with a small JSON index, so archived months stay searchable on demand.
+"""
+import gzip
+import json
+import os
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import SiteStats
+from .models import AIQuery
+
+INDEX_NAME = 'index.json'
+
+
+def archive_dir():
+    return settings.AIQUERY_ARCHIVE_DIR
+
+
+def segment_path(month):
+    """Segment file for a 'YYYY-MM' month"""
+    return os.path.join(archive_dir(), f'{month}.jsonl.gz')
+
+
+def load_index():
+    """{month: {rows, first_id, last_id, first_at, last_at, bytes}}"""
+    try:
+        with open(os.path.join(archive_dir(), INDEX_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _save_index(index):
+    path = os.path.join(archive_dir(), INDEX_NAME)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _serialize(row):
+    pk, user_id, username, query, response, intent, created_at = row
+    return {
+        'id': pk,
+        'user_id': user_id,
+        'username': username,
+        'query': query,
+        'response': response,
+        'intent': intent,
+        'created_at': created_at.isoformat(),
+    }
+
+
+def _append_segment(month, records):
+    """Append records to a month's segment as one new gzip member (fsynced)"""
+    data = ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records)
+    with open(segment_path(month), 'ab') as f:
+        f.write(gzip.compress(data.encode('utf-8')))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _segment_ids(month):
+    """Ids of the records already in a month's segment"""
+    try:
+        with gzip.open(segment_path(month), 'rt', encoding='utf-8') as f:
+            return {json.loads(line)['id'] for line in f}
+    except FileNotFoundError:
+        return set()
+
+
+def archived_until():
+    """Start of the first day with no archived rows, None before anything is archived"""
+    ends = [entry['last_at'] for entry in load_index().values() if entry.get('last_at')]
+    if not ends:
+        return None
+    last_day = timezone.localtime(datetime.fromisoformat(max(ends))).date()
+    return timezone.make_aware(datetime.combine(last_day + timedelta(days=1), time.min))
+
+
+def archive_before(cutoff, batch_size=1000, dry_run=False):
+    """
+    Move AIQuery rows created before `cutoff` into monthly segments
+    Rows are written and fsynced before they are deleted, one batch at a time,
+    and only the rows that are in a segment get deleted. Rows already in a
+    segment (crash between write and delete) are not written twice.
+    Returns {month: rows archived}.
+    """
+    os.makedirs(archive_dir(), exist_ok=True)
+    index = load_index()
+    segment_ids = {}  # month -> ids in its segment, read when the month first comes up
+    archived = {}
+    last_pk = 0
+
+    while True:
+        rows = list(
+            AIQuery.objects.filter(created_at__lt=cutoff, pk__gt=last_pk)
+            .order_by('pk')
+            .values_list('pk', 'user_id', 'user__username', 'query', 'response', 'intent', 'created_at')[:batch_size]
+        )
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+
+        by_month = {}
+        for row in rows:
+            month = timezone.localtime(row[-1]).strftime('%Y-%m')
+            by_month.setdefault(month, []).append(row)
+
+        stored = []
+        for month, month_rows in by_month.items():
+            entry = index.get(month, {'rows': 0, 'first_id': None, 'last_id': 0,
+                                      'first_at': None, 'last_at': None, 'bytes': 0})
+            archived[month] = archived.get(month, 0) + len(month_rows)
+            if dry_run:
+                continue
+
+            if month not in segment_ids:
+                segment_ids[month] = _segment_ids(month)
+            known = segment_ids[month]
+            new_rows = [row for row in month_rows if row[0] not in known]
+            stored.extend(row[0] for row in month_rows if row[0] in known)
+            if not new_rows:
+                continue
+
+            _append_segment(month, [_serialize(row) for row in new_rows])
+            stored.extend(row[0] for row in new_rows)
+            known.update(row[0] for row in new_rows)
+
+            created = [row[-1].isoformat() for row in new_rows]
+            entry['rows'] = len(known)
+            entry['first_id'] = min(filter(None, [entry['first_id'], new_rows[0][0]]))
+            entry['last_id'] = max(entry['last_id'], new_rows[-1][0])
+            entry['first_at'] = min(filter(None, [entry['first_at'], min(created)]))
+            entry['last_at'] = max(filter(None, [entry['last_at'], max(created)]))
+            entry['bytes'] = os.path.getsize(segment_path(month))
+            index[month] = entry
+
+        if dry_run:
+            continue
+
+        _save_index(index)
+
+        # A raw delete skips loading the rows and the per-row post_delete
+        # signal; the counter is adjusted once per batch instead. Rollups of
+        # archived days are left alone by analytics.backfill().
+        with transaction.atomic():
+            deleted = AIQuery.objects.filter(pk__in=stored)._raw_delete(AIQuery.objects.db)
+            SiteStats.adjust(total_queries=-deleted)
+
+    return archived
+
+
+def archive_older_than(days=None, batch_size=1000, dry_run=False):
+    """Archive rows older than `days` (default: settings.AIQUERY_RETENTION_DAYS)"""
+    if days is None:
+        days = settings.AIQUERY_RETENTION_DAYS
+    return archive_before(timezone.now() - timedelta(days=days), batch_size, dry_run)
+
+
+def search(month, text='', username='', limit=200):
+    """
+    Scan one archived month for records matching text and/or username
+    Returns (matches, total_matching) with at most `limit` matches.
+    """
+    if month not in load_index():
+        return [], 0
+
+    text = text.lower()
+    matches = []
+    total = 0
+    with gzip.open(segment_path(month), 'rt', encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            if username and record['username'] != username:
+                continue
+            if text and text not in record['query'].lower() and text not in record['response'].lower():
+                continue
+            total += 1
+            if len(matches) < limit:
+                matches.append(record)
+    return matches, total
@@ -0,0 +1,58 @@
+"""
+Async variant of the AI query API
+Routed instead of views.ai_query_api when ASYNC_VIEWS is on.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.http import HttpResponseNotAllowed, JsonResponse
+
+from .ai_logic import SmartAIAssistant
+from .models import AIQuery
+from users.decorators import alogin_required
+
+
+@alogin_required
+async def ai_query_api(request):
+    """
+    API endpoint for AI queries
+    Returns JSON response
+    """
+    # require_http_methods does not wrap async views in Django 4.2
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    
+    try:
+        data = json.loads(request.body)
+        query = data.get('query', '').strip()
+        
+        if not query:
+            return JsonResponse({
+                'success': False,
+                'error': 'Query cannot be empty'
+            })
+        
+        # Rule based and CPU only, fine on the event loop
+        ai = SmartAIAssistant()
+        response = ai.process_query(query, user=request.user)
+        
+        # In one transaction with its counter and rollups, like the sync view
+        ai_query = await sync_to_async(transaction.atomic(AIQuery.objects.create))(
+            user=request.user,
+            query=query,
+            response=response,
+            intent=ai.detect_intent(query)
+        )
+        
+        return JsonResponse({
+            'success': True,
+            'response': response,
+            'query_id': ai_query.id
+        })
+    
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        })
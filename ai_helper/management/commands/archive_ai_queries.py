@@ -0,0 +1,32 @@
+"""
+Management command to archive old AI queries
+Run (e.g. nightly from cron): python manage.py archive_ai_queries --days 365
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ai_helper import archive
+
+
+class Command(BaseCommand):
+    help = 'Moves AIQuery rows older than the retention period into monthly JSONL.gz segments'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.AIQUERY_RETENTION_DAYS,
+            help='Archive rows older than this many days (default: AIQUERY_RETENTION_DAYS)',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be archived')
+
+    def handle(self, *args, **options):
+        archived = archive.archive_older_than(options['days'], options['batch_size'], options['dry_run'])
+        
+        if not archived:
+            self.stdout.write(self.style.SUCCESS('Nothing to archive'))
+            return
+        
+        verb = 'Would archive' if options['dry_run'] else 'Archived'
+        for month, count in sorted(archived.items()):
+            self.stdout.write(f'{verb} {count} queries from {month}')
+        self.stdout.write(self.style.SUCCESS(f'{verb} {sum(archived.values())} queries in total'))
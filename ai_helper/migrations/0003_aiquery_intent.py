@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-19 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_helper', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aiquery',
+            name='intent',
+            field=models.CharField(blank=True, default='', max_length=30),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.27 on 2026-10-19 14:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('ai_helper', '0003_aiquery_intent'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='aiquery',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='ai_queries', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='aiquery',
+            index=models.Index(fields=['user', '-created_at'], name='ai_query_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aiquery',
+            index=models.Index(fields=['-created_at'], name='ai_query_created_idx'),
+        ),
+    ]
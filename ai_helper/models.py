@@ -12,14 +12,20 @@ class AIQuery(models.Model):
     """
     Stores all queries asked to AI Assistant
     """
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='ai_queries')
+    # Indexed by ai_query_user_created_idx (user first)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='ai_queries', db_index=False)
     query = models.TextField()
     response = models.TextField()
+    intent = models.CharField(max_length=30, blank=True, default='')
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = "AI Queries"
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='ai_query_user_created_idx'),
+            models.Index(fields=['-created_at'], name='ai_query_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.query[:50]}..."
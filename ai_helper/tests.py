@@ -1,3 +1,154 @@
-from django.test import TestCase
+"""
+Query-count budgets for the AI assistant pages and index usage for AIQuery
+"""
+import io
+import json
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import AsyncRequestFactory
+from django.urls import reverse
+from django.utils import timezone
+
+from core import analytics
+from core.models import DailyRollup, SiteStats
+from core.tests import ROWS, QueryBudgetTestCase
+from . import archive, async_views
+from .models import AIQuery
+
+
+class AssistantPageQueryTests(QueryBudgetTestCase):
+
+    def test_assistant_page(self):
+        response = self.assertPageQueries(2, reverse('ai_helper:ai_assistant'))
+        self.assertEqual(len(response.context['recent_queries']), 10)
+
+    def test_query_api(self):
+        self.client.force_login(self.student)
+        # Includes the SAVEPOINT/RELEASE of the insert's transaction
+        with self.assertNumQueries(10):
+            response = self.client.post(
+                reverse('ai_helper:ai_query_api'), json.dumps({'query': 'How do I prepare for exams?'}),
+                content_type='application/json',
+            )
+        self.assertTrue(response.json()['success'])
+
+    async def test_async_query_api(self):
+        request = AsyncRequestFactory().post(
+            '/ai-assistant/api/query/', json.dumps({'query': 'explain sql'}), content_type='application/json',
+        )
+        request.user = self.student
+        data = json.loads((await async_views.ai_query_api(request)).content)
+        self.assertTrue(data['success'])
+        saved = await AIQuery.objects.aget(pk=data['query_id'])
+        self.assertEqual(saved.intent, 'explanation')
+
+    async def test_async_query_api_needs_post(self):
+        request = AsyncRequestFactory().get('/ai-assistant/api/query/')
+        request.user = self.student
+        self.assertEqual((await async_views.ai_query_api(request)).status_code, 405)
+
+    def test_archive_search(self):
+        self.assertPageQueries(2, reverse('ai_helper:archive_search'), self.admin)
+
+
+class AIQueryIndexTests(QueryBudgetTestCase):
+
+    def test_queries_of_user(self):
+        plan = self.assertUsesIndex(AIQuery.objects.filter(user=self.student)[:10], 'ai_query_user_created_idx')
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_recent_queries(self):
+        plan = self.assertUsesIndex(AIQuery.objects.select_related('user')[:10], 'ai_query_created_idx')
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_queries_before_cutoff(self):
+        cutoff = timezone.now() - timedelta(days=365)
+        self.assertUsesIndex(AIQuery.objects.filter(created_at__lt=cutoff), 'ai_query_created_idx')
+
+
+class ArchiveTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        override = self.settings(AIQUERY_ARCHIVE_DIR=directory.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        SiteStats.reconcile()
+
+    def backdate(self, query, *when):
+        AIQuery.objects.filter(pk=query.pk).update(created_at=datetime(*when, tzinfo=dt_timezone.utc))
+
+    def test_round_trip(self):
+        old = list(AIQuery.objects.filter(user=self.student).order_by('pk')[:4])
+        for query in old:
+            self.backdate(query, 2024, 3, 10)
+        
+        self.assertEqual(archive.archive_older_than(batch_size=3), {'2024-03': 4})
+        self.assertFalse(AIQuery.objects.filter(pk__in=[query.pk for query in old]).exists())
+        self.assertEqual(SiteStats.load().total_queries, 2 * ROWS - 4)
+        self.assertEqual(archive.load_index()['2024-03']['rows'], 4)
+        
+        matches, total = archive.search('2024-03', text=old[0].query, username='student')
+        self.assertEqual(total, 1)
+        self.assertEqual(matches[0]['id'], old[0].pk)
+        self.assertEqual(archive.search('2024-03', username='other'), ([], 0))
+
+    def test_archived_rows_are_deleted_without_per_row_signals(self):
+        for query in AIQuery.objects.filter(user=self.student):
+            self.backdate(query, 2024, 3, 10)
+        # select, raw delete and one counter update in a savepoint, then the empty select
+        with self.assertNumQueries(6):
+            archive.archive_older_than(batch_size=ROWS)
+        self.assertEqual(SiteStats.load().total_queries, ROWS)
+
+    def test_backfill_keeps_rollups_of_archived_days(self):
+        old = list(AIQuery.objects.filter(user=self.student).order_by('pk')[:4])
+        for query in old:
+            self.backdate(query, 2024, 3, 10)
+            query.refresh_from_db()
+        analytics.backfill('ai_query')
+        before = list(DailyRollup.objects.filter(metric='ai_query').values_list('bucket', 'dimension', 'key', 'count'))
+        
+        archive.archive_older_than()
+        call_command('backfill_rollups', '--metric', 'ai_query', stdout=io.StringIO())
+        call_command('backfill_rollups', '--metric', 'ai_query', '--since', '2024-01-01', stdout=io.StringIO())
+        self.assertCountEqual(
+            DailyRollup.objects.filter(metric='ai_query').values_list('bucket', 'dimension', 'key', 'count'),
+            before,
+        )
+        self.assertEqual(
+            DailyRollup.objects.get(metric='ai_query', dimension='total', bucket=analytics.day_bucket(old[0].created_at)).count, 4,
+        )
+
+    def test_rerun_does_not_write_rows_twice(self):
+        query = AIQuery.objects.first()
+        self.backdate(query, 2024, 3, 10)
+        archive.archive_older_than()
+        # The row comes back as if the delete had not been committed
+        AIQuery.objects.bulk_create([query])
+        self.backdate(query, 2024, 3, 10)
+        
+        self.assertEqual(archive.archive_older_than(), {'2024-03': 1})
+        self.assertFalse(AIQuery.objects.filter(pk=query.pk).exists())
+        self.assertEqual(archive.search('2024-03')[1], 1)
+        self.assertEqual(archive.load_index()['2024-03']['rows'], 1)
+
+    def test_rows_archived_out_of_id_order(self):
+        first, second = AIQuery.objects.order_by('pk')[:2]
+        self.backdate(first, 2024, 3, 20)
+        self.backdate(second, 2024, 3, 10)
+        archive.archive_before(datetime(2024, 3, 15, tzinfo=dt_timezone.utc))
+        archive.archive_before(datetime(2024, 4, 1, tzinfo=dt_timezone.utc))
+        
+        self.assertFalse(AIQuery.objects.filter(pk__in=[first.pk, second.pk]).exists())
+        matches, total = archive.search('2024-03')
+        self.assertEqual(sorted(match['id'] for match in matches), [first.pk, second.pk])
+
+    def test_dry_run_keeps_rows(self):
+        self.backdate(AIQuery.objects.first(), 2024, 3, 10)
+        self.assertEqual(archive.archive_older_than(dry_run=True), {'2024-03': 1})
+        self.assertEqual(AIQuery.objects.count(), 2 * ROWS)
+        self.assertEqual(archive.load_index(), {})
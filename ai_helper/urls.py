@@ -1,13 +1,15 @@
 """
 URL configuration for ai_helper app
 """
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = 'ai_helper'
 
 urlpatterns = [
     path('', views.ai_assistant_view, name='ai_assistant'),
-    path('api/query/', views.ai_query_api, name='ai_query_api'),
+    path('api/query/', async_views.ai_query_api if settings.ASYNC_VIEWS else views.ai_query_api, name='ai_query_api'),
+    path('archive/', views.archive_search_view, name='archive_search'),
 ]
 
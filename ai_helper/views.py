@@ -2,14 +2,17 @@
 AI Helper views for Smart College Helper Portal
 Handles AI chat interface and responses
 """
-from django.shortcuts import render
+from django.shortcuts import render, redirect
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 import json
 
 from .models import AIQuery
 from .ai_logic import SmartAIAssistant
+from . import archive
 
 
 @login_required
@@ -48,12 +51,14 @@ def ai_query_api(request):
         ai = SmartAIAssistant()
         response = ai.process_query(query, user=request.user)
         
-        # Save query and response
-        ai_query = AIQuery.objects.create(
-            user=request.user,
-            query=query,
-            response=response
-        )
+        # Save query and response (with its counter and rollups)
+        with transaction.atomic():
+            ai_query = AIQuery.objects.create(
+                user=request.user,
+                query=query,
+                response=response,
+                intent=ai.detect_intent(query)
+            )
         
         return JsonResponse({
             'success': True,
@@ -66,3 +71,33 @@ def ai_query_api(request):
             'success': False,
             'error': str(e)
         })
+
+
+@login_required
+def archive_search_view(request):
+    """
+    Search AI queries that were moved to the monthly archive (admin only)
+    """
+    if not request.user.is_admin():
+        messages.error(request, "Access denied! Admin only.")
+        return redirect('core:dashboard')
+    
+    index = archive.load_index()
+    month = request.GET.get('month', '')
+    text = request.GET.get('q', '').strip()
+    username = request.GET.get('user', '').strip()
+    
+    results, total = [], 0
+    if month in index:
+        results, total = archive.search(month, text=text, username=username)
+    
+    context = {
+        'months': sorted(index.items(), reverse=True),
+        'selected_month': month,
+        'search_text': text,
+        'search_user': username,
+        'results': results,
+        'total': total,
+    }
+    
+    return render(request, 'ai_helper/archive_search.html', context)
@@ -0,0 +1,6 @@
+"""
+Microbenchmarks for the pure-Python hot paths
+Times SmartAIAssistant.process_query over a query corpus and
+generate_study_plan for 1 to 365 days, and measures their allocations
+with tracemalloc. Run: python -m benchmarks --help
+"""
@@ -0,0 +1,66 @@
+"""
+Command line entry point
+  python -m benchmarks --save              record benchmarks/baseline.json
+  python -m benchmarks                     compare against it (exit 1 on regression)
+  python -m benchmarks -k 'process_query*' only matching cases
+"""
+import argparse
+import os
+import sys
+
+import django
+
+from . import suite
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file')
+    parser.add_argument('--save', action='store_true', help='Write the results as the new baseline')
+    parser.add_argument('-o', '--output', help='Also write the results to this JSON file')
+    parser.add_argument('-k', '--filter', default='*', help='Glob of case names to run')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='Allowed slowdown (0.15 = 15%%)')
+    parser.add_argument('--memory-tolerance', type=float, default=0.10, help='Allowed peak memory growth')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.1, help='Minimum seconds per timed loop')
+    options = parser.parse_args(argv)
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'randomproject.settings')
+    django.setup()
+
+    current = suite.run(options.filter, repeat=options.repeat, min_time=options.min_time, log=print)
+    if options.save:
+        suite.save(current, options.baseline)
+        print(f'Baseline written to {options.baseline}')
+        return 0
+
+    if not os.path.exists(options.baseline):
+        print(f'No baseline at {options.baseline}; run with --save first')
+        return 0
+
+    baseline = suite.load(options.baseline)
+    regressions = suite.compare(current, baseline, options.tolerance, options.memory_tolerance)
+    if regressions:
+        # Confirm with a second, longer measurement so one noisy loop cannot fail a deploy
+        names = {name for name, *_ in regressions}
+        print(f'Re-measuring {len(names)} case(s)')
+        rerun = suite.run(names=names, repeat=options.repeat * 2, min_time=options.min_time, log=print)
+        for name, result in rerun['results'].items():
+            if result['seconds'] < current['results'][name]['seconds']:
+                current['results'][name] = result
+        regressions = suite.compare(current, baseline, options.tolerance, options.memory_tolerance)
+    if options.output:
+        suite.save(current, options.output)
+    for name, metric, before, after, change in regressions:
+        print(f'REGRESSION {name} {metric}: {before:.6g} -> {after:.6g} ({change:+.0%})')
+    if regressions:
+        return 1
+    print('No regressions')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""
+Query corpus for the assistant benchmarks
+Phrased the way students type into the chat box; the suite groups them by
+whatever detect_intent returns, so keyword quirks are benchmarked as-is.
+"""
+QUERIES = [
+    # greetings
+    'hi',
+    'Hello!',
+    'hey there',
+    'good morning, can you help me?',
+    'Good afternoon',
+    # study
+    'what should i study today',
+    'What to study for this week?',
+    'study plan for my semester',
+    'how do I study consistently without getting distracted',
+    'what should i study today for data structures and algorithms',
+    # exams
+    'exam tips',
+    'How to prepare for the DBMS exam in 3 days',
+    'preparation strategy for end semester examination',
+    'I have my exam tomorrow and I have not started, please help me prepare',
+    # explanations
+    'explain normalization',
+    'what is dbms',
+    'SQL joins',
+    'can you teach me python list comprehensions',
+    'javascript closures',
+    'difference between algorithm and program',
+    'which data structure is best for a queue',
+    # hackathons
+    'hackathon ideas',
+    'give me a project idea for a weekend hackathon',
+    'what can I build with Django and a camera?',
+    # assignments
+    'assignment',
+    'help with my homework',
+    'how to finish my pending task list before Friday',
+    # placements
+    'placement',
+    'how to get an internship in second year',
+    'career options after computer science',
+    'which companies come for job placement drives',
+    # attendance
+    'attendance',
+    'how much attendance do I need',
+    'I was absent for two weeks, what now?',
+    # everything else
+    'thanks',
+    'ok',
+    'who won the cricket match yesterday',
+    'tell me something interesting about the universe and everything in it ' * 4,
+]
+
+# Study plan lengths in days
+PLAN_DAYS = [1, 7, 30, 90, 180, 365]
@@ -0,0 +1,158 @@
+"""
+Benchmark cases, measurement and baseline comparison
+Each case is a zero-argument callable doing `calls` operations. Timing takes
+the best of several repeats of an auto-sized loop; allocations are measured
+in a separate tracemalloc run so tracing never skews the timings.
+"""
+import fnmatch
+import gc
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from .corpus import PLAN_DAYS, QUERIES
+
+# Memory growth below this many bytes is never a regression (allocator noise)
+MEMORY_SLACK = 4096
+
+
+def cases():
+    """[(name, calls, func)] for every benchmark"""
+    from ai_helper.ai_logic import SmartAIAssistant
+    from core.planner import generate_study_plan
+
+    ai = SmartAIAssistant()
+    by_intent = {}
+    for query in QUERIES:
+        by_intent.setdefault(ai.detect_intent(query), []).append(query)
+
+    def answer(queries):
+        def run():
+            for query in queries:
+                ai.process_query(query)
+        return run
+
+    def classify():
+        for query in QUERIES:
+            ai.detect_intent(query)
+
+    result = [
+        ('detect_intent[corpus]', len(QUERIES), classify),
+        ('process_query[corpus]', len(QUERIES), answer(QUERIES)),
+    ]
+    for intent in SmartAIAssistant.INTENTS:
+        if intent in by_intent:
+            result.append((f'process_query[{intent}]', len(by_intent[intent]), answer(by_intent[intent])))
+    for days in PLAN_DAYS:
+        result.append((f'generate_study_plan[{days}d]', 1,
+                       lambda days=days: generate_study_plan('Data Structures', days, 3)))
+    return result
+
+
+def _loops(func, min_time):
+    """Smallest power of ten of loops that takes at least min_time"""
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        if time.perf_counter() - started >= min_time or loops >= 10 ** 7:
+            return loops
+        loops *= 10
+
+
+def measure_time(func, calls, repeat=5, min_time=0.1):
+    """Best and median seconds per operation over `repeat` timed loops"""
+    random.seed(0)
+    loops = _loops(func, min_time)
+    timings = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            random.seed(0)
+            started = time.perf_counter()
+            for _ in range(loops):
+                func()
+            timings.append((time.perf_counter() - started) / loops / calls)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    timings.sort()
+    return {'best': timings[0], 'median': timings[len(timings) // 2], 'loops': loops}
+
+
+def measure_memory(func, calls):
+    """Peak and retained traced bytes per operation (retained includes the return value)"""
+    random.seed(0)
+    func()  # warm caches so one-off allocations are not counted
+    gc.collect()
+    tracemalloc.start()
+    try:
+        random.seed(0)
+        before, _ = tracemalloc.get_traced_memory()
+        result = func()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return {
+        'peak_bytes': (peak - before) // calls,
+        'retained_bytes': max(0, current - before) // calls,
+    }
+
+
+def run(pattern='*', repeat=5, min_time=0.1, log=None, names=None):
+    """Run every case matching the glob `pattern` (or in `names`); returns the results document"""
+    results = {}
+    for name, calls, func in cases():
+        if not fnmatch.fnmatch(name, pattern) or (names is not None and name not in names):
+            continue
+        timing = measure_time(func, calls, repeat=repeat, min_time=min_time)
+        memory = measure_memory(func, calls)
+        results[name] = {'calls': calls, 'seconds': timing['best'], 'median_seconds': timing['median'], **memory}
+        if log:
+            log(f"{name:<34} {timing['best'] * 1e6:>10.2f} us  {memory['peak_bytes'] / 1024:>9.1f} KiB peak")
+    return {
+        'python': platform.python_version(),
+        'implementation': sys.implementation.name,
+        'machine': platform.machine(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+
+
+def compare(current, baseline, tolerance=0.15, memory_tolerance=0.10):
+    """
+    Regressions of current against baseline
+    Returns [(name, metric, baseline_value, current_value, change)] for every
+    case whose time grew beyond tolerance or peak memory beyond memory_tolerance.
+    Cases missing from either side are ignored.
+    """
+    regressions = []
+    for name, result in current['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            continue
+        if result['seconds'] > before['seconds'] * (1 + tolerance):
+            regressions.append((name, 'seconds', before['seconds'], result['seconds'],
+                                result['seconds'] / before['seconds'] - 1))
+        limit = max(before['peak_bytes'] * (1 + memory_tolerance), before['peak_bytes'] + MEMORY_SLACK)
+        if result['peak_bytes'] > limit:
+            regressions.append((name, 'peak_bytes', before['peak_bytes'], result['peak_bytes'],
+                                result['peak_bytes'] / max(before['peak_bytes'], 1) - 1))
+    return regressions
+
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save(document, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write('\n')
@@ -0,0 +1,26 @@
+from django.test import SimpleTestCase
+
+from . import suite
+
+
+def _document(seconds, peak_bytes):
+    return {'results': {'case': {'calls': 1, 'seconds': seconds, 'peak_bytes': peak_bytes}}}
+
+
+class CompareTests(SimpleTestCase):
+    def test_within_tolerance(self):
+        self.assertEqual(suite.compare(_document(1.1, 1000), _document(1.0, 1000), tolerance=0.15), [])
+
+    def test_slowdown_is_a_regression(self):
+        [(name, metric, before, after, _)] = suite.compare(_document(1.3, 1000), _document(1.0, 1000))
+        self.assertEqual((name, metric, before, after), ('case', 'seconds', 1.0, 1.3))
+
+    def test_memory_growth_needs_more_than_the_slack(self):
+        self.assertEqual(suite.compare(_document(1.0, 3000), _document(1.0, 100)), [])
+        [regression] = suite.compare(_document(1.0, 200_000), _document(1.0, 100_000))
+        self.assertEqual(regression[1], 'peak_bytes')
+
+    def test_cases_cover_every_plan_size(self):
+        names = [name for name, _, _ in suite.cases()]
+        self.assertIn('process_query[corpus]', names)
+        self.assertIn('generate_study_plan[365d]', names)
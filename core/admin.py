@@ -1,5 +1,9 @@
 from django.contrib import admin
-from .models import Subject, Note, StudyPlan, Notice, PlacementRoadmap
+from django.utils import timezone
+from .models import (
+    Subject, Note, NoteDownload, NoteSimilarity, StudyPlan, Notice, PlacementRoadmap, SiteStats,
+    SessionCalendar, AttendanceRecord, Job,
+)
 
 
 @admin.register(Subject)
@@ -16,6 +20,22 @@ class NoteAdmin(admin.ModelAdmin):
     search_fields = ['title', 'subject__name']
 
 
+@admin.register(NoteDownload)
+class NoteDownloadAdmin(admin.ModelAdmin):
+    list_display = ['note', 'user', 'downloaded_at']
+    list_filter = ['downloaded_at']
+    search_fields = ['note__title', 'user__username']
+    raw_id_fields = ['note', 'user']
+
+
+@admin.register(NoteSimilarity)
+class NoteSimilarityAdmin(admin.ModelAdmin):
+    list_display = ['note', 'similar', 'score', 'co_downloads']
+    search_fields = ['note__title', 'similar__title']
+    raw_id_fields = ['note', 'similar']
+    list_select_related = ['note', 'similar']
+
+
 @admin.register(StudyPlan)
 class StudyPlanAdmin(admin.ModelAdmin):
     list_display = ['user', 'course_name', 'exam_date', 'hours_per_day', 'is_completed', 'created_at']
@@ -34,3 +54,40 @@ class NoticeAdmin(admin.ModelAdmin):
 class PlacementRoadmapAdmin(admin.ModelAdmin):
     list_display = ['title', 'career_path', 'estimated_duration']
     list_filter = ['career_path']
+
+
+@admin.register(SiteStats)
+class SiteStatsAdmin(admin.ModelAdmin):
+    list_display = ['total_students', 'total_notes', 'total_notices', 'total_queries', 'updated_at']
+    readonly_fields = SiteStats.COUNTERS + ['updated_at']
+
+
+@admin.register(SessionCalendar)
+class SessionCalendarAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'term', 'held', 'planned_sessions']
+    list_filter = ['term', 'subject__semester']
+
+
+@admin.register(AttendanceRecord)
+class AttendanceRecordAdmin(admin.ModelAdmin):
+    list_display = ['profile', 'subject', 'term', 'attended']
+    list_filter = ['term', 'subject']
+    search_fields = ['profile__user__username', 'profile__enrollment_number']
+    raw_id_fields = ['profile']
+    list_select_related = ['profile__user', 'subject']
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'attempts', 'max_attempts', 'run_after', 'locked_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'name']
+    search_fields = ['name', 'last_error']
+    readonly_fields = ['attempts', 'locked_by', 'locked_until', 'last_error', 'created_at', 'finished_at']
+    actions = ['retry']
+    
+    @admin.action(description='Retry selected jobs')
+    def retry(self, request, queryset):
+        updated = queryset.exclude(status=Job.RUNNING).update(
+            status=Job.QUEUED, attempts=0, run_after=timezone.now(), finished_at=None,
+        )
+        self.message_user(request, f'{updated} job(s) queued again.')
@@ -0,0 +1,266 @@
+"""
+Usage analytics for Smart College Helper Portal
+Maintains hourly and daily rollups of AI queries, note downloads and signups,
+so admin charts never scan the raw event tables.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .models import HourlyRollup, DailyRollup, NoteDownload, Note, Subject
+from users.models import User
+from ai_helper import archive
+from ai_helper.models import AIQuery
+
+BATCH_SIZE = 1000
+
+
+def hour_bucket(when):
+    """Start of the hour containing `when`"""
+    return timezone.localtime(when).replace(minute=0, second=0, microsecond=0)
+
+
+def day_bucket(when):
+    """Local date containing `when`"""
+    return timezone.localtime(when).date()
+
+
+def _dimension_rows(dims, total=True):
+    """[(dimension, key)] for an event: 'total' plus every non-empty dimension"""
+    rows = [('total', '')] if total else []
+    for dimension, key in dims.items():
+        if key is not None and key != '':
+            rows.append((dimension, str(key)))
+    return rows
+
+
+def _upsert(model, metric, bucket, rows, n):
+    """
+    Add n to every (dimension, key) counter of a bucket in one statement
+    INSERT ... ON CONFLICT DO UPDATE works on SQLite >= 3.24 and PostgreSQL
+    """
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    bucket_value = model._meta.get_field('bucket').get_db_prep_value(bucket, connection)
+
+    placeholders = ', '.join(['(%s, %s, %s, %s, %s)'] * len(rows))
+    params = []
+    for dimension, key in rows:
+        params.extend([metric, dimension, key, bucket_value, n])
+
+    sql = (
+        f"INSERT INTO {table} ({qn('metric')}, {qn('dimension')}, {qn('key')}, {qn('bucket')}, {qn('count')}) "
+        f"VALUES {placeholders} "
+        f"ON CONFLICT ({qn('metric')}, {qn('dimension')}, {qn('bucket')}, {qn('key')}) "
+        f"DO UPDATE SET {qn('count')} = {table}.{qn('count')} + excluded.{qn('count')}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def record(metric, when, dims=None, n=1, total=True):
+    """
+    Count n events of `metric` at time `when`
+    dims maps dimension -> key, e.g. {'intent': 'exam', 'semester': 3}.
+    A negative n retracts events counted earlier; total=False leaves the
+    'total' row alone and only counts the dimensions.
+    """
+    if not n:
+        return
+    rows = _dimension_rows(dims or {}, total)
+    if not rows:
+        return
+    buckets = ((HourlyRollup, hour_bucket(when)), (DailyRollup, day_bucket(when)))
+    with transaction.atomic():
+        for model, bucket in buckets:
+            if n > 0:
+                _upsert(model, metric, bucket, rows, n)
+                continue
+            for dimension, key in rows:
+                model.objects.filter(
+                    metric=metric, dimension=dimension, bucket=bucket, key=key, count__gte=-n,
+                ).update(count=F('count') + n)
+
+
+# ---------------------------------------------------------------------------
+# Backfill from raw tables
+# ---------------------------------------------------------------------------
+
+def fill_missing_intents(since=None):
+    """Classify AIQuery rows saved before intents were recorded"""
+    from ai_helper.ai_logic import SmartAIAssistant
+
+    ai = SmartAIAssistant()
+    queryset = AIQuery.objects.filter(intent='').only('id', 'query')
+    if since:
+        queryset = queryset.filter(created_at__gte=since)
+
+    updated = 0
+    batch = []
+    for ai_query in queryset.iterator(chunk_size=BATCH_SIZE):
+        ai_query.intent = ai.detect_intent(ai_query.query)
+        batch.append(ai_query)
+        if len(batch) >= BATCH_SIZE:
+            AIQuery.objects.bulk_update(batch, ['intent'])
+            updated += len(batch)
+            batch = []
+    if batch:
+        AIQuery.objects.bulk_update(batch, ['intent'])
+        updated += len(batch)
+    return updated
+
+
+def _grouped_events(metric, since):
+    """
+    Yield (hour, dims, n) groups for a metric, aggregated by the database
+    """
+    if metric == 'ai_query':
+        queryset = AIQuery.objects.all()
+        time_field = 'created_at'
+        fields = {'intent': 'intent', 'semester': 'user__student_profile__semester'}
+    elif metric == 'download':
+        queryset = NoteDownload.objects.all()
+        time_field = 'downloaded_at'
+        fields = {
+            'note': 'note_id',
+            'subject': 'note__subject_id',
+            'semester': 'note__subject__semester',
+        }
+    elif metric == 'signup':
+        # Same definition as core.signals: student users by date_joined
+        # (the semester dimension uses the profile's current semester)
+        queryset = User.objects.filter(role='student')
+        time_field = 'date_joined'
+        fields = {'semester': 'student_profile__semester'}
+    else:
+        raise ValueError(f"Unknown metric: {metric}")
+
+    if since:
+        queryset = queryset.filter(**{f'{time_field}__gte': since})
+
+    groups = (
+        queryset.order_by()
+        .annotate(hour=TruncHour(time_field))
+        .values('hour', *fields.values())
+        .annotate(n=Count('pk'))
+    )
+    for group in groups.iterator(chunk_size=BATCH_SIZE):
+        dims = {dimension: group[lookup] for dimension, lookup in fields.items()}
+        yield group['hour'], dims, group['n']
+
+
+def backfill(metric, since=None):
+    """
+    Rebuild rollups for `metric` from the raw tables
+    since: aware datetime; rollups from the start of that day are replaced.
+    AI queries moved to the archive are gone from the table, so ai_query
+    rollups up to the last archived day are always kept.
+    Returns (hourly_rows, daily_rows) written.
+    """
+    if metric == 'ai_query':
+        kept_until = archive.archived_until()
+        if kept_until and (since is None or since < kept_until):
+            since = kept_until
+    if since:
+        since = timezone.localtime(since).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    hourly = defaultdict(int)
+    daily = defaultdict(int)
+    for hour, dims, n in _grouped_events(metric, since):
+        day = day_bucket(hour)
+        for dimension, key in _dimension_rows(dims):
+            hourly[(hour, dimension, key)] += n
+            daily[(day, dimension, key)] += n
+
+    with transaction.atomic():
+        hourly_qs = HourlyRollup.objects.filter(metric=metric)
+        daily_qs = DailyRollup.objects.filter(metric=metric)
+        if since:
+            hourly_qs = hourly_qs.filter(bucket__gte=since)
+            daily_qs = daily_qs.filter(bucket__gte=since.date())
+        hourly_qs.delete()
+        daily_qs.delete()
+
+        HourlyRollup.objects.bulk_create(
+            [HourlyRollup(metric=metric, bucket=bucket, dimension=dimension, key=key, count=n)
+             for (bucket, dimension, key), n in hourly.items()],
+            batch_size=BATCH_SIZE,
+        )
+        DailyRollup.objects.bulk_create(
+            [DailyRollup(metric=metric, bucket=bucket, dimension=dimension, key=key, count=n)
+             for (bucket, dimension, key), n in daily.items()],
+            batch_size=BATCH_SIZE,
+        )
+
+    return len(hourly), len(daily)
+
+
+# ---------------------------------------------------------------------------
+# Reading rollups
+# ---------------------------------------------------------------------------
+
+def series(metric, start, end, granularity='hour', dimension='total', keys=None):
+    """
+    Counts per bucket in [start, end) as (buckets, {key: [counts]})
+    Buckets with no events are filled with zeros.
+    """
+    if granularity == 'hour':
+        model = HourlyRollup
+        first, last, step = hour_bucket(start), end, timedelta(hours=1)
+    else:
+        model = DailyRollup
+        first, last, step = day_bucket(start), day_bucket(end), timedelta(days=1)
+
+    rows = model.objects.filter(
+        metric=metric, dimension=dimension, bucket__gte=first, bucket__lt=last,
+    )
+    if keys is not None:
+        rows = rows.filter(key__in=[str(key) for key in keys])
+
+    buckets = []
+    bucket = first
+    while bucket < last:
+        buckets.append(bucket)
+        bucket += step
+    position = {bucket: i for i, bucket in enumerate(buckets)}
+
+    data = {}
+    for bucket, key, count in rows.values_list('bucket', 'key', 'count'):
+        if granularity == 'hour':
+            bucket = hour_bucket(bucket)
+        if bucket in position:
+            data.setdefault(key, [0] * len(buckets))[position[bucket]] += count
+    return buckets, data
+
+
+def top_keys(metric, dimension, start, end, limit=10):
+    """Most frequent keys of a dimension between two dates, from daily rollups"""
+    return list(
+        DailyRollup.objects.filter(
+            metric=metric, dimension=dimension,
+            bucket__gte=day_bucket(start), bucket__lt=day_bucket(end) + timedelta(days=1),
+        )
+        .values('key')
+        .annotate(total=Sum('count'))
+        .order_by('-total')[:limit]
+    )
+
+
+def key_labels(dimension, keys):
+    """Human readable labels for rollup keys"""
+    keys = [key for key in keys if key]
+    if dimension == 'note':
+        names = Note.objects.filter(pk__in=keys).values_list('pk', 'title')
+    elif dimension == 'subject':
+        names = Subject.objects.filter(pk__in=keys).values_list('pk', 'code')
+    elif dimension == 'semester':
+        return {key: f"Semester {key}" for key in keys}
+    elif dimension == 'total':
+        return {'': 'Total'}
+    else:
+        return {key: key.replace('_', ' ').title() for key in keys}
+    return {str(pk): name for pk, name in names}
@@ -0,0 +1,88 @@
+"""
+Async variants of the notes listing, notices feed and notice stream
+Routed instead of the sync views when ASYNC_VIEWS is on; they share the
+filtering, serialization and cache keys of core.feeds.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.shortcuts import render
+
+from .models import Notice, Subject
+from . import events, recommendations
+from .events import notice_feed_item
+from .feeds import NOTICES_FEED_CACHE_KEY, SUBJECTS_CACHE_KEY, filter_notes, stream_response, stream_start
+from users.decorators import alogin_required
+
+SUBJECTS_CACHE_SECONDS = 300
+
+
+@alogin_required
+async def notes_view(request):
+    """
+    Notes and Resources Hub
+    """
+    notes, semester_filter, subject_filter = filter_notes(request)
+    
+    subjects = await cache.aget(SUBJECTS_CACHE_KEY)
+    if subjects is None:
+        subjects = [subject async for subject in Subject.objects.all()]
+        await cache.aset(SUBJECTS_CACHE_KEY, subjects, SUBJECTS_CACHE_SECONDS)
+    
+    # Templates are sync: hand them fully loaded lists, never querysets
+    context = {
+        'notes': [note async for note in notes],
+        'subjects': subjects,
+        'also_downloaded': await sync_to_async(recommendations.for_user)(request.user, limit=4, recent=1),
+        'selected_semester': semester_filter,
+        'selected_subject': subject_filter,
+    }
+    
+    return render(request, 'core/notes.html', context)
+
+
+@alogin_required
+async def notices_feed(request):
+    """
+    Latest notices as JSON, cached for NOTICES_FEED_CACHE_SECONDS
+    """
+    feed = await cache.aget(NOTICES_FEED_CACHE_KEY)
+    if feed is None:
+        feed = [notice_feed_item(notice) async for notice in Notice.objects.all()[:settings.NOTICES_FEED_SIZE]]
+        await cache.aset(NOTICES_FEED_CACHE_KEY, feed, settings.NOTICES_FEED_CACHE_SECONDS)
+    
+    return JsonResponse({'notices': feed})
+
+
+@alogin_required
+async def notice_stream(request):
+    """
+    Server-sent events with new notices; a listener costs one queue, no thread
+    The stream ends after NOTICE_STREAM_MAX_SECONDS and the browser reconnects.
+    """
+    lines, since = await sync_to_async(stream_start)(request)
+    
+    async def stream():
+        loop = asyncio.get_running_loop()
+        inbox = asyncio.Queue()
+        # The hub delivers on its poller thread
+        token = events.hub.subscribe(lambda batch: loop.call_soon_threadsafe(inbox.put_nowait, batch), since)
+        try:
+            for line in lines:
+                yield line
+            deadline = loop.time() + settings.NOTICE_STREAM_MAX_SECONDS
+            while loop.time() < deadline:
+                try:
+                    batch = await asyncio.wait_for(inbox.get(), settings.NOTICE_STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                for event in batch:
+                    yield events.format_event(event)
+        finally:
+            events.hub.unsubscribe(token)
+    
+    return stream_response(stream())
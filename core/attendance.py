@@ -0,0 +1,411 @@
+"""
+Attendance store for Smart College Helper Portal
+One packed bitmap per (student, subject, term); bit i is session i of the
+subject's SessionCalendar. All statistics are derived from popcounts.
+"""
+import csv
+from datetime import date
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import AttendanceRecord, SessionCalendar, Subject
+from users.backends import invalidate_cached_profiles
+from users.models import StudentProfile
+
+QUERY_CHUNK = 900  # stay below SQLite's bound-parameter limit
+
+
+def current_term(today=None):
+    """ATTENDANCE_TERM if configured, else '<year>-odd' (Jul-Dec) / '<year>-even' (Jan-Jun)"""
+    term = getattr(settings, 'ATTENDANCE_TERM', None)
+    if term:
+        return term
+    today = today or timezone.localdate()
+    return f"{today.year}-{'odd' if today.month >= 7 else 'even'}"
+
+
+def threshold():
+    return getattr(settings, 'ATTENDANCE_THRESHOLD', 75)
+
+
+# ---------------------------------------------------------------------------
+# Bitmaps
+# ---------------------------------------------------------------------------
+
+def to_int(bitmap):
+    return int.from_bytes(bytes(bitmap or b''), 'little')
+
+
+def to_bytes(value):
+    return value.to_bytes((value.bit_length() + 7) // 8, 'little')
+
+
+def popcount(bitmap):
+    return to_int(bitmap).bit_count()
+
+
+def _update_column(model, field_name, rows):
+    """
+    UPDATE one column for many rows with a single executemany()
+    rows: iterable of (value, pk) with values the DB driver adapts natively
+    (bytes, float). Much cheaper than bulk_update's CASE WHEN for the tens of
+    thousands of rows a roll-call import touches.
+    """
+    qn = connection.ops.quote_name
+    column = model._meta.get_field(field_name).column
+    sql = (
+        f"UPDATE {qn(model._meta.db_table)} SET {qn(column)} = %s "
+        f"WHERE {qn(model._meta.pk.column)} = %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, list(rows))
+
+
+def _insert_records(term, rows):
+    """INSERT new AttendanceRecord rows with executemany(); rows: (profile_id, subject_id, bitmap)"""
+    qn = connection.ops.quote_name
+    opts = AttendanceRecord._meta
+    columns = ', '.join(qn(opts.get_field(name).column) for name in ['profile', 'subject', 'term', 'present'])
+    sql = f"INSERT INTO {qn(opts.db_table)} ({columns}) VALUES (%s, %s, %s, %s)"
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, [(profile_id, subject_id, term, bitmap) for profile_id, subject_id, bitmap in rows])
+
+
+# ---------------------------------------------------------------------------
+# Statistics
+# ---------------------------------------------------------------------------
+
+def eligibility(attended, held, target):
+    """
+    (percentage, eligible) from attended/held counts, scalars or NumPy arrays
+    The percentage is rounded to one decimal and eligibility is judged on
+    that shown value, so the attendance page and the cohort report agree.
+    """
+    attended, held = np.asarray(attended), np.asarray(held)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percentage = np.round(np.where(held > 0, attended * 100.0 / held, 100.0), 1)
+    return percentage, percentage >= target
+
+
+def summarize(attended, held, planned, target=None):
+    """
+    Attendance statistics from attended/held session counts
+    can_miss: further absences allowed while staying at or above target
+    classes_needed: consecutive classes to attend to get back to target
+    """
+    target = threshold() if target is None else target
+    percentage, eligible = eligibility(attended, held, target)
+    can_miss = max(0, attended * 100 // target - held) if target else held
+    shortfall = target * held - 100 * attended
+    classes_needed = max(0, -(-shortfall // (100 - target))) if target < 100 else 0
+    return {
+        'attendance_percentage': float(percentage),
+        'is_eligible': bool(eligible),
+        'attended_classes': attended,
+        'held_classes': held,
+        'missed_classes': held - attended,
+        'total_classes': max(planned, held),
+        'classes_remaining': max(0, planned - held),
+        'can_miss': can_miss,
+        'classes_needed': classes_needed,
+        'target_percentage': target,
+    }
+
+
+def student_attendance(profile, term=None):
+    """
+    Per-subject and overall attendance for a student
+    Returns (overall, subjects) or (None, []) if no records exist for the term.
+    """
+    term = term or current_term()
+    records = list(
+        AttendanceRecord.objects.filter(profile=profile, term=term)
+        .select_related('subject').order_by('subject__name')
+    )
+    if not records:
+        return None, []
+
+    calendars = {
+        calendar.subject_id: calendar
+        for calendar in SessionCalendar.objects.filter(term=term, subject_id__in=[r.subject_id for r in records])
+    }
+
+    subjects = []
+    attended_total = held_total = planned_total = 0
+    for record in records:
+        calendar = calendars.get(record.subject_id)
+        held = calendar.held if calendar else 0
+        planned = calendar.planned_sessions if calendar else 0
+        attended = record.attended
+        subjects.append({'subject': record.subject, **summarize(attended, held, planned)})
+        attended_total += attended
+        held_total += held
+        planned_total += planned
+
+    return summarize(attended_total, held_total, planned_total), subjects
+
+
+def _held_sessions(term):
+    """{subject_id: sessions held} for a term"""
+    calendars = SessionCalendar.objects.filter(term=term).values_list('subject_id', 'dates')
+    return {subject_id: len(dates) for subject_id, dates in calendars}
+
+
+def _store_percentages(records, held):
+    """
+    Write StudentProfile.attendance_percentage from (profile_id, subject_id, bitmap)
+    rows covering every record of each profile in the term
+    """
+    totals = {}
+    for profile_id, subject_id, present in records:
+        total = totals.setdefault(profile_id, [0, 0])
+        total[0] += popcount(present)
+        total[1] += held.get(subject_id, 0)
+
+    _update_column(StudentProfile, 'attendance_percentage', [
+        (round(attended * 100 / sessions, 1), profile_id)
+        for profile_id, (attended, sessions) in totals.items()
+        if sessions
+    ])
+    # Raw updates skip post_save, so drop cached request.user pairs explicitly
+    transaction.on_commit(lambda: invalidate_cached_profiles(totals))
+
+
+def refresh_attendance_percentage(profile_ids, term=None):
+    """
+    Recompute the cached StudentProfile.attendance_percentage for profiles
+    from their bitmaps (overall attended / held across subjects)
+    """
+    term = term or current_term()
+    profile_ids = list(profile_ids)
+    held = _held_sessions(term)
+
+    for start in range(0, len(profile_ids), QUERY_CHUNK):
+        records = AttendanceRecord.objects.filter(
+            term=term, profile_id__in=profile_ids[start:start + QUERY_CHUNK],
+        ).values_list('profile_id', 'subject_id', 'present')
+        _store_percentages(records, held)
+
+
+# ---------------------------------------------------------------------------
+# Recording marks
+# ---------------------------------------------------------------------------
+
+def _calendar_slots(term, subject_dates):
+    """
+    Bit index for every (subject_id, date), appending unseen dates to calendars
+    Returns (calendars, slots, grown) where slots is {subject_id: {date: index}}
+    and grown the subjects that gained sessions; calendars are saved by the caller.
+    """
+    # select_for_update(): this read starts apply_marks()'s writing transaction
+    calendars = {
+        calendar.subject_id: calendar
+        for calendar in SessionCalendar.objects.select_for_update().filter(
+            term=term, subject_id__in=list(subject_dates),
+        )
+    }
+    slots = {}
+    grown = set()
+    for subject_id, dates in subject_dates.items():
+        calendar = calendars.get(subject_id)
+        if calendar is None:
+            calendar = calendars[subject_id] = SessionCalendar(subject_id=subject_id, term=term, dates=[])
+        index = {day: i for i, day in enumerate(calendar.dates)}
+        for day in sorted(dates):
+            if day not in index:
+                index[day] = len(calendar.dates)
+                calendar.dates.append(day)
+                grown.add(subject_id)
+        slots[subject_id] = index
+    return calendars, slots, grown
+
+
+def apply_marks(marks, term=None):
+    """
+    Merge attendance marks into the bitmaps in one transaction
+    marks: iterable of (profile_id, subject_id, date, present)
+    Returns the number of marks applied.
+    """
+    term = term or current_term()
+
+    # Collapse marks into per-(profile, subject) set/clear masks keyed by date
+    pending = {}
+    subject_dates = {}
+    count = 0
+    for profile_id, subject_id, day, present in marks:
+        if isinstance(day, date):
+            day = day.isoformat()
+        entry = pending.setdefault((profile_id, subject_id), {})
+        entry[day] = present
+        subject_dates.setdefault(subject_id, set()).add(day)
+        count += 1
+    if not pending:
+        return 0
+
+    with transaction.atomic():
+        calendars, slots, grown = _calendar_slots(term, subject_dates)
+
+        masks = {}
+        for key, days in pending.items():
+            index = slots[key[1]]
+            set_mask = clear_mask = 0
+            for day, present in days.items():
+                if present:
+                    set_mask |= 1 << index[day]
+                else:
+                    clear_mask |= 1 << index[day]
+            masks[key] = (set_mask, clear_mask)
+
+        # Load every bitmap of the marked students for the term: the marked
+        # ones are merged, all of them feed the cached percentages
+        profile_ids = sorted({profile_id for profile_id, _ in masks})
+        marked = set(profile_ids)
+        bitmaps = {}
+        records = AttendanceRecord.objects.filter(term=term)
+        if len(profile_ids) <= QUERY_CHUNK:
+            records = records.filter(profile_id__in=profile_ids)
+        # else: cohort-sized import, one pass over the term beats chunked IN lookups
+        records = records.values_list('id', 'profile_id', 'subject_id', 'present')
+        for pk, profile_id, subject_id, present in records.iterator(chunk_size=10000):
+            if profile_id in marked:
+                bitmaps[(profile_id, subject_id)] = (pk, bytes(present))
+
+        to_update, to_create = [], []
+        for key, (set_mask, clear_mask) in masks.items():
+            record = bitmaps.get(key)
+            if record is None:
+                merged = to_bytes(set_mask)
+                to_create.append((key[0], key[1], merged))
+            else:
+                pk, present = record
+                merged = to_bytes((to_int(present) | set_mask) & ~clear_mask)
+                if merged != present:
+                    to_update.append((merged, pk))
+            bitmaps[key] = (None, merged)
+
+        _update_column(AttendanceRecord, 'present', to_update)
+        _insert_records(term, to_create)
+
+        for subject_id in grown:
+            calendars[subject_id].save()
+
+        _store_percentages(
+            ((profile_id, subject_id, present) for (profile_id, subject_id), (_, present) in bitmaps.items()),
+            _held_sessions(term),
+        )
+
+        # A new session changes the percentage of everyone enrolled in the
+        # subject, including students missing from this batch of marks
+        if grown:
+            unmarked = set(
+                AttendanceRecord.objects.filter(term=term, subject_id__in=grown)
+                .values_list('profile_id', flat=True)
+            ) - marked
+            if unmarked:
+                refresh_attendance_percentage(unmarked, term)
+
+    return count
+
+
+def record_session(subject, day, present_profile_ids, absent_profile_ids=(), term=None):
+    """Record one roll call: listed profiles present, the others absent"""
+    marks = [(profile_id, subject.pk, day, True) for profile_id in present_profile_ids]
+    marks += [(profile_id, subject.pk, day, False) for profile_id in absent_profile_ids]
+    return apply_marks(marks, term)
+
+
+# ---------------------------------------------------------------------------
+# Importing roll-call sheets
+# ---------------------------------------------------------------------------
+
+PRESENT_VALUES = {'p', 'present', '1', 'y', 'yes', 'true'}
+ABSENT_VALUES = {'a', 'absent', '0', 'n', 'no', 'false'}
+MAX_REPORTED_ERRORS = 20
+
+
+class ImportReport:
+    """Outcome of a roll-call import"""
+
+    def __init__(self):
+        self.rows = 0
+        self.marks = 0
+        self.skipped = 0
+        self.errors = []
+
+    def skip(self, line, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"line {line}: {message}")
+
+
+def _parse_marks(reader, report, profiles, subjects, subject_id=None, day=None):
+    """
+    Turn CSV rows into (profile_id, subject_id, date, present) marks
+    Columns: enrollment_number, status[, subject][, date]; `subject` and
+    `date` columns may be omitted when defaults are given.
+    """
+    for line, row in enumerate(reader, start=2):
+        report.rows += 1
+        enrollment = (row.get('enrollment_number') or '').strip()
+        profile_id = profiles.get(enrollment)
+        if profile_id is None:
+            report.skip(line, f"unknown enrollment number '{enrollment}'")
+            continue
+
+        status = (row.get('status') or row.get('present') or '').strip().lower()
+        if status in PRESENT_VALUES:
+            present = True
+        elif status in ABSENT_VALUES:
+            present = False
+        else:
+            report.skip(line, f"invalid status '{status}'")
+            continue
+
+        row_subject = subject_id
+        code = (row.get('subject') or '').strip()
+        if code:
+            row_subject = subjects.get(code.upper())
+        if row_subject is None:
+            report.skip(line, f"unknown subject '{code}'")
+            continue
+
+        row_day = (row.get('date') or '').strip() or day
+        if not row_day:
+            report.skip(line, "missing date")
+            continue
+        try:
+            row_day = date.fromisoformat(row_day).isoformat()
+        except ValueError:
+            report.skip(line, f"invalid date '{row_day}'")
+            continue
+
+        report.marks += 1
+        yield profile_id, row_subject, row_day, present
+
+
+def import_roll_call(text_stream, term=None, subject=None, day=None):
+    """
+    Stream a roll-call CSV into the attendance bitmaps
+    Enrollment numbers and subject codes are resolved with two prefetched
+    dicts, and all marks are merged by apply_marks() in one transaction.
+    Returns an ImportReport.
+    """
+    profiles = dict(
+        StudentProfile.objects.exclude(enrollment_number=None)
+        .values_list('enrollment_number', 'id')
+    )
+    subjects = {code.upper(): pk for code, pk in Subject.objects.values_list('code', 'id')}
+    if isinstance(day, date):
+        day = day.isoformat()
+
+    report = ImportReport()
+    reader = csv.DictReader(text_stream)
+    reader.fieldnames = [name.strip().lower() for name in reader.fieldnames or []]
+    apply_marks(
+        _parse_marks(reader, report, profiles, subjects, subject.pk if subject else None, day),
+        term,
+    )
+    return report
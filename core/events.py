@@ -0,0 +1,130 @@
+"""
+Real-time notice events
+The Notice table is the change feed: while a worker has stream listeners one
+poller thread queries notices newer than the last id it saw (one indexed
+query per NOTICE_STREAM_POLL_SECONDS per worker, however many students are
+connected) and fans them out to every listener of that worker. Notices posted
+by the same worker wake the poller at once through notify().
+"""
+import json
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+from .models import Notice
+
+RECENT_EVENTS = 100  # kept for listeners that subscribe while the poller runs
+
+
+def latest_notice_id():
+    return Notice.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def notice_feed_item(notice):
+    """JSON-ready dict of a notice, shared by the notices feed and the stream"""
+    return {
+        'id': notice.id,
+        'title': notice.title,
+        'content': notice.content,
+        'is_important': notice.is_important,
+        'file': notice.file.url if notice.file else None,
+        'posted_at': notice.posted_at.isoformat(),
+    }
+
+
+def notice_events(after_id, limit=None):
+    """Event dicts of the notices with id > after_id (the newest `limit`), oldest first"""
+    notices = Notice.objects.filter(id__gt=after_id).order_by('-id')
+    if limit:
+        notices = notices[:limit]
+    return [notice_feed_item(notice) for notice in reversed(list(notices))]
+
+
+def format_event(event):
+    """One server-sent event"""
+    return f"id: {event['id']}\nevent: notice\ndata: {json.dumps(event)}\n\n"
+
+
+class NoticeHub:
+    """
+    Per-process fan-out of new notices to stream listeners
+    deliver(events) callbacks run on the poller thread and must not block.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._subscribers = {}
+        self._next_token = 0
+        self._recent = []
+        self._last_id = 0
+        self._thread = None
+
+    def subscribe(self, deliver, since):
+        """
+        Register a listener that has seen every notice up to id `since`
+        Returns a token for unsubscribe(). Starts the poller if needed.
+        """
+        with self._lock:
+            self._next_token += 1
+            token = self._next_token
+            subscriber = self._subscribers[token] = {'deliver': deliver, 'cursor': since}
+            if self._thread is None:
+                self._last_id = since
+                self._recent = []
+                self._thread = threading.Thread(target=self._run, name='notice-hub', daemon=True)
+                self._thread.start()
+            else:
+                self._send(subscriber, self._recent)
+        return token
+
+    def unsubscribe(self, token):
+        with self._lock:
+            self._subscribers.pop(token, None)
+            if not self._subscribers:
+                self._wake.set()  # let the poller exit
+
+    def notify(self):
+        """A notice was committed in this process: poll now"""
+        self._wake.set()
+
+    def poll(self):
+        """Fetch notices newer than the last seen id and deliver them"""
+        with self._lock:
+            after_id = self._last_id
+        events = notice_events(after_id)
+        if not events:
+            return 0
+        with self._lock:
+            self._last_id = max(self._last_id, events[-1]['id'])
+            self._recent = (self._recent + events)[-RECENT_EVENTS:]
+            for subscriber in self._subscribers.values():
+                self._send(subscriber, events)
+        return len(events)
+
+    @staticmethod
+    def _send(subscriber, events):
+        fresh = [event for event in events if event['id'] > subscriber['cursor']]
+        if fresh:
+            subscriber['cursor'] = fresh[-1]['id']
+            subscriber['deliver'](fresh)
+
+    def _run(self):
+        try:
+            while True:
+                self._wake.wait(settings.NOTICE_STREAM_POLL_SECONDS)
+                self._wake.clear()
+                with self._lock:
+                    if not self._subscribers:
+                        self._thread = None
+                        return
+                try:
+                    self.poll()
+                except DatabaseError:
+                    pass  # e.g. locked; the next poll retries from the same id
+        finally:
+            connections.close_all()
+
+
+hub = NoticeHub()
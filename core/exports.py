@@ -0,0 +1,120 @@
+"""
+Streaming exports of the AI query log and note download events
+Rows are read with chunked iterators and encoded one line at a time,
+so memory use does not grow with the number of exported rows.
+"""
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from .models import NoteDownload
+from ai_helper.models import AIQuery
+
+CHUNK_SIZE = 2000
+
+EXPORTS = {
+    'ai_queries': {
+        'model': AIQuery,
+        'time_field': 'created_at',
+        'user_field': 'user__username',
+        'columns': [
+            ('id', 'id'),
+            ('created_at', 'created_at'),
+            ('username', 'user__username'),
+            ('intent', 'intent'),
+            ('query', 'query'),
+            ('response', 'response'),
+        ],
+    },
+    'downloads': {
+        'model': NoteDownload,
+        'time_field': 'downloaded_at',
+        'user_field': 'user__username',
+        'columns': [
+            ('id', 'id'),
+            ('downloaded_at', 'downloaded_at'),
+            ('username', 'user__username'),
+            ('note_id', 'note_id'),
+            ('note_title', 'note__title'),
+            ('subject', 'note__subject__code'),
+            ('semester', 'note__subject__semester'),
+        ],
+    },
+}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+def parse_date(value):
+    """Parse YYYY-MM-DD (or return None for empty values)"""
+    if not value:
+        return None
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def export_rows(kind, start=None, end=None, username=None):
+    """
+    Header and a lazy row iterator for an export
+    start/end are inclusive dates, username filters to one user
+    """
+    spec = EXPORTS[kind]
+    time_field = spec['time_field']
+    queryset = spec['model'].objects.order_by(time_field, 'id')
+
+    if start:
+        queryset = queryset.filter(**{
+            f'{time_field}__gte': timezone.make_aware(datetime.combine(start, time.min)),
+        })
+    if end:
+        queryset = queryset.filter(**{
+            f'{time_field}__lt': timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min)),
+        })
+    if username:
+        queryset = queryset.filter(**{spec['user_field']: username})
+
+    header = [name for name, _ in spec['columns']]
+    lookups = [lookup for _, lookup in spec['columns']]
+    return header, queryset.values_list(*lookups).iterator(chunk_size=CHUNK_SIZE)
+
+
+class _Echo:
+    """File-like object whose write() returns the value instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+def _format_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def encode_csv(header, rows):
+    """Yield CSV lines for header + rows"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([_format_value(value) for value in row])
+
+
+def encode_jsonl(header, rows):
+    """Yield one JSON object per line"""
+    for row in rows:
+        yield json.dumps(
+            {name: _format_value(value) for name, value in zip(header, row)},
+            ensure_ascii=False,
+        ) + '\n'
+
+
+def stream_export(kind, fmt='csv', start=None, end=None, username=None):
+    """Lazily encoded lines of an export in the given format"""
+    header, rows = export_rows(kind, start, end, username)
+    if fmt == 'jsonl':
+        return encode_jsonl(header, rows)
+    return encode_csv(header, rows)
@@ -0,0 +1,55 @@
+"""
+Notes filtering, notice feed cache keys and notice stream helpers
+Shared by the sync views (core.views), their async variants
+(core.async_views) and the cache invalidation in core.signals.
+"""
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from . import events
+from .models import Note
+
+# Cleared by core.signals when subjects or notices change
+SUBJECTS_CACHE_KEY = 'core:subjects'
+NOTICES_FEED_CACHE_KEY = 'core:notices_feed'
+
+
+def filter_notes(request):
+    """
+    Notes queryset for the semester/subject GET filters
+    Returns (notes, semester_filter, subject_filter)
+    """
+    notes = Note.objects.select_related('subject')
+    semester_filter = request.GET.get('semester')
+    subject_filter = request.GET.get('subject')
+    
+    if semester_filter:
+        notes = notes.filter(subject__semester=semester_filter)
+    
+    if subject_filter:
+        notes = notes.filter(subject_id=subject_filter)
+    
+    return notes, semester_filter, subject_filter
+
+
+def stream_start(request):
+    """
+    Opening lines of a notice stream and the id it covers up to
+    Replays notices missed since the browser's Last-Event-ID (or sends none
+    on a first connect), so reconnecting never loses an event.
+    """
+    retry = f"retry: {settings.NOTICE_STREAM_RETRY_MS}\n\n"
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    if not last_event_id.isdigit():
+        return [retry], events.latest_notice_id()
+    
+    backlog = events.notice_events(int(last_event_id), limit=settings.NOTICES_FEED_SIZE)
+    since = backlog[-1]['id'] if backlog else int(last_event_id)
+    return [retry] + [events.format_event(event) for event in backlog], since
+
+
+def stream_response(content):
+    response = StreamingHttpResponse(content, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: do not buffer the stream
+    return response
@@ -0,0 +1,100 @@
+"""
+Per-worker in-memory cache of hot note files
+download_note serves files up to HOT_FILE_MAX_FILE_BYTES from memory, keeping
+the most recently downloaded ones within HOT_FILE_CACHE_BYTES (LRU). Entries
+are keyed by path and checked against the file's mtime and size on every
+hit, so a file replaced on disk (by any worker) is never served stale; one
+stat() replaces the open() and read() of a miss. Larger files are not cached
+and go out through FileResponse (sendfile where the server supports it).
+"""
+import os
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class HotFileCache:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # path -> (mtime_ns, size, data), oldest first
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path):
+        """Contents of the file at path, or None if it is too large to cache"""
+        stat = os.stat(path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[:2] == key:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+
+        budget = settings.HOT_FILE_CACHE_BYTES
+        if stat.st_size > min(settings.HOT_FILE_MAX_FILE_BYTES, budget):
+            self.invalidate(path)
+            return None
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) != stat.st_size:
+            return data  # being rewritten, serve it but do not cache it
+
+        with self._lock:
+            self._remove(path)
+            self._entries[path] = key + (data,)
+            self._bytes += len(data)
+            while self._bytes > budget:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return data
+
+    def invalidate(self, path):
+        with self._lock:
+            self._remove(path)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def _remove(self, path):
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._bytes -= len(entry[2])
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+            }
+
+    def render_prometheus(self):
+        """This worker's counters in Prometheus text format, labelled with its pid"""
+        stats = self.stats()
+        worker = os.getpid()
+        lines = []
+        for name, kind, help_text, key in (
+            ('portal_file_cache_hits_total', 'counter', 'Note downloads served from memory.', 'hits'),
+            ('portal_file_cache_misses_total', 'counter', 'Note downloads read from disk.', 'misses'),
+            ('portal_file_cache_evictions_total', 'counter', 'Files evicted to stay within the byte budget.', 'evictions'),
+            ('portal_file_cache_entries', 'gauge', 'Files held in memory.', 'entries'),
+            ('portal_file_cache_bytes', 'gauge', 'Bytes held in memory.', 'bytes'),
+        ):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.append(f'{name}{{worker="{worker}"}} {stats[key]}')
+        return '\n'.join(lines) + '\n'
+
+
+hot_files = HotFileCache()
@@ -0,0 +1,157 @@
+"""
+Background jobs on a database-backed queue
+Decorate a function with @job and call func.delay(*args, **kwargs) to queue
+it; `manage.py run_jobs` runs queued jobs in a thread or process pool. A
+worker claims a job with one conditional UPDATE (atomic on SQLite, no
+SELECT ... FOR UPDATE needed) that marks it running under its name until
+now + JOB_LEASE_SECONDS. Failed jobs are retried with exponential backoff
+up to max_attempts; a job whose worker died is claimed again once its lease
+runs out. Jobs run at least once, so they must be safe to repeat: a job
+that adds rows can store current_job_id() on them and skip when a row with
+its id already exists.
+With JOBS_ALWAYS_EAGER (the default under DEBUG) delay() runs the function
+at once, so development needs no worker.
+"""
+import logging
+import os
+import socket
+import threading
+import traceback
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connections, models
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+# Id of the Job being run, None outside workers and for eager calls
+_current_job = ContextVar('current_job', default=None)
+
+
+def current_job_id():
+    return _current_job.get()
+
+
+def job(func=None, *, max_attempts=None):
+    """
+    Register func as a job and give it .delay(*args, **kwargs)
+    Arguments must be JSON-serializable (pass ids, not model instances).
+    """
+    def register(func):
+        name = f'{func.__module__}.{func.__qualname__}'
+        registry[name] = func
+
+        def delay(*args, **kwargs):
+            """Queue a call; returns the Job, or None if it ran eagerly"""
+            if settings.JOBS_ALWAYS_EAGER:
+                func(*args, **kwargs)
+                return None
+            return Job.objects.create(
+                name=name, args=list(args), kwargs=kwargs, run_after=timezone.now(),
+                max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+            )
+
+        func.job_name = name
+        func.delay = delay
+        return func
+
+    return register(func) if func else register
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+
+
+def claim(worker, now=None):
+    """
+    Claim the next due job for `worker`, or None if there is none
+    Candidates are queued jobs that are due and running jobs whose lease ran
+    out; the UPDATE repeats the condition, so of two workers picking the same
+    row only one gets updated == 1.
+    """
+    now = now or timezone.now()
+    expired = Q(status=Job.RUNNING, locked_until__lt=now)
+    # Out of attempts and nobody holds it any more
+    Job.objects.filter(expired, attempts__gte=models.F('max_attempts')).update(
+        status=Job.FAILED, locked_by='', locked_until=None, finished_at=now, last_error='Lease expired',
+    )
+
+    due = Q(status=Job.QUEUED, run_after__lte=now) | expired
+    for job_id in Job.objects.filter(due).order_by('run_after', 'id').values_list('id', flat=True)[:10]:
+        updated = Job.objects.filter(due, id=job_id).update(
+            status=Job.RUNNING,
+            locked_by=worker,
+            locked_until=now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+            attempts=models.F('attempts') + 1,
+        )
+        if updated:
+            return Job.objects.get(id=job_id)
+    return None
+
+
+def run(job_row, worker):
+    """Run a claimed job and record the outcome, returns True on success"""
+    mine = Job.objects.filter(id=job_row.id, status=Job.RUNNING, locked_by=worker)
+    token = _current_job.set(job_row.id)
+    try:
+        func = registry[job_row.name]
+        func(*job_row.args, **job_row.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning('Job %s #%s failed (attempt %s/%s)', job_row.name, job_row.id,
+                       job_row.attempts, job_row.max_attempts, exc_info=True)
+        if job_row.attempts >= job_row.max_attempts:
+            mine.update(status=Job.FAILED, locked_by='', locked_until=None, last_error=error,
+                        finished_at=timezone.now())
+        else:
+            backoff = settings.JOB_RETRY_BACKOFF_SECONDS * 2 ** (job_row.attempts - 1)
+            mine.update(status=Job.QUEUED, locked_by='', locked_until=None, last_error=error,
+                        run_after=timezone.now() + timedelta(seconds=backoff))
+        return False
+    finally:
+        _current_job.reset(token)
+    mine.update(status=Job.DONE, locked_by='', locked_until=None, finished_at=timezone.now())
+    return True
+
+
+def run_pending(worker=None, limit=None):
+    """Claim and run due jobs until none is left (or `limit` ran), returns the count"""
+    worker = worker or worker_name()
+    count = 0
+    while limit is None or count < limit:
+        job_row = claim(worker)
+        if job_row is None:
+            break
+        run(job_row, worker)
+        count += 1
+    return count
+
+
+def work(stop, poll_seconds=None):
+    """Worker loop for one thread or process: run due jobs until `stop` is set"""
+    autodiscover_modules('tasks')
+    worker = worker_name()
+    poll_seconds = poll_seconds or settings.JOB_POLL_SECONDS
+    try:
+        while not stop.is_set():
+            close_old_connections()
+            if not run_pending(worker, limit=100):
+                stop.wait(poll_seconds)
+    finally:
+        connections.close_all()
+
+
+def purge(days=None):
+    """Delete jobs that finished successfully more than `days` ago, returns the count"""
+    days = settings.JOB_KEEP_DAYS if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = Job.objects.filter(status=Job.DONE, finished_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,42 @@
+"""
+Management command for the cohort attendance eligibility report
+Run: python manage.py attendance_report --format csv -o below_threshold.csv
+"""
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import reports
+
+
+class Command(BaseCommand):
+    help = 'Lists every student below the attendance threshold per subject, grouped by branch and semester'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--term', help='Term label (default: current term)')
+        parser.add_argument('--threshold', type=int, help='Minimum attendance percentage (default: ATTENDANCE_THRESHOLD)')
+        parser.add_argument('--format', choices=['csv', 'json'], default='csv')
+        parser.add_argument('--summary', action='store_true', help='CSV of per-group counts instead of students')
+        parser.add_argument('-o', '--output', help='Output file (default: stdout)')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        report = reports.eligibility_report(options['term'], options['threshold'])
+        elapsed = time.perf_counter() - started
+        
+        out = open(options['output'], 'w', encoding='utf-8', newline='') if options['output'] else sys.stdout
+        try:
+            if options['format'] == 'json':
+                reports.write_json(report, out)
+            else:
+                reports.write_csv(report, out, summary=options['summary'])
+        finally:
+            if options['output']:
+                out.close()
+        
+        students = sum(group['students'] for group in report['groups'])
+        self.stderr.write(self.style.SUCCESS(
+            f"{report['term']}: {len(report['students'])} of {students} student-subject records "
+            f"below {report['threshold']}% ({elapsed:.2f}s)"
+        ))
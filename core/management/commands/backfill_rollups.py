@@ -0,0 +1,46 @@
+"""
+Management command to rebuild usage analytics rollups from history
+Run: python manage.py backfill_rollups [--since YYYY-MM-DD] [--metric ai_query]
+"""
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core import analytics
+from core.models import UsageRollup
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds hourly and daily usage rollups from AIQuery, NoteDownload and User rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--metric', action='append', choices=[value for value, _ in UsageRollup.METRIC_CHOICES],
+            help='Metric to rebuild (repeatable, default: all)',
+        )
+        parser.add_argument(
+            '--since', help='Only rebuild buckets from this date (YYYY-MM-DD), default: everything '
+                            '(ai_query buckets of archived days are always kept)',
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = timezone.make_aware(datetime.strptime(options['since'], '%Y-%m-%d'))
+            except ValueError:
+                raise CommandError('--since must be YYYY-MM-DD')
+        
+        metrics = options['metric'] or [value for value, _ in UsageRollup.METRIC_CHOICES]
+        
+        if 'ai_query' in metrics:
+            classified = analytics.fill_missing_intents(since)
+            if classified:
+                self.stdout.write(f'Classified intent for {classified} AI queries')
+        
+        for metric in metrics:
+            hourly, daily = analytics.backfill(metric, since)
+            self.stdout.write(self.style.SUCCESS(
+                f'{metric}: wrote {hourly} hourly and {daily} daily rollup rows'
+            ))
@@ -0,0 +1,269 @@
+"""
+Management command to compare the sync (WSGI) and async (ASGI) view stacks
+Runs the same client load against both stacks in this one process, i.e. the
+same single worker: WSGI requests are served by a pool of --threads threads
+(like a gunicorn gthread worker), ASGI requests by one event loop (like one
+uvicorn worker) with ASYNC_VIEWS switched on. --db-latency adds a sleep to
+every SQL query to mimic a database across the network.
+Note: the run writes real rows (AI queries).
+Run: python manage.py bench_async_views --clients 50 --threads 4 --duration 10
+"""
+import asyncio
+import importlib
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import clear_url_caches
+from django.utils.crypto import get_random_string
+
+from .loadtest import AI_QUESTIONS, percentile
+from users.models import User, StudentProfile
+
+MIX = {
+    'ai_query': 50,
+    'notes': 25,
+    'notices_feed': 25,
+}
+
+
+def use_stack(async_views):
+    """Re-import the URLconfs so they pick the views for ASYNC_VIEWS"""
+    for module in ('core.urls', 'ai_helper.urls', settings.ROOT_URLCONF):
+        importlib.reload(importlib.import_module(module))
+    clear_url_caches()
+
+
+def wsgi_call(application, method, path, body, headers):
+    """Run one request through a WSGI application, returns the status code"""
+    environ = {
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1',
+        'CONTENT_TYPE': headers.get('content-type', ''),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': BytesIO(body),
+        'wsgi.url_scheme': 'http',
+        'wsgi.errors': BytesIO(),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+        'wsgi.version': (1, 0),
+    }
+    for name, value in headers.items():
+        environ['HTTP_' + name.upper().replace('-', '_')] = value
+
+    status = []
+    result = application(environ, lambda line, response_headers, exc_info=None: status.append(int(line[:3])))
+    try:
+        for _ in result:
+            pass
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return status[0]
+
+
+async def asgi_call(application, method, path, body, headers):
+    """Run one request through an ASGI application, returns the status code"""
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [(b'host', b'localhost')] + [(name.encode(), value.encode()) for name, value in headers.items()],
+        'client': ('127.0.0.1', 0),
+        'server': ('localhost', 80),
+    }
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    status = []
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.Event().wait()  # the client never disconnects
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await application(scope, receive, send)
+    return status[0]
+
+
+class Command(BaseCommand):
+    help = 'Compares throughput and latency of the sync (WSGI) and async (ASGI) view stacks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=50, help='Concurrent clients')
+        parser.add_argument('--threads', type=int, default=4, help='WSGI worker threads')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per stack')
+        parser.add_argument('--db-latency', type=float, default=0.0, help='Milliseconds added to every SQL query')
+        parser.add_argument('--stack', choices=['both', 'sync', 'async'], default='both')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--prefix', default='benchasync', help='Username prefix of the synthetic students')
+        parser.add_argument('-o', '--output', help='Write the JSON report here')
+
+    def handle(self, *args, **options):
+        sessions = self._sessions(options['clients'], options['prefix'])
+        if options['db_latency']:
+            self._add_db_latency(options['db_latency'] / 1000)
+        connections.close_all()
+
+        stacks = ['sync', 'async'] if options['stack'] == 'both' else [options['stack']]
+        report = {
+            'clients': options['clients'],
+            'threads': options['threads'],
+            'db_latency_ms': options['db_latency'],
+            'stacks': {},
+        }
+        for stack in stacks:
+            with override_settings(ASYNC_VIEWS=stack == 'async'):
+                use_stack(stack == 'async')
+                results, elapsed = asyncio.run(self._run(stack, sessions, options))
+            report['stacks'][stack] = self._summary(results, elapsed)
+        use_stack(settings.ASYNC_VIEWS)
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+        self._print(report)
+
+    # -- setup ----------------------------------------------------------------
+
+    def _sessions(self, count, prefix):
+        """Cookie and CSRF headers of `count` logged-in students, created on first use"""
+        usernames = [f'{prefix}_{i:04d}' for i in range(count)]
+        existing = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+        missing = [username for username in usernames if username not in existing]
+        if missing:
+            created = User.objects.bulk_create([
+                User(username=username, email=f'{username}@example.com', password=make_password(None), role='student')
+                for username in missing
+            ])
+            StudentProfile.objects.bulk_create([StudentProfile(user=user, semester=1, branch='CSE') for user in created])
+
+        sessions = []
+        for user in User.objects.filter(username__in=usernames):
+            client = Client()
+            client.force_login(user)
+            token = get_random_string(32)
+            sessions.append({
+                'cookie': f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}; '
+                          f'{settings.CSRF_COOKIE_NAME}={token}',
+                'x-csrftoken': token,
+            })
+        return sessions
+
+    def _add_db_latency(self, seconds):
+        def sleep_first(execute, sql, params, many, context):
+            time.sleep(seconds)
+            return execute(sql, params, many, context)
+
+        def install(connection, **kwargs):
+            connection.execute_wrappers.append(sleep_first)
+
+        connection_created.connect(install, weak=False, dispatch_uid='bench_async_views')
+
+    # -- load -----------------------------------------------------------------
+
+    async def _run(self, stack, sessions, options):
+        if stack == 'sync':
+            application = get_wsgi_application()
+            pool = ThreadPoolExecutor(options['threads'])
+            loop = asyncio.get_running_loop()
+
+            def call(*request):
+                return loop.run_in_executor(pool, wsgi_call, application, *request)
+        else:
+            application = get_asgi_application()
+            pool = None
+
+            def call(*request):
+                return asgi_call(application, *request)
+
+        results = {name: {'latencies': [], 'errors': 0} for name in MIX}
+        deadline = time.perf_counter() + options['duration']
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            self._client(call, headers, deadline, results, random.Random(options['seed'] + i))
+            for i, headers in enumerate(sessions)
+        ))
+        elapsed = time.perf_counter() - started
+        if pool:
+            pool.shutdown()
+        return results, elapsed
+
+    async def _client(self, call, headers, deadline, results, rng):
+        names, weights = list(MIX), list(MIX.values())
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            if name == 'ai_query':
+                body = json.dumps({'query': rng.choice(AI_QUESTIONS)}).encode()
+                request = ('POST', '/ai-assistant/api/query/', body, {**headers, 'content-type': 'application/json'})
+            elif name == 'notes':
+                request = ('GET', '/notes/', b'', headers)
+            else:
+                request = ('GET', '/notices/feed/', b'', headers)
+
+            started = time.perf_counter()
+            try:
+                status = await call(*request)
+            except Exception:
+                status = None
+            results[name]['latencies'].append(time.perf_counter() - started)
+            if status is None or status >= 400:
+                results[name]['errors'] += 1
+
+    # -- reporting ------------------------------------------------------------
+
+    def _summary(self, results, elapsed):
+        endpoints = {}
+        for name, entry in results.items():
+            latencies = sorted(entry['latencies'])
+            endpoints[name] = {
+                'requests': len(latencies),
+                'errors': entry['errors'],
+                'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+                'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+            }
+        total = sum(entry['requests'] for entry in endpoints.values())
+        return {
+            'duration_seconds': round(elapsed, 2),
+            'requests': total,
+            'throughput': round(total / elapsed, 2),
+            'errors': sum(entry['errors'] for entry in endpoints.values()),
+            'endpoints': endpoints,
+        }
+
+    def _print(self, report):
+        self.stdout.write(f"{report['clients']} clients, {report['threads']} WSGI threads, "
+                          f"{report['db_latency_ms']} ms simulated DB latency")
+        self.stdout.write(f"{'stack':<6} {'endpoint':<14} {'requests':>9} {'errors':>7} {'p50 ms':>9} {'p99 ms':>9}")
+        for stack, summary in report['stacks'].items():
+            for name, entry in summary['endpoints'].items():
+                self.stdout.write(f"{stack:<6} {name:<14} {entry['requests']:>9} {entry['errors']:>7} "
+                                  f"{entry['p50_ms']:>9} {entry['p99_ms']:>9}")
+            self.stdout.write(self.style.SUCCESS(
+                f"{stack}: {summary['requests']} requests, {summary['throughput']} req/s, {summary['errors']} errors"
+            ))
@@ -0,0 +1,135 @@
+"""
+Management command to measure SQLite write throughput under concurrency
+Worker processes hammer a scratch database with the portal's write pattern
+(read a counter, insert an event, bump the counter, like a note download)
+mixed with reads, once per connection profile:
+    stock       django.db.backends.sqlite3 defaults
+    tuned       randomproject.sqlite (WAL, pragmas, BEGIN IMMEDIATE)
+    tuned+lock  tuned, writers queued on the lock file
+Run: python manage.py bench_db_concurrency --workers 8 --duration 5
+"""
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+
+ALIAS = 'bench'
+
+PROFILES = {
+    'stock': {'ENGINE': 'django.db.backends.sqlite3', 'OPTIONS': {}},
+    'tuned': {'ENGINE': 'randomproject.sqlite', 'OPTIONS': {'timeout': 20}},
+    'tuned+lock': {'ENGINE': 'randomproject.sqlite', 'OPTIONS': {'timeout': 20, 'writer_lock': True}},
+}
+
+
+def _create_schema(path):
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE bench_counter (id INTEGER PRIMARY KEY, total INTEGER NOT NULL);
+        CREATE TABLE bench_event (id INTEGER PRIMARY KEY, worker INTEGER, payload TEXT, created REAL);
+        INSERT INTO bench_counter (id, total) VALUES (1, 0);
+    ''')
+    conn.close()
+
+
+def _setup_worker(database):
+    django.setup()
+    connections.close_all()
+    configured = connections.configure_settings({'default': {}, ALIAS: database})
+    connections.settings[ALIAS] = configured[ALIAS]
+
+
+def _worker(worker, start_at, duration, write_ratio):
+    from randomproject.sqlite import base
+
+    connection = connections[ALIAS]
+    # Declare the write up front where the backend supports it (select_for_update)
+    for_update = ' ' + connection.ops.for_update_sql() if connection.features.has_select_for_update else ''
+    rng = random.Random(worker)
+    writes = reads = errors = 0
+    latencies = []
+    
+    time.sleep(max(0.0, start_at - time.time()))
+    deadline = time.time() + duration
+    while time.time() < deadline:
+        started = time.perf_counter()
+        try:
+            if rng.random() < write_ratio:
+                with transaction.atomic(using=ALIAS), connection.cursor() as cursor:
+                    cursor.execute('SELECT total FROM bench_counter WHERE id = 1' + for_update)
+                    cursor.fetchone()
+                    cursor.execute(
+                        'INSERT INTO bench_event (worker, payload, created) VALUES (%s, %s, %s)',
+                        [worker, 'x' * 200, time.time()],
+                    )
+                    cursor.execute('UPDATE bench_counter SET total = total + 1 WHERE id = 1')
+                writes += 1
+                latencies.append(time.perf_counter() - started)
+            else:
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT id, payload FROM bench_event ORDER BY id DESC LIMIT 20')
+                    cursor.fetchall()
+                reads += 1
+        except OperationalError:
+            errors += 1
+    
+    connection.close()
+    return {
+        'writes': writes,
+        'reads': reads,
+        'errors': errors,
+        'latencies': latencies,
+        'lock_wait': base.WRITER_LOCK_STATS['wait_seconds'],
+    }
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks concurrent SQLite writes with stock and tuned connection settings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent worker processes')
+        parser.add_argument('--duration', type=float, default=5.0, help='Seconds per profile')
+        parser.add_argument('--write-ratio', type=float, default=0.3, help='Share of operations that write')
+        parser.add_argument('--profiles', nargs='+', choices=list(PROFILES), default=list(PROFILES))
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        self.stdout.write(
+            f"{'profile':<12}{'writes/s':>10}{'reads/s':>10}{'errors':>8}"
+            f"{'p50 ms':>9}{'p95 ms':>9}{'lock wait s':>13}"
+        )
+        
+        with tempfile.TemporaryDirectory() as directory:
+            for name in options['profiles']:
+                path = os.path.join(directory, f"{name.replace('+', '_')}.sqlite3")
+                _create_schema(path)
+                database = {**PROFILES[name], 'NAME': path}
+                
+                with ProcessPoolExecutor(max_workers=workers, initializer=_setup_worker,
+                                         initargs=(database,)) as pool:
+                    start_at = time.time() + 1.0
+                    results = list(pool.map(
+                        _worker, range(workers), [start_at] * workers,
+                        [options['duration']] * workers, [options['write_ratio']] * workers,
+                    ))
+                
+                latencies = sorted(latency for result in results for latency in result['latencies'])
+                p50 = statistics.median(latencies) * 1000 if latencies else 0.0
+                p95 = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0.0
+                self.stdout.write(
+                    f"{name:<12}"
+                    f"{sum(r['writes'] for r in results) / options['duration']:>10.0f}"
+                    f"{sum(r['reads'] for r in results) / options['duration']:>10.0f}"
+                    f"{sum(r['errors'] for r in results):>8}"
+                    f"{p50:>9.2f}{p95:>9.2f}"
+                    f"{sum(r['lock_wait'] for r in results):>13.2f}"
+                )
+        
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
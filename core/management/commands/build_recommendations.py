@@ -0,0 +1,32 @@
+"""
+Management command to rebuild the note recommendations from all downloads
+Run on a schedule, e.g. nightly:
+    python manage.py build_recommendations
+    python manage.py build_recommendations --interval 3600
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import recommendations
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the top-K similar notes of every note from the co-download matrix'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=None, help='Neighbours per note')
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Keep running and rebuild every this many seconds',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            rows = recommendations.build(top_k=options['top_k'])
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.SUCCESS(f'{rows} similar-note rows built in {elapsed:.2f}s'))
+            if not options['interval']:
+                break
+            time.sleep(max(0.0, options['interval'] - elapsed))
@@ -0,0 +1,48 @@
+"""
+Management command to export the AI query log or note download events
+Run: python manage.py export_logs ai_queries --format jsonl --start 2025-01-01 -o queries.jsonl
+"""
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import exports
+
+
+class Command(BaseCommand):
+    help = 'Streams AIQuery or NoteDownload rows as CSV or JSONL with constant memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(exports.EXPORTS))
+        parser.add_argument('--format', choices=list(exports.FORMATS), default='csv')
+        parser.add_argument('--start', help='First day to include (YYYY-MM-DD)')
+        parser.add_argument('--end', help='Last day to include (YYYY-MM-DD)')
+        parser.add_argument('--user', help='Only rows for this username')
+        parser.add_argument('-o', '--output', help='Output file (default: stdout)')
+
+    def handle(self, *args, **options):
+        try:
+            start = exports.parse_date(options['start'])
+            end = exports.parse_date(options['end'])
+        except ValueError:
+            raise CommandError('--start and --end must be YYYY-MM-DD')
+        
+        lines = exports.stream_export(options['kind'], options['format'], start, end, options['user'])
+        
+        if options['output']:
+            out = open(options['output'], 'w', encoding='utf-8', newline='')
+        else:
+            out = sys.stdout
+        
+        count = 0
+        try:
+            for line in lines:
+                out.write(line)
+                count += 1
+        finally:
+            if options['output']:
+                out.close()
+        
+        if options['output']:
+            rows = count - 1 if options['format'] == 'csv' else count
+            self.stderr.write(self.style.SUCCESS(f'Exported {rows} rows to {options["output"]}'))
@@ -0,0 +1,303 @@
+"""
+Management command to generate a large, deterministic dataset for performance work
+At --scale 1: 50k students, 100k notes (with small files), 1M AI queries,
+200k study plans, 200k notices and 500k note downloads spread over a year.
+Run: python manage.py generate_load_data --scale 0.1 --seed 42
+"""
+import io
+import os
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from ai_helper.ai_logic import SmartAIAssistant
+from ai_helper.models import AIQuery
+from core import analytics
+from core.models import Note, NoteDownload, Notice, SiteStats, StudyPlan, Subject, UsageRollup
+from users.models import User, StudentProfile
+
+VOLUMES = {
+    'students': 50_000,
+    'notes': 100_000,
+    'ai_queries': 1_000_000,
+    'study_plans': 200_000,
+    'notices': 200_000,
+    'downloads': 500_000,
+}
+
+BRANCHES = ['CSE', 'IT', 'ECE', 'EEE', 'ME', 'CE']
+TOPICS = [
+    'DBMS', 'normalization', 'recursion', 'linked lists', 'binary trees', 'graphs', 'dynamic programming',
+    'operating systems', 'deadlocks', 'TCP/IP', 'machine learning', 'neural networks', 'python', 'SQL joins',
+    'sorting algorithms', 'web development', 'REST APIs', 'software testing', 'agile', 'computer networks',
+]
+QUESTIONS = [
+    'hi', 'hello, can you help me?', 'how to study {topic} for exams', 'explain {topic}', 'what is {topic}',
+    'exam tips for {topic}', 'hackathon ideas using {topic}', 'placement preparation for {topic}',
+    'how much attendance do I need', 'help with my {topic} assignment', 'important questions on {topic}',
+]
+NOTICE_TITLES = [
+    'Mid-semester exam schedule', 'Holiday announcement', 'Guest lecture on {topic}', 'Workshop: {topic}',
+    'Placement drive registration', 'Library timings changed', 'Hackathon registrations open',
+    'Assignment deadline extended', 'Fee payment reminder', 'Sports week',
+]
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk_create keep generated auto_now_add values instead of now()"""
+    fields = [field for model in models for field in model._meta.concrete_fields
+              if getattr(field, 'auto_now_add', False)]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+@contextmanager
+def seeded_random(seed):
+    """Seed the global `random` (the assistant picks answers with it), then restore it"""
+    state = random.getstate()
+    random.seed(seed)
+    try:
+        yield
+    finally:
+        random.setstate(state)
+
+
+class Command(BaseCommand):
+    help = 'Generates a large deterministic dataset (students, notes, AI queries, plans, notices, downloads)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0, help='Multiplier for all volumes (1 = full size)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='load', help='Username/enrollment prefix of generated students')
+        parser.add_argument('--password', default='student123', help='Password of every generated user')
+        parser.add_argument('--no-files', action='store_true', help='Do not write note files to MEDIA_ROOT')
+        parser.add_argument('--backfill', action='store_true', help='Rebuild usage rollups from the new rows')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.prefix = options['prefix']
+        self.volumes = {name: max(1, int(count * options['scale'])) for name, count in VOLUMES.items()}
+        self.now = timezone.now().replace(microsecond=0)
+        self.start = self.now - timedelta(days=365)
+
+        if User.objects.filter(username__startswith=f'{self.prefix}_').exists():
+            raise CommandError(f"Users with prefix '{self.prefix}_' already exist; use another --prefix")
+
+        started = time.perf_counter()
+        call_command('init_data', stdout=io.StringIO())
+        password = make_password(options['password'])  # hashed once, shared by every user
+
+        with explicit_timestamps(User, Note, NoteDownload, Notice, StudyPlan, AIQuery):
+            admin = self._admin(password)
+            subjects = self._subjects()
+            user_ids = self._students(password)
+            downloads = self._download_picks()
+            note_ids = self._notes(admin, subjects, downloads, write_files=not options['no_files'])
+            self._notices(admin)
+            self._study_plans(user_ids)
+            self._ai_queries(user_ids, options['seed'])
+            self._downloads(user_ids, note_ids, downloads)
+
+        drift = SiteStats.reconcile()
+        self.stdout.write(f'Counters reconciled ({len(drift)} corrected)')
+
+        if options['backfill']:
+            for metric, _ in UsageRollup.METRIC_CHOICES:
+                hourly, daily = analytics.backfill(metric, self.start)
+                self.stdout.write(f'Backfilled {metric}: {hourly} hourly and {daily} daily rollup rows')
+
+        self.stdout.write(self.style.SUCCESS(f'Load data generated in {time.perf_counter() - started:.0f}s'))
+
+    # -- helpers ------------------------------------------------------------
+
+    def _timestamps(self, count):
+        """`count` increasing timestamps spread over the last year"""
+        span = (self.now - self.start).total_seconds()
+        step = span / count
+        for i in range(count):
+            yield self.start + timedelta(seconds=i * step + self.rng.random() * step)
+
+    def _create(self, label, model, objects):
+        """bulk_create a generator of objects in batches, one transaction per batch"""
+        started = time.perf_counter()
+        ids = []
+        batch = []
+
+        def write():
+            with transaction.atomic():
+                created = model.objects.bulk_create(batch, batch_size=self.batch_size)
+            ids.extend(obj.pk for obj in created)
+            batch.clear()
+
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= self.batch_size:
+                write()
+        if batch:
+            write()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'{label}: {len(ids)} rows in {elapsed:.1f}s ({len(ids) / max(elapsed, 1e-9):.0f}/s)')
+        return ids
+
+    # -- tables -------------------------------------------------------------
+
+    def _admin(self, password):
+        admin, _ = User.objects.get_or_create(
+            username=f'{self.prefix}_admin',
+            defaults={'email': f'{self.prefix}_admin@example.com', 'role': 'admin',
+                      'password': password, 'date_joined': self.start, 'created_at': self.start},
+        )
+        return admin
+
+    def _subjects(self):
+        """init_data's subjects plus six generated subjects per semester"""
+        existing = set(Subject.objects.values_list('code', flat=True))
+        Subject.objects.bulk_create([
+            Subject(name=f'{topic.title()} {semester}', code=f'{self.prefix.upper()}{semester}{k}', semester=semester)
+            for semester in range(1, 9)
+            for k, topic in enumerate(TOPICS[semester:semester + 6])
+            if f'{self.prefix.upper()}{semester}{k}' not in existing
+        ])
+        return list(Subject.objects.values_list('id', 'code', 'semester'))
+
+    def _students(self, password):
+        count = self.volumes['students']
+        semesters = [self.rng.randint(1, 8) for _ in range(count)]
+        joined = list(self._timestamps(count))
+
+        user_ids = self._create('students', User, (
+            User(
+                username=f'{self.prefix}_{i:06d}',
+                email=f'{self.prefix}_{i:06d}@example.com',
+                password=password,
+                first_name=f'Student{i}',
+                role='student',
+                date_joined=joined[i],
+                created_at=joined[i],
+            )
+            for i in range(count)
+        ))
+        self._create('profiles', StudentProfile, (
+            StudentProfile(
+                user_id=user_id,
+                enrollment_number=f'{self.prefix.upper()}{i:06d}',
+                semester=semesters[i],
+                branch=self.rng.choice(BRANCHES),
+                attendance_percentage=round(self.rng.uniform(50, 100), 1),
+                assignments_completed=self.rng.randint(0, 20),
+                assignments_pending=self.rng.randint(0, 5),
+            )
+            for i, user_id in enumerate(user_ids)
+        ))
+        return user_ids
+
+    def _download_picks(self):
+        """Note index of every download; popular notes get most (roughly Zipf)"""
+        count = self.volumes['notes']
+        popular = self.rng.sample(range(count), count)
+        weights = [1 / (rank + 1) for rank in range(count)]
+        return self.rng.choices(popular, weights=weights, k=self.volumes['downloads'])
+
+    def _notes(self, admin, subjects, downloads, write_files):
+        media_root = str(settings.MEDIA_ROOT)
+        download_counts = [0] * self.volumes['notes']
+        for index in downloads:
+            download_counts[index] += 1
+
+        def notes():
+            for i, uploaded_at in enumerate(self._timestamps(self.volumes['notes'])):
+                subject_id, code, semester = self.rng.choice(subjects)
+                topic = self.rng.choice(TOPICS)
+                name = f'notes/{self.prefix}/{i // 1000:03d}/{code}_{i:06d}.txt'
+                if write_files:
+                    path = os.path.join(media_root, name)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    with open(path, 'w', encoding='utf-8') as f:
+                        f.write(f'{code} notes #{i}: {topic}\n' + f'Key points about {topic}.\n' * self.rng.randint(5, 40))
+                yield Note(
+                    title=f'{code} - {topic.title()} (part {i % 10 + 1})',
+                    subject_id=subject_id,
+                    file=name,
+                    description=f'Semester {semester} notes on {topic}.',
+                    uploaded_by=admin,
+                    uploaded_at=uploaded_at,
+                    download_count=download_counts[i],
+                )
+
+        return self._create('notes', Note, notes())
+
+    def _notices(self, admin):
+        self._create('notices', Notice, (
+            Notice(
+                title=self.rng.choice(NOTICE_TITLES).format(topic=self.rng.choice(TOPICS)),
+                content='Please check the details with your department office.',
+                posted_by=admin,
+                posted_at=posted_at,
+                is_important=self.rng.random() < 0.1,
+            )
+            for posted_at in self._timestamps(self.volumes['notices'])
+        ))
+
+    def _study_plans(self, user_ids):
+        def plans():
+            for created_at in self._timestamps(self.volumes['study_plans']):
+                days = self.rng.randint(3, 60)
+                hours = self.rng.randint(1, 6)
+                topic = self.rng.choice(TOPICS)
+                yield StudyPlan(
+                    user_id=self.rng.choice(user_ids),
+                    course_name=topic.title(),
+                    exam_date=(created_at + timedelta(days=days)).date(),
+                    hours_per_day=hours,
+                    # Compact plan: one entry per phase rather than per day
+                    plan_data=[{'phase': phase, 'days': days // 3, 'hours': hours}
+                               for phase in ('Learning', 'Practice', 'Revision')],
+                    created_at=created_at,
+                    is_completed=created_at < self.now - timedelta(days=days),
+                )
+
+        self._create('study plans', StudyPlan, plans())
+
+    def _ai_queries(self, user_ids, seed):
+        # Answer every distinct question once with the real assistant
+        ai = SmartAIAssistant()
+        questions = sorted({template.format(topic=topic) for template in QUESTIONS for topic in TOPICS})
+        with seeded_random(seed):
+            answers = {question: (ai.process_query(question), ai.detect_intent(question)) for question in questions}
+
+        def queries():
+            for created_at in self._timestamps(self.volumes['ai_queries']):
+                question = self.rng.choice(questions)
+                response, intent = answers[question]
+                yield AIQuery(
+                    user_id=self.rng.choice(user_ids),
+                    query=question,
+                    response=response,
+                    intent=intent,
+                    created_at=created_at,
+                )
+
+        self._create('AI queries', AIQuery, queries())
+
+    def _downloads(self, user_ids, note_ids, downloads):
+        self._create('note downloads', NoteDownload, (
+            NoteDownload(note_id=note_ids[index], user_id=self.rng.choice(user_ids), downloaded_at=downloaded_at)
+            for index, downloaded_at in zip(downloads, self._timestamps(len(downloads)))
+        ))
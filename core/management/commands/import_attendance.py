@@ -0,0 +1,56 @@
+"""
+Management command to import roll-call sheets into the attendance bitmaps
+CSV columns: enrollment_number, status (P/A)[, subject][, date]
+Run: python manage.py import_attendance rollcall.csv [--subject DBMS --date 2026-08-01]
+"""
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.attendance import import_roll_call, current_term
+from core.models import Subject
+
+
+class Command(BaseCommand):
+    help = 'Streams roll-call CSV files into per-subject attendance bitmaps'
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+', help='CSV files to import')
+        parser.add_argument('--term', help='Term label (default: current term)')
+        parser.add_argument('--subject', help='Subject code for sheets without a subject column')
+        parser.add_argument('--date', help='Session date (YYYY-MM-DD) for sheets without a date column')
+
+    def handle(self, *args, **options):
+        subject = None
+        if options['subject']:
+            try:
+                subject = Subject.objects.get(code__iexact=options['subject'])
+            except Subject.DoesNotExist:
+                raise CommandError(f"Unknown subject code: {options['subject']}")
+        
+        day = None
+        if options['date']:
+            try:
+                day = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError('--date must be YYYY-MM-DD')
+        
+        term = options['term'] or current_term()
+        
+        for path in options['files']:
+            started = time.perf_counter()
+            try:
+                with open(path, encoding='utf-8-sig', newline='') as f:
+                    report = import_roll_call(f, term=term, subject=subject, day=day)
+            except OSError as e:
+                raise CommandError(f'Could not read {path}: {e}')
+            elapsed = time.perf_counter() - started
+            
+            for error in report.errors:
+                self.stdout.write(self.style.WARNING(f'{path} {error}'))
+            rate = report.marks / elapsed if elapsed else 0
+            self.stdout.write(self.style.SUCCESS(
+                f'{path}: imported {report.marks} marks into {term} '
+                f'({report.skipped} skipped) in {elapsed:.2f}s, {rate:,.0f} marks/s'
+            ))
@@ -0,0 +1,346 @@
+"""
+Management command to load test the portal over HTTP
+Serves randomproject.wsgi in-process on a local port, logs in N synthetic
+students (one keep-alive connection and thread each) and drives a weighted
+mix of endpoints. Writes latency percentiles, errors, server-side SQL and DB
+writer lock waits as JSON/markdown, optionally compared with a baseline.
+Note: the run writes real rows (downloads, AI queries, study plans).
+Run: python manage.py loadtest --users 20 --duration 30 -o report.json --markdown report.md
+"""
+import http.client
+import json
+import random
+import threading
+import time
+from datetime import date, timedelta
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.db import connections, transaction
+from django.utils import timezone
+
+from core import analytics, metrics
+from core.models import Note, SiteStats
+from users.models import User, StudentProfile
+
+DEFAULT_MIX = {
+    'dashboard': 30,
+    'notes': 25,
+    'download_note': 15,
+    'ai_query': 20,
+    'study_plan': 10,
+}
+
+AI_QUESTIONS = ['how to study for exams', 'explain recursion', 'placement tips', 'hackathon ideas', 'what is dbms']
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a sorted list"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(round(q / 100 * len(values) + 0.5)) - 1))]
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in DEFAULT_MIX:
+            raise CommandError(f"Unknown endpoint '{name}' (choose from {', '.join(DEFAULT_MIX)})")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+class VirtualUser:
+    """One logged-in student with its own connection and cookies"""
+
+    def __init__(self, port, username, password):
+        self.connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        self.cookies = {}
+        self.username = username
+        self.password = password
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+        try:
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            response.read()
+        except (http.client.HTTPException, OSError):
+            self.connection.close()  # reconnect on the next request
+            raise
+        for header in response.headers.get_all('Set-Cookie') or []:
+            cookie = SimpleCookie(header)
+            for name, morsel in cookie.items():
+                self.cookies[name] = morsel.value
+        return response.status
+
+    def login(self):
+        self.request('GET', '/users/login/')
+        status = self.request('POST', '/users/login/', urlencode({
+            'username': self.username, 'password': self.password,
+            'csrfmiddlewaretoken': self.cookies.get('csrftoken', ''),
+        }), {'Content-Type': 'application/x-www-form-urlencoded'})
+        if status != 302 or 'sessionid' not in self.cookies:
+            raise CommandError(f'Login failed for {self.username} (status {status})')
+
+    def form_headers(self):
+        return {'Content-Type': 'application/x-www-form-urlencoded', 'X-CSRFToken': self.cookies.get('csrftoken', '')}
+
+
+class Command(BaseCommand):
+    help = 'Runs an HTTP load test of the main portal endpoints against an in-process server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help='Concurrent logged-in students')
+        parser.add_argument('--duration', type=float, default=20.0, help='Seconds to run')
+        parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                            help='Endpoint weights, e.g. dashboard=30,notes=25,download_note=15,ai_query=20,study_plan=10')
+        parser.add_argument('--port', type=int, default=0, help='Port to serve on (default: any free port)')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--prefix', default='loadtest', help='Username prefix of the synthetic students')
+        parser.add_argument('-o', '--output', help='Write the JSON report here')
+        parser.add_argument('--markdown', help='Write a markdown report here')
+        parser.add_argument('--baseline', help='JSON report of a previous run to compare with')
+        parser.add_argument('--max-regression', type=float,
+                            help='Fail if any endpoint p99 or the throughput is this many percent worse than the baseline')
+
+    def handle(self, *args, **options):
+        from randomproject.sqlite import base as sqlite_base
+        from randomproject.wsgi import application
+
+        self.rng = random.Random(options['seed'])
+        users = self._users(options['users'], options['prefix'])
+        self.note_ids = self._downloadable_notes()
+        mix = dict(options['mix'])
+        if not self.note_ids and mix.pop('download_note', None):
+            self.stderr.write(self.style.WARNING('No note files on disk, skipping download_note'))
+
+        server = ThreadedWSGIServer(('127.0.0.1', options['port']), QuietRequestHandler)
+        server.set_app(application)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        port = server.server_address[1]
+        connections.close_all()
+
+        try:
+            clients = [VirtualUser(port, username, password) for username, password in users]
+            for client in clients:
+                client.login()
+
+            metrics.reset()
+            lock_stats = dict(sqlite_base.WRITER_LOCK_STATS)
+            results = {name: {'latencies': [], 'errors': 0, 'status': {}} for name in mix}
+            results_lock = threading.Lock()
+            deadline = time.perf_counter() + options['duration']
+
+            threads = [
+                threading.Thread(target=self._drive, args=(client, mix, deadline, results, results_lock, seed))
+                for seed, client in enumerate(clients)
+            ]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        lock_wait = {
+            name: sqlite_base.WRITER_LOCK_STATS[name] - lock_stats[name]
+            for name in ('acquired', 'wait_seconds')
+        }
+        report = self._report(results, elapsed, options, lock_wait, metrics.snapshot())
+
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as f:
+                report['comparison'] = self._compare(report, json.load(f))
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+        markdown = self._markdown(report)
+        if options['markdown']:
+            with open(options['markdown'], 'w', encoding='utf-8') as f:
+                f.write(markdown)
+        self.stdout.write(markdown)
+
+        if options['max_regression'] is not None and report.get('comparison'):
+            worst = max(row['change_percent'] for row in report['comparison'])
+            if worst > options['max_regression']:
+                raise CommandError(f'Regression of {worst:.1f}% exceeds {options["max_regression"]}%')
+
+    # -- setup ----------------------------------------------------------------
+
+    def _users(self, count, prefix):
+        """(username, password) of `count` students, created on first use"""
+        password = 'loadtest123'
+        usernames = [f'{prefix}_{i:04d}' for i in range(count)]
+        existing = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+        missing = [username for username in usernames if username not in existing]
+        if missing:
+            password_hash = make_password(password)
+            now = timezone.now()
+            with transaction.atomic():
+                created = User.objects.bulk_create([
+                    User(username=username, email=f'{username}@example.com', password=password_hash,
+                         role='student', date_joined=now)
+                    for username in missing
+                ])
+                StudentProfile.objects.bulk_create([
+                    StudentProfile(user=user, semester=self.rng.randint(1, 8), branch='CSE') for user in created
+                ])
+            # bulk_create skips the signals: recount the counters, rebuild today's signup rollups
+            SiteStats.reconcile()
+            analytics.backfill('signup', now)
+        return [(username, password) for username in usernames]
+
+    def _downloadable_notes(self, sample=200):
+        """Ids of a sample of notes whose file exists on disk"""
+        ids = list(Note.objects.values_list('id', flat=True)[:5000])
+        notes = Note.objects.in_bulk(self.rng.sample(ids, min(sample, len(ids))))
+        return [note.pk for note in notes.values() if note.file and note.file.storage.exists(note.file.name)]
+
+    # -- load -----------------------------------------------------------------
+
+    def _drive(self, client, mix, deadline, results, results_lock, seed):
+        rng = random.Random(seed)
+        names, weights = list(mix), list(mix.values())
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            method, path, body, headers = self._request(name, client, rng)
+            started = time.perf_counter()
+            try:
+                status = client.request(method, path, body, headers)
+            except (http.client.HTTPException, OSError):
+                status = None
+            latency = time.perf_counter() - started
+
+            with results_lock:
+                entry = results[name]
+                entry['latencies'].append(latency)
+                key = str(status or 'connection error')
+                entry['status'][key] = entry['status'].get(key, 0) + 1
+                if status is None or status >= 400:
+                    entry['errors'] += 1
+
+    def _request(self, name, client, rng):
+        if name == 'dashboard':
+            return 'GET', '/', None, {}
+        if name == 'notes':
+            return 'GET', '/notes/', None, {}
+        if name == 'download_note':
+            return 'GET', f'/notes/{rng.choice(self.note_ids)}/download/', None, {}
+        if name == 'ai_query':
+            headers = {**client.form_headers(), 'Content-Type': 'application/json'}
+            return 'POST', '/ai-assistant/api/query/', json.dumps({'query': rng.choice(AI_QUESTIONS)}), headers
+        exam_date = date.today() + timedelta(days=rng.randint(7, 60))
+        body = urlencode({
+            'course_name': 'Load Test', 'exam_date': exam_date.isoformat(), 'hours_per_day': rng.randint(1, 4),
+            'csrfmiddlewaretoken': client.cookies.get('csrftoken', ''),
+        })
+        return 'POST', '/study-planner/', body, client.form_headers()
+
+    # -- reporting ------------------------------------------------------------
+
+    def _report(self, results, elapsed, options, lock_wait, server_metrics):
+        views = {
+            'dashboard': 'core:dashboard', 'notes': 'core:notes', 'download_note': 'core:download_note',
+            'ai_query': 'ai_helper:ai_query_api', 'study_plan': 'core:study_planner',
+        }
+        endpoints = {}
+        for name, entry in results.items():
+            latencies = sorted(entry['latencies'])
+            server = server_metrics.get(views[name], {})
+            served = server.get('count') or 1
+            endpoints[name] = {
+                'requests': len(latencies),
+                'throughput': round(len(latencies) / elapsed, 2),
+                'errors': entry['errors'],
+                'status': entry['status'],
+                'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+                'p90_ms': round(percentile(latencies, 90) * 1000, 2),
+                'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+                'max_ms': round(latencies[-1] * 1000, 2) if latencies else 0.0,
+                'sql_queries_per_request': round(server.get('sql_queries', 0) / served, 2),
+                'sql_ms_per_request': round(server.get('sql_seconds', 0) / served * 1000, 2),
+            }
+        total = sum(entry['requests'] for entry in endpoints.values())
+        return {
+            'users': options['users'],
+            'duration_seconds': round(elapsed, 2),
+            'mix': options['mix'],
+            'requests': total,
+            'throughput': round(total / elapsed, 2),
+            'errors': sum(entry['errors'] for entry in endpoints.values()),
+            'db_lock': {
+                'acquired': lock_wait['acquired'],
+                'wait_seconds': round(lock_wait['wait_seconds'], 3),
+                'mean_wait_ms': round(lock_wait['wait_seconds'] / max(lock_wait['acquired'], 1) * 1000, 3),
+            },
+            'endpoints': endpoints,
+        }
+
+    def _compare(self, report, baseline):
+        """Percent change per endpoint p50/p99 (higher is worse) and throughput (lower is worse)"""
+        rows = []
+
+        def change(metric, name, current, previous, higher_is_worse=True):
+            if not previous:
+                return
+            percent = (current - previous) / previous * 100
+            rows.append({
+                'endpoint': name, 'metric': metric, 'baseline': previous, 'current': current,
+                'change_percent': round(percent if higher_is_worse else -percent, 1),
+            })
+
+        change('throughput', 'all', report['throughput'], baseline.get('throughput'), higher_is_worse=False)
+        for name, entry in report['endpoints'].items():
+            previous = baseline.get('endpoints', {}).get(name)
+            if previous:
+                change('p50_ms', name, entry['p50_ms'], previous['p50_ms'])
+                change('p99_ms', name, entry['p99_ms'], previous['p99_ms'])
+        return rows
+
+    def _markdown(self, report):
+        lines = [
+            f"# Load test: {report['users']} users, {report['duration_seconds']}s",
+            '',
+            f"{report['requests']} requests, {report['throughput']} req/s, {report['errors']} errors. "
+            f"DB writer lock: {report['db_lock']['acquired']} acquisitions, "
+            f"{report['db_lock']['wait_seconds']}s waiting ({report['db_lock']['mean_wait_ms']} ms mean).",
+            '',
+            '| endpoint | requests | req/s | errors | p50 ms | p90 ms | p99 ms | max ms | SQL/req | SQL ms/req |',
+            '|---|---:|---:|---:|---:|---:|---:|---:|---:|---:|',
+        ]
+        for name, entry in report['endpoints'].items():
+            lines.append(
+                f"| {name} | {entry['requests']} | {entry['throughput']} | {entry['errors']} | {entry['p50_ms']} "
+                f"| {entry['p90_ms']} | {entry['p99_ms']} | {entry['max_ms']} | {entry['sql_queries_per_request']} "
+                f"| {entry['sql_ms_per_request']} |"
+            )
+        if report.get('comparison'):
+            lines += [
+                '',
+                '## Compared with baseline (positive = worse)',
+                '',
+                '| endpoint | metric | baseline | current | change % |',
+                '|---|---|---:|---:|---:|',
+            ]
+            for row in report['comparison']:
+                lines.append(
+                    f"| {row['endpoint']} | {row['metric']} | {row['baseline']} | {row['current']} "
+                    f"| {row['change_percent']:+.1f} |"
+                )
+        return '\n'.join(lines) + '\n'
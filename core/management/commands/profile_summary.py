@@ -0,0 +1,92 @@
+"""
+Management command to summarize request profiles written by ProfilingMiddleware
+Run: python manage.py profile_summary --limit 20
+"""
+import glob
+import io
+import json
+import os
+import pstats
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.profiling import profile_dir
+
+# Collapse "IN (%s, %s, ...)" so the same query with different list sizes groups together
+IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+
+
+class Command(BaseCommand):
+    help = 'Prints the hottest functions and SQL statements across profiling dumps'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', help='Dump directory (default: PROFILING_DIR)')
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--sort', choices=['tottime', 'cumulative', 'ncalls'], default='tottime')
+        parser.add_argument('--view', help='Only dumps of this URL name, e.g. core:notes')
+
+    def handle(self, *args, **options):
+        directory = options['dir'] or profile_dir()
+        traces = []
+        for path in sorted(glob.glob(os.path.join(directory, '*.sql.json'))):
+            with open(path, encoding='utf-8') as f:
+                trace = json.load(f)
+            if options['view'] and trace['view'] != options['view']:
+                continue
+            trace['pstats'] = path[:-len('.sql.json')] + '.pstats'
+            traces.append(trace)
+        
+        if not traces:
+            raise CommandError(f'No profiling dumps in {directory}')
+        
+        self._requests(traces)
+        self._functions([trace['pstats'] for trace in traces if os.path.exists(trace['pstats'])],
+                        options['sort'], options['limit'])
+        self._queries(traces, options['limit'])
+
+    def _requests(self, traces):
+        by_view = {}
+        for trace in traces:
+            by_view.setdefault(trace['view'], []).append(trace)
+        
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{len(traces)} profiled requests'))
+        self.stdout.write(f"{'view':<36}{'requests':>9}{'slow':>6}{'mean ms':>10}{'max ms':>10}{'sql ms':>10}{'queries':>9}")
+        for view, rows in sorted(by_view.items(), key=lambda item: -sum(t['seconds'] for t in item[1])):
+            self.stdout.write(
+                f"{view:<36}{len(rows):>9}{sum(t['reason'] == 'slow' for t in rows):>6}"
+                f"{sum(t['seconds'] for t in rows) / len(rows) * 1000:>10.1f}"
+                f"{max(t['seconds'] for t in rows) * 1000:>10.1f}"
+                f"{sum(t['sql_seconds'] for t in rows) / len(rows) * 1000:>10.1f}"
+                f"{sum(len(t['queries']) for t in rows) / len(rows):>9.1f}"
+            )
+
+    def _functions(self, paths, sort, limit):
+        if not paths:
+            return
+        out = io.StringIO()
+        stats = pstats.Stats(*paths, stream=out)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\nHottest functions by {sort}'))
+        # Skip pstats' per-file header lines, keep the table
+        table = out.getvalue()
+        self.stdout.write(table[table.find('   ncalls'):].rstrip())
+
+    def _queries(self, traces, limit):
+        grouped = {}
+        for trace in traces:
+            for query in trace['queries']:
+                sql = IN_LIST.sub('IN (...)', query['sql'])
+                entry = grouped.setdefault(sql, {'count': 0, 'seconds': 0.0, 'origins': {}})
+                entry['count'] += 1
+                entry['seconds'] += query['seconds']
+                entry['origins'][query['origin']] = entry['origins'].get(query['origin'], 0) + 1
+        
+        self.stdout.write(self.style.MIGRATE_HEADING('\nHottest SQL by total time'))
+        for sql, entry in sorted(grouped.items(), key=lambda item: -item[1]['seconds'])[:limit]:
+            origin = max(entry['origins'].items(), key=lambda item: item[1])[0] or '?'
+            self.stdout.write(
+                f"{entry['seconds'] * 1000:>9.1f} ms {entry['count']:>6}x  {origin}\n"
+                f"    {sql[:200]}"
+            )
@@ -0,0 +1,37 @@
+"""
+Management command to correct drift in the admin panel counters
+Run periodically (e.g. hourly from cron): python manage.py reconcile_stats
+or keep it running: python manage.py reconcile_stats --interval 3600
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from core.models import SiteStats
+
+
+class Command(BaseCommand):
+    help = 'Recounts Users, Notes, Notices and AI Queries and fixes the SiteStats counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Keep running and reconcile every this many seconds',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self.reconcile()
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def reconcile(self):
+        drift = SiteStats.reconcile()
+        
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Counters are in sync'))
+            return
+        
+        for name, delta in drift.items():
+            self.stdout.write(self.style.WARNING(f'Corrected {name} by {delta:+d}'))
+        self.stdout.write(self.style.SUCCESS('Counters reconciled'))
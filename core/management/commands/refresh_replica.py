@@ -0,0 +1,28 @@
+"""
+Management command to refresh the read replica from the primary database
+Run after migrate and then on a schedule:
+    python manage.py refresh_replica --interval 60
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from randomproject.routers import refresh_replica
+
+
+class Command(BaseCommand):
+    help = 'Copies db.sqlite3 into the read replica with the SQLite online backup API'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Keep running and refresh every this many seconds',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            elapsed = refresh_replica()
+            self.stdout.write(self.style.SUCCESS(f'Replica refreshed in {elapsed:.2f}s'))
+            if not options['interval']:
+                break
+            time.sleep(max(0.0, options['interval'] - elapsed))
@@ -0,0 +1,70 @@
+"""
+Management command to run background jobs (core/jobs.py)
+Keep one running next to the web workers:
+    python manage.py run_jobs --concurrency 4
+    python manage.py run_jobs --pool process --concurrency 2
+    python manage.py run_jobs --once          # drain the queue and exit (cron)
+"""
+import multiprocessing
+import signal
+import threading
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils.module_loading import autodiscover_modules
+
+from core import jobs
+
+
+def _process_main(stop, poll_seconds):
+    django.setup()  # no-op after fork, needed with the spawn start method
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent sets `stop`
+    jobs.work(stop, poll_seconds)
+
+
+class Command(BaseCommand):
+    help = 'Runs queued background jobs in a thread or process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=2, help='Worker threads or processes')
+        parser.add_argument('--pool', choices=['thread', 'process'], default='thread',
+                            help='Threads share one process; processes run CPU-heavy jobs in parallel')
+        parser.add_argument('--poll', type=float, default=None, help='Seconds between polls of an empty queue')
+        parser.add_argument('--once', action='store_true', help='Run the due jobs, then exit')
+
+    def handle(self, *args, **options):
+        autodiscover_modules('tasks')
+        purged = jobs.purge()
+        if purged:
+            self.stdout.write(f'Purged {purged} finished jobs')
+
+        if options['once']:
+            count = jobs.run_pending()
+            self.stdout.write(self.style.SUCCESS(f'Ran {count} jobs'))
+            return
+
+        if options['pool'] == 'process':
+            connections.close_all()  # never share a connection with the children
+            stop = multiprocessing.Event()
+            workers = [multiprocessing.Process(target=_process_main, args=(stop, options['poll']), daemon=True)
+                       for _ in range(options['concurrency'])]
+        else:
+            stop = threading.Event()
+            workers = [threading.Thread(target=jobs.work, args=(stop, options['poll']), daemon=True)
+                       for _ in range(options['concurrency'])]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(self.style.SUCCESS(
+            f"Running jobs with {options['concurrency']} {options['pool']} workers (Ctrl+C to stop)"
+        ))
+        
+        try:
+            while any(worker.is_alive() for worker in workers):
+                for worker in workers:
+                    worker.join(1)
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping after the running jobs finish')
+            stop.set()
+            for worker in workers:
+                worker.join()
@@ -0,0 +1,238 @@
+"""
+Per-view request metrics
+MetricsMiddleware records latency, SQL query count/time, response size and
+status codes per resolved URL name into in-process aggregates. With
+METRICS_SHARED_DIR set every worker also flushes its aggregates to
+'<dir>/metrics-<pid>.json' so /metrics can merge all worker processes.
+"""
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+# Latency histogram upper bounds in seconds (+Inf is implied)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+FLUSH_INTERVAL = 5  # seconds between shared-file flushes of one worker
+
+_lock = threading.Lock()
+_views = {}
+_last_flush = [0.0]
+
+# [queries, seconds] of the request being served, None outside requests
+_request_sql = ContextVar('metrics_request_sql', default=None)
+
+
+def _new_entry():
+    return {
+        'count': 0,
+        'buckets': [0] * (len(BUCKETS) + 1),
+        'seconds': 0.0,
+        'sql_queries': 0,
+        'sql_seconds': 0.0,
+        'bytes': 0,
+        'status': {},
+    }
+
+
+def record(view, status, seconds, sql_queries, sql_seconds, size):
+    """Add one request to the aggregates of `view`"""
+    with _lock:
+        entry = _views.get(view)
+        if entry is None:
+            entry = _views[view] = _new_entry()
+        entry['count'] += 1
+        entry['buckets'][bisect_left(BUCKETS, seconds)] += 1
+        entry['seconds'] += seconds
+        entry['sql_queries'] += sql_queries
+        entry['sql_seconds'] += sql_seconds
+        entry['bytes'] += size
+        status = str(status)
+        entry['status'][status] = entry['status'].get(status, 0) + 1
+
+    shared_dir = getattr(settings, 'METRICS_SHARED_DIR', None)
+    if shared_dir and time.monotonic() - _last_flush[0] > FLUSH_INTERVAL:
+        flush(shared_dir)
+
+
+def snapshot():
+    """Deep copy of this process's aggregates"""
+    with _lock:
+        return json.loads(json.dumps(_views))
+
+
+def reset():
+    with _lock:
+        _views.clear()
+
+
+def flush(shared_dir):
+    """Write this worker's aggregates to its file in shared_dir (atomic replace)"""
+    _last_flush[0] = time.monotonic()
+    os.makedirs(shared_dir, exist_ok=True)
+    path = os.path.join(shared_dir, f'metrics-{os.getpid()}.json')
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(snapshot(), f)
+    os.replace(path + '.tmp', path)
+
+
+def merge(snapshots):
+    """Sum several {view: entry} snapshots"""
+    merged = {}
+    for views in snapshots:
+        for view, entry in views.items():
+            total = merged.setdefault(view, _new_entry())
+            total['count'] += entry['count']
+            total['buckets'] = [a + b for a, b in zip(total['buckets'], entry['buckets'])]
+            for name in ('seconds', 'sql_queries', 'sql_seconds', 'bytes'):
+                total[name] += entry[name]
+            for status, count in entry['status'].items():
+                total['status'][status] = total['status'].get(status, 0) + count
+    return merged
+
+
+def collect():
+    """
+    Aggregates of every worker: this process's live numbers plus the files
+    of the other workers in shared mode (files of exited workers are kept so
+    counters never go backwards)
+    """
+    shared_dir = getattr(settings, 'METRICS_SHARED_DIR', None)
+    if not shared_dir:
+        return snapshot()
+
+    flush(shared_dir)
+    snapshots = []
+    for path in glob.glob(os.path.join(shared_dir, 'metrics-*.json')):
+        try:
+            with open(path, encoding='utf-8') as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return merge(snapshots)
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus(views):
+    """Prometheus text exposition format (version 0.0.4)"""
+    lines = [
+        '# HELP portal_request_duration_seconds Request latency by view.',
+        '# TYPE portal_request_duration_seconds histogram',
+    ]
+    for view, entry in sorted(views.items()):
+        label = _label(view)
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ('+Inf',), entry['buckets']):
+            cumulative += count
+            lines.append(f'portal_request_duration_seconds_bucket{{view="{label}",le="{bound}"}} {cumulative}')
+        lines.append(f'portal_request_duration_seconds_sum{{view="{label}"}} {entry["seconds"]:.6f}')
+        lines.append(f'portal_request_duration_seconds_count{{view="{label}"}} {entry["count"]}')
+
+    counters = [
+        ('portal_sql_queries_total', 'SQL queries executed while serving the view.', 'sql_queries', '{}'),
+        ('portal_sql_duration_seconds_total', 'Time spent in SQL while serving the view.', 'sql_seconds', '{:.6f}'),
+        ('portal_response_bytes_total', 'Response body bytes (streaming responses excluded).', 'bytes', '{}'),
+    ]
+    for name, help_text, key, fmt in counters:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        for view, entry in sorted(views.items()):
+            lines.append(f'{name}{{view="{_label(view)}"}} {fmt.format(entry[key])}')
+
+    lines.append('# HELP portal_responses_total Responses by view and status code.')
+    lines.append('# TYPE portal_responses_total counter')
+    for view, entry in sorted(views.items()):
+        for status, count in sorted(entry['status'].items()):
+            lines.append(f'portal_responses_total{{view="{_label(view)}",status="{status}"}} {count}')
+
+    return '\n'.join(lines) + '\n'
+
+
+def _count_sql(execute, query, params, many, context):
+    sql = _request_sql.get()
+    if sql is None:
+        return execute(query, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(query, params, many, context)
+    finally:
+        sql[0] += 1
+        sql[1] += time.perf_counter() - started
+
+
+def _install(connection, **kwargs):
+    """Put _count_sql outermost on a connection (once; it stays for its lifetime)"""
+    if _count_sql not in connection.execute_wrappers:
+        # Index 0 so execute_wrapper() blocks that pop() their own wrapper never drop it
+        connection.execute_wrappers.insert(0, _count_sql)
+
+
+class MetricsMiddleware:
+    """
+    Times each request and counts the SQL it runs on every database alias
+    Place first in MIDDLEWARE so session/auth queries are included.
+    Async capable, so it keeps the ASGI stack async when ASYNC_VIEWS is on.
+
+    Connections are thread local and async views run their queries in
+    sync_to_async threads, so instead of a per-request execute_wrapper every
+    connection gets a permanent wrapper that adds to the [queries, seconds]
+    counter of the current request, found through a context variable.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        connection_created.connect(_install, dispatch_uid='core.metrics')
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        # Connections opened before this middleware was loaded
+        for connection in connections.all(initialized_only=True):
+            _install(connection)
+
+        sql = [0, 0.0]
+        token = _request_sql.set(sql)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_sql.reset(token)
+        self._record(request, response, time.perf_counter() - started, sql)
+        return response
+
+    async def __acall__(self, request):
+        sql = [0, 0.0]
+        token = _request_sql.set(sql)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_sql.reset(token)
+        self._record(request, response, time.perf_counter() - started, sql)
+        return response
+
+    @staticmethod
+    def _record(request, response, elapsed, sql):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else '<unresolved>'
+        size = 0 if response.streaming else len(response.content)
+        record(view, response.status_code, elapsed, sql[0], sql[1], size)
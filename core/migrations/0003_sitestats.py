@@ -0,0 +1,44 @@
+# Generated by Django 4.2.27 on 2026-10-19 14:04
+
+from django.db import migrations, models
+
+
+def seed_site_stats(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Note = apps.get_model('core', 'Note')
+    Notice = apps.get_model('core', 'Notice')
+    AIQuery = apps.get_model('ai_helper', 'AIQuery')
+    SiteStats = apps.get_model('core', 'SiteStats')
+    SiteStats.objects.update_or_create(pk=1, defaults={
+        'total_students': User.objects.filter(role='student').count(),
+        'total_notes': Note.objects.count(),
+        'total_notices': Notice.objects.count(),
+        'total_queries': AIQuery.objects.count(),
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_initial'),
+        ('users', '0001_initial'),
+        ('ai_helper', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SiteStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_students', models.IntegerField(default=0)),
+                ('total_notes', models.IntegerField(default=0)),
+                ('total_notices', models.IntegerField(default=0)),
+                ('total_queries', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Site stats',
+            },
+        ),
+        migrations.RunPython(seed_site_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.27 on 2026-10-19 14:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0003_sitestats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(choices=[('ai_query', 'AI Queries'), ('download', 'Note Downloads'), ('signup', 'Student Signups')], max_length=20)),
+                ('dimension', models.CharField(choices=[('total', 'Total'), ('intent', 'Intent'), ('note', 'Note'), ('subject', 'Subject'), ('semester', 'Semester')], max_length=20)),
+                ('key', models.CharField(blank=True, default='', max_length=64)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('bucket', models.DateField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='HourlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(choices=[('ai_query', 'AI Queries'), ('download', 'Note Downloads'), ('signup', 'Student Signups')], max_length=20)),
+                ('dimension', models.CharField(choices=[('total', 'Total'), ('intent', 'Intent'), ('note', 'Note'), ('subject', 'Subject'), ('semester', 'Semester')], max_length=20)),
+                ('key', models.CharField(blank=True, default='', max_length=64)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('bucket', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='NoteDownload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('downloaded_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('note', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='downloads', to='core.note')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='note_downloads', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-downloaded_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='hourlyrollup',
+            constraint=models.UniqueConstraint(fields=('metric', 'dimension', 'bucket', 'key'), name='core_hourlyrollup_unique_bucket'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyrollup',
+            constraint=models.UniqueConstraint(fields=('metric', 'dimension', 'bucket', 'key'), name='core_dailyrollup_unique_bucket'),
+        ),
+    ]
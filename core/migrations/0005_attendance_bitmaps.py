@@ -0,0 +1,47 @@
+# Generated by Django 4.2.27 on 2026-10-19 14:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('core', '0004_usage_analytics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionCalendar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=20)),
+                ('dates', models.JSONField(default=list)),
+                ('planned_sessions', models.IntegerField(default=60)),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='session_calendars', to='core.subject')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AttendanceRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=20)),
+                ('present', models.BinaryField(default=b'')),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_records', to='users.studentprofile')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_records', to='core.subject')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='sessioncalendar',
+            constraint=models.UniqueConstraint(fields=('subject', 'term'), name='core_sessioncalendar_unique_term'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancerecord',
+            index=models.Index(fields=['term', 'subject'], name='core_attend_term_subject_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='attendancerecord',
+            constraint=models.UniqueConstraint(fields=('profile', 'subject', 'term'), name='core_attendancerecord_unique_term'),
+        ),
+    ]
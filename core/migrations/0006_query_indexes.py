@@ -0,0 +1,42 @@
+# Generated by Django 4.2.27 on 2026-10-19 14:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0005_attendance_bitmaps'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='note',
+            name='subject',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='notes', to='core.subject'),
+        ),
+        migrations.AlterField(
+            model_name='studyplan',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='study_plans', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['subject', '-uploaded_at'], name='core_note_subject_upl_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['-uploaded_at'], name='core_note_uploaded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notice',
+            index=models.Index(fields=['-posted_at'], name='core_notice_posted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studyplan',
+            index=models.Index(fields=['user', '-created_at'], name='core_plan_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.27 on 2026-10-19 14:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('co_downloads', models.IntegerField()),
+                ('note', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='similar_notes', to='core.note')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.note')),
+            ],
+            options={
+                'ordering': ['-score'],
+                'indexes': [models.Index(fields=['note', '-score'], name='core_notesim_note_score_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='notesimilarity',
+            constraint=models.UniqueConstraint(fields=('note', 'similar'), name='core_notesimilarity_unique_pair'),
+        ),
+    ]
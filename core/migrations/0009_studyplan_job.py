@@ -0,0 +1,19 @@
+# Generated by Django 4.2.27 on 2026-10-19 15:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_note_similarity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studyplan',
+            name='job',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.job'),
+        ),
+    ]
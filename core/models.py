@@ -24,7 +24,8 @@ class Note(models.Model):
     Students can view and download
     """
     title = models.CharField(max_length=200)
-    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='notes')
+    # Indexed by core_note_subject_upl_idx (subject first)
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='notes', db_index=False)
     file = models.FileField(upload_to='notes/')
     description = models.TextField(blank=True, null=True)
     uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -33,25 +34,74 @@ class Note(models.Model):
     
     class Meta:
         ordering = ['-uploaded_at']
+        indexes = [
+            models.Index(fields=['subject', '-uploaded_at'], name='core_note_subject_upl_idx'),
+            models.Index(fields=['-uploaded_at'], name='core_note_uploaded_idx'),
+        ]
     
     def __str__(self):
         return self.title
 
 
+class NoteDownload(models.Model):
+    """
+    One row per note download (feeds analytics rollups)
+    """
+    note = models.ForeignKey(Note, on_delete=models.CASCADE, related_name='downloads')
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='note_downloads')
+    downloaded_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        ordering = ['-downloaded_at']
+    
+    def __str__(self):
+        return f"{self.note_id} @ {self.downloaded_at}"
+
+
+class NoteSimilarity(models.Model):
+    """
+    Top-K "students also downloaded" neighbours of a note
+    Built from download events by core/recommendations.py
+    """
+    # Indexed by core_notesim_note_score_idx (note first)
+    note = models.ForeignKey(Note, on_delete=models.CASCADE, related_name='similar_notes', db_index=False)
+    similar = models.ForeignKey(Note, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()  # cosine similarity of the two sets of downloaders
+    co_downloads = models.IntegerField()  # students who downloaded both
+    
+    class Meta:
+        ordering = ['-score']
+        constraints = [
+            models.UniqueConstraint(fields=['note', 'similar'], name='core_notesimilarity_unique_pair'),
+        ]
+        indexes = [
+            models.Index(fields=['note', '-score'], name='core_notesim_note_score_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.note_id} -> {self.similar_id} ({self.score:.3f})"
+
+
 class StudyPlan(models.Model):
     """
     AI-generated study plans for students
     """
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='study_plans')
+    # Indexed by core_plan_user_created_idx (user first)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='study_plans', db_index=False)
     course_name = models.CharField(max_length=200)
     exam_date = models.DateField()
     hours_per_day = models.IntegerField()
     plan_data = models.JSONField()  # Stores day-wise study plan
     created_at = models.DateTimeField(auto_now_add=True)
     is_completed = models.BooleanField(default=False)
+    # Background job that created the plan, so a retried job does not add it twice
+    job = models.OneToOneField('Job', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='core_plan_user_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.course_name}"
@@ -70,6 +120,9 @@ class Notice(models.Model):
     
     class Meta:
         ordering = ['-posted_at']
+        indexes = [
+            models.Index(fields=['-posted_at'], name='core_notice_posted_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -97,3 +150,229 @@ class PlacementRoadmap(models.Model):
     
     def __str__(self):
         return self.title
+
+
+class SiteStats(models.Model):
+    """
+    Materialized counters shown on the admin panel (single row, pk=1)
+    Kept up to date by signals in core/signals.py, corrected by reconcile_stats
+    """
+    total_students = models.IntegerField(default=0)
+    total_notes = models.IntegerField(default=0)
+    total_notices = models.IntegerField(default=0)
+    total_queries = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    COUNTERS = ['total_students', 'total_notes', 'total_notices', 'total_queries']
+    
+    class Meta:
+        verbose_name_plural = "Site stats"
+    
+    def __str__(self):
+        return "Site statistics"
+    
+    @classmethod
+    def load(cls):
+        """Return the counters row, creating it from live counts if missing"""
+        stats = cls.objects.filter(pk=1).first()
+        if stats is None:
+            cls.reconcile()
+            stats = cls.objects.get(pk=1)
+        return stats
+    
+    @classmethod
+    def adjust(cls, **deltas):
+        """
+        Atomically add deltas to counters, e.g. adjust(total_notes=1)
+        Runs in the caller's transaction. Deletes (and admin saves) already
+        run in one; other saves must be wrapped in transaction.atomic() for
+        the counter to commit with the row, since post_save fires after an
+        autocommit save has committed. `reconcile_stats --interval` corrects
+        whatever drift is left, e.g. after bulk_create.
+        """
+        deltas = {name: delta for name, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        updated = cls.objects.filter(pk=1).update(
+            **{name: models.F(name) + delta for name, delta in deltas.items()}
+        )
+        if not updated:
+            cls.reconcile()
+    
+    @classmethod
+    def live_counts(cls):
+        """Count the underlying tables (slow, used for reconciliation only)"""
+        from ai_helper.models import AIQuery
+        
+        return {
+            'total_students': User.objects.filter(role='student').count(),
+            'total_notes': Note.objects.count(),
+            'total_notices': Notice.objects.count(),
+            'total_queries': AIQuery.objects.count(),
+        }
+    
+    @classmethod
+    def reconcile(cls):
+        """
+        Overwrite counters with live counts
+        Returns {counter: drift} for every counter that was wrong
+        """
+        counts = cls.live_counts()
+        stats, created = cls.objects.get_or_create(pk=1, defaults=counts)
+        if created:
+            return {}
+        drift = {
+            name: counts[name] - getattr(stats, name)
+            for name in cls.COUNTERS
+            if counts[name] != getattr(stats, name)
+        }
+        if drift:
+            cls.objects.filter(pk=1).update(**counts)
+        return drift
+
+
+class UsageRollup(models.Model):
+    """
+    Pre-aggregated event counts per time bucket and dimension
+    Maintained by core/analytics.py, rebuilt by backfill_rollups
+    """
+    METRIC_CHOICES = [
+        ('ai_query', 'AI Queries'),
+        ('download', 'Note Downloads'),
+        ('signup', 'Student Signups'),
+    ]
+    
+    DIMENSION_CHOICES = [
+        ('total', 'Total'),
+        ('intent', 'Intent'),
+        ('note', 'Note'),
+        ('subject', 'Subject'),
+        ('semester', 'Semester'),
+    ]
+    
+    metric = models.CharField(max_length=20, choices=METRIC_CHOICES)
+    dimension = models.CharField(max_length=20, choices=DIMENSION_CHOICES)
+    key = models.CharField(max_length=64, blank=True, default='')  # '' for total
+    count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        abstract = True
+
+
+class HourlyRollup(UsageRollup):
+    bucket = models.DateTimeField()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['metric', 'dimension', 'bucket', 'key'],
+                name='core_hourlyrollup_unique_bucket',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.metric}/{self.dimension}={self.key} @ {self.bucket}: {self.count}"
+
+
+class DailyRollup(UsageRollup):
+    bucket = models.DateField()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['metric', 'dimension', 'bucket', 'key'],
+                name='core_dailyrollup_unique_bucket',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.metric}/{self.dimension}={self.key} @ {self.bucket}: {self.count}"
+
+
+class SessionCalendar(models.Model):
+    """
+    Class sessions held for a subject in a term
+    dates[i] is the session recorded by bit i of every AttendanceRecord.present
+    """
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='session_calendars')
+    term = models.CharField(max_length=20)
+    dates = models.JSONField(default=list)  # ISO dates of held sessions, in bit order
+    planned_sessions = models.IntegerField(default=60)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['subject', 'term'], name='core_sessioncalendar_unique_term'),
+        ]
+    
+    def __str__(self):
+        return f"{self.subject.code} {self.term} ({len(self.dates)}/{self.planned_sessions})"
+    
+    @property
+    def held(self):
+        return len(self.dates)
+
+
+class AttendanceRecord(models.Model):
+    """
+    Attendance of one student in one subject for a term, as a packed bitmap
+    Bit i (little-endian) of `present` is set if the student attended session i
+    """
+    profile = models.ForeignKey('users.StudentProfile', on_delete=models.CASCADE, related_name='attendance_records')
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='attendance_records')
+    term = models.CharField(max_length=20)
+    present = models.BinaryField(default=b'')
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['profile', 'subject', 'term'], name='core_attendancerecord_unique_term'),
+        ]
+        indexes = [
+            models.Index(fields=['term', 'subject'], name='core_attend_term_subject_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.profile_id} - {self.subject_id} ({self.term})"
+    
+    @property
+    def attended(self):
+        return int.from_bytes(self.present, 'little').bit_count()
+
+
+class Job(models.Model):
+    """
+    Queued call of a @job function, run by `manage.py run_jobs` (core/jobs.py)
+    A worker claims a job with a conditional UPDATE and holds it for a lease;
+    jobs whose lease runs out are claimed again by the next worker.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+    
+    name = models.CharField(max_length=200)  # dotted path of the function
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    run_after = models.DateTimeField()
+    locked_by = models.CharField(max_length=100, blank=True, default='')
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='core_job_status_run_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
@@ -0,0 +1,70 @@
+"""
+Study plan generation
+Builds the day-wise plan stored in StudyPlan.plan_data; run as a background
+job by core/tasks.py.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+
+def generate_study_plan(course_name, days, hours_per_day):
+    """
+    Generate day-wise study plan
+    """
+    plan = []
+    total_hours = days * hours_per_day
+    
+    # Divide into phases
+    phase1_days = days // 3  # Learning phase
+    phase2_days = days // 3  # Practice phase
+    phase3_days = days - phase1_days - phase2_days  # Revision phase
+    
+    current_date = timezone.now().date()
+    
+    # Phase 1: Learning
+    for i in range(phase1_days):
+        plan.append({
+            'day': i + 1,
+            'date': str(current_date + timedelta(days=i)),
+            'phase': 'Learning',
+            'tasks': [
+                f"Study {course_name} fundamentals",
+                "Read textbook chapters",
+                "Watch video lectures",
+                "Take notes on key concepts"
+            ],
+            'hours': hours_per_day
+        })
+    
+    # Phase 2: Practice
+    for i in range(phase2_days):
+        plan.append({
+            'day': phase1_days + i + 1,
+            'date': str(current_date + timedelta(days=phase1_days + i)),
+            'phase': 'Practice',
+            'tasks': [
+                "Solve practice problems",
+                "Complete assignments",
+                "Take mock tests",
+                "Review previous topics"
+            ],
+            'hours': hours_per_day
+        })
+    
+    # Phase 3: Revision
+    for i in range(phase3_days):
+        plan.append({
+            'day': phase1_days + phase2_days + i + 1,
+            'date': str(current_date + timedelta(days=phase1_days + phase2_days + i)),
+            'phase': 'Revision',
+            'tasks': [
+                "Quick revision of all topics",
+                "Review notes and formulas",
+                "Solve previous year papers",
+                "Final preparation"
+            ],
+            'hours': hours_per_day
+        })
+    
+    return plan
@@ -0,0 +1,148 @@
+"""
+Opt-in request profiling
+ProfilingMiddleware runs cProfile on a random sample of requests and, when
+PROFILING_SLOW_SECONDS is set, on every request (keeping only the slow ones).
+Each kept request writes '<name>.pstats' and '<name>.sql.json' (every SQL
+statement with its duration and the project line that issued it) to
+PROFILING_DIR, which is rotated to the newest PROFILING_KEEP requests.
+One request per process is profiled at a time; requests that arrive while
+another is being profiled are served without it.
+Summarize the dumps with `manage.py profile_summary`.
+"""
+import cProfile
+import glob
+import json
+import os
+import random
+import threading
+import time
+import traceback
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+# Execute wrappers that sit between a query and the code that issued it
+# (this module, metrics and the SQLite backend's deferred BEGIN)
+_WRAPPER_FILES = {
+    __file__,
+    os.path.join(os.path.dirname(__file__), 'metrics.py'),
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), 'randomproject', 'sqlite', 'base.py'),
+}
+
+_counter = [0]
+_counter_lock = threading.Lock()
+# Held while a request is profiled: cProfile runs must not overlap
+_profile_lock = threading.Lock()
+
+
+def profile_dir():
+    return str(settings.PROFILING_DIR)
+
+
+def _origin():
+    """'file:line in function' of the innermost project frame that issued a query"""
+    base_dir = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()[:-2]):
+        filename = frame.filename
+        if filename.startswith(base_dir) and filename not in _WRAPPER_FILES and 'site-packages' not in filename:
+            return f'{os.path.relpath(filename, base_dir)}:{frame.lineno} in {frame.name}'
+    return ''
+
+
+def _dump_name(view, elapsed):
+    with _counter_lock:
+        _counter[0] += 1
+        sequence = _counter[0]
+    safe_view = ''.join(c if c.isalnum() else '_' for c in view)
+    return f'{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}-{sequence}-{safe_view}-{elapsed * 1000:.0f}ms'
+
+
+def rotate(keep):
+    """Delete the oldest dumps beyond `keep` requests"""
+    dumps = sorted(glob.glob(os.path.join(profile_dir(), '*.pstats')), key=os.path.getmtime)
+    for path in dumps[:max(0, len(dumps) - keep)]:
+        for stale in (path, path[:-len('.pstats')] + '.sql.json'):
+            try:
+                os.remove(stale)
+            except FileNotFoundError:
+                pass
+
+
+class ProfilingMiddleware:
+    """
+    cProfile sampled or slow requests and trace their SQL
+    Removed from the stack (MiddlewareNotUsed) unless PROFILING_ENABLED.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.slow_seconds = settings.PROFILING_SLOW_SECONDS
+
+    def __call__(self, request):
+        sampled = random.random() < self.sample_rate
+        if not sampled and not self.slow_seconds:
+            return self.get_response(request)
+        if not _profile_lock.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            return self._profile(request, sampled)
+        finally:
+            _profile_lock.release()
+
+    def _profile(self, request, sampled):
+        queries = []
+
+        def trace_sql(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries.append({
+                    'sql': sql,
+                    'many': many,
+                    'seconds': round(time.perf_counter() - started, 6),
+                    'origin': _origin(),
+                })
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all(initialized_only=False):
+                stack.enter_context(connection.execute_wrapper(trace_sql))
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        elapsed = time.perf_counter() - started
+
+        slow = bool(self.slow_seconds) and elapsed >= self.slow_seconds
+        if sampled or slow:
+            self._dump(request, response, profiler, queries, elapsed, 'slow' if slow else 'sampled')
+        return response
+
+    def _dump(self, request, response, profiler, queries, elapsed, reason):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        os.makedirs(profile_dir(), exist_ok=True)
+        base = os.path.join(profile_dir(), _dump_name(view, elapsed))
+
+        profiler.dump_stats(base + '.pstats')
+        with open(base + '.sql.json', 'w', encoding='utf-8') as f:
+            json.dump({
+                'view': view,
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'seconds': round(elapsed, 6),
+                'reason': reason,
+                'sql_seconds': round(sum(query['seconds'] for query in queries), 6),
+                'queries': queries,
+            }, f, indent=1)
+
+        rotate(settings.PROFILING_KEEP)
@@ -0,0 +1,143 @@
+"""
+Item-to-item note recommendations from co-downloads
+build() turns the download events into a sparse students x notes matrix X
+(1 if the student downloaded the note), multiplies C = X.T @ X to get the
+number of students who downloaded each pair of notes, scores every pair by
+the cosine similarity C[i, j] / sqrt(C[i, i] * C[j, j]) and stores the
+RECOMMENDATIONS_TOP_K best neighbours of each note in NoteSimilarity. It runs
+as a periodic batch (`manage.py build_recommendations`); between runs
+record_download() updates the rows touched by a student's first download of a
+note (queued by the download view). Pages read the table only: one indexed
+query per panel.
+"""
+import math
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from scipy import sparse
+
+from .models import NoteDownload, NoteSimilarity
+
+BATCH_SIZE = 1000
+
+
+def _top(scores, k):
+    """Indices of the k largest scores, best first"""
+    if len(scores) > k:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+def build(top_k=None, min_co_downloads=None):
+    """Recompute every note's neighbours from all downloads, returns the number of rows"""
+    top_k = top_k or settings.RECOMMENDATIONS_TOP_K
+    min_co_downloads = min_co_downloads or settings.RECOMMENDATIONS_MIN_CO_DOWNLOADS
+
+    pairs = np.array(
+        list(NoteDownload.objects.filter(user__isnull=False).values_list('user_id', 'note_id').order_by().distinct()),
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    _, user_index = np.unique(pairs[:, 0], return_inverse=True)
+    note_ids, note_index = np.unique(pairs[:, 1], return_inverse=True)
+    downloads = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.float64), (user_index, note_index)),
+        shape=(user_index.max(initial=-1) + 1, len(note_ids)),
+    )
+
+    co = (downloads.T @ downloads).tocsr()
+    downloaders = co.diagonal()
+    co.setdiag(0)
+    co.data[co.data < min_co_downloads] = 0
+    co.eliminate_zeros()
+    co.sort_indices()
+
+    rows = np.repeat(np.arange(co.shape[0]), np.diff(co.indptr))
+    scores = co.data / np.sqrt(downloaders[rows] * downloaders[co.indices])
+
+    similarities = []
+    for i in range(co.shape[0]):
+        start, end = co.indptr[i], co.indptr[i + 1]
+        for j in _top(scores[start:end], top_k) + start:
+            similarities.append(NoteSimilarity(
+                note_id=int(note_ids[i]),
+                similar_id=int(note_ids[co.indices[j]]),
+                score=float(scores[j]),
+                co_downloads=int(co.data[j]),
+            ))
+
+    with transaction.atomic():
+        NoteSimilarity.objects.all().delete()
+        NoteSimilarity.objects.bulk_create(similarities, batch_size=BATCH_SIZE)
+    return len(similarities)
+
+
+def _downloaders(note_ids):
+    """{note_id: distinct students who downloaded it}"""
+    return dict(
+        NoteDownload.objects.filter(note_id__in=note_ids, user__isnull=False)
+        .values_list('note_id').annotate(students=Count('user_id', distinct=True))
+    )
+
+
+def record_download(user_id, note_id):
+    """
+    Update the neighbours after a student's first download of a note
+    Recomputes the note's own row exactly and re-scores the note in the rows
+    of the student's other notes, from the current downloads, so repeating it
+    changes nothing. Other rows that involve this note keep their old score
+    until the next build().
+    """
+    if user_id is None:
+        return
+    top_k = settings.RECOMMENDATIONS_TOP_K
+    min_co_downloads = settings.RECOMMENDATIONS_MIN_CO_DOWNLOADS
+
+    students = NoteDownload.objects.filter(note_id=note_id, user__isnull=False).values('user_id')
+    co = dict(
+        NoteDownload.objects.filter(user_id__in=students).exclude(note_id=note_id)
+        .values_list('note_id').annotate(students=Count('user_id', distinct=True))
+    )
+    co = {other: count for other, count in co.items() if count >= min_co_downloads}
+    downloaders = _downloaders(list(co) + [note_id])
+    scores = {other: count / math.sqrt(downloaders[note_id] * downloaders[other]) for other, count in co.items()}
+    neighbours = sorted(scores, key=lambda other: (-scores[other], other))[:top_k]
+
+    mine = set(NoteDownload.objects.filter(user_id=user_id).exclude(note_id=note_id).values_list('note_id', flat=True))
+    with transaction.atomic():
+        NoteSimilarity.objects.filter(note_id=note_id).delete()
+        NoteSimilarity.objects.bulk_create([
+            NoteSimilarity(note_id=note_id, similar_id=other, score=scores[other], co_downloads=co[other])
+            for other in neighbours
+        ])
+        NoteSimilarity.objects.filter(note_id__in=mine - set(co), similar_id=note_id).delete()
+        for other in mine & set(co):
+            NoteSimilarity.objects.update_or_create(
+                note_id=other, similar_id=note_id,
+                defaults={'score': scores[other], 'co_downloads': co[other]},
+            )
+            keep = list(NoteSimilarity.objects.filter(note_id=other).values_list('id', flat=True)[:top_k])
+            NoteSimilarity.objects.filter(note_id=other).exclude(id__in=keep).delete()
+
+
+def for_user(user, limit=6, recent=5):
+    """
+    Notes to suggest to a student: neighbours of the `recent` notes they
+    downloaded last, best score first, without notes they already have
+    One query (the downloads are subqueries), served by core_notesim_note_score_idx
+    """
+    downloaded = NoteDownload.objects.filter(user=user).values('note_id')
+    latest = NoteDownload.objects.filter(user=user).order_by('-downloaded_at').values('note_id')[:recent]
+    rows = (
+        NoteSimilarity.objects.filter(note_id__in=latest)
+        .exclude(similar_id__in=downloaded)
+        .select_related('similar__subject')
+        .order_by('-score')[:limit * recent]
+    )
+    suggestions = {}
+    for row in rows:
+        suggestions.setdefault(row.similar_id, row.similar)
+    return list(suggestions.values())[:limit]
@@ -0,0 +1,212 @@
+"""
+Cohort attendance eligibility report
+Loads every attendance bitmap of a term into NumPy arrays and computes
+eligibility, deficit and projections for the whole cohort at once.
+"""
+import csv
+import json
+
+import numpy as np
+
+from .attendance import current_term, eligibility, threshold
+from .models import AttendanceRecord, SessionCalendar, Subject
+from users.models import StudentProfile
+
+# Set bits per byte value, used to popcount whole bitmap matrices
+POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint16)
+
+FIELDS = [
+    'enrollment_number', 'username', 'branch', 'semester', 'subject',
+    'attended', 'held', 'planned', 'percentage', 'classes_needed',
+    'classes_remaining', 'max_percentage', 'can_recover',
+]
+
+
+def _popcounts(bitmaps):
+    """Number of set bits of each bitmap, vectorized over a padded byte matrix"""
+    if not bitmaps:
+        return np.zeros(0, dtype=np.int64)
+    width = max(1, max(len(bitmap) for bitmap in bitmaps))
+    matrix = np.frombuffer(
+        b''.join(bytes(bitmap).ljust(width, b'\0') for bitmap in bitmaps), dtype=np.uint8,
+    ).reshape(len(bitmaps), width)
+    return POPCOUNT[matrix].sum(axis=1, dtype=np.int64)
+
+
+def load_cohort(term):
+    """
+    Arrays describing every (student, subject) record of a term
+    Returns a dict of equally long arrays plus lookup tables.
+    """
+    profile_ids, subject_ids, bitmaps = [], [], []
+    records = AttendanceRecord.objects.filter(term=term).values_list('profile_id', 'subject_id', 'present')
+    for profile_id, subject_id, present in records.iterator(chunk_size=20000):
+        profile_ids.append(profile_id)
+        subject_ids.append(subject_id)
+        bitmaps.append(present)
+
+    profile_ids = np.array(profile_ids, dtype=np.int64)
+    subject_ids = np.array(subject_ids, dtype=np.int64)
+
+    calendars = SessionCalendar.objects.filter(term=term).values_list('subject_id', 'dates', 'planned_sessions')
+    subject_index = {}
+    held_by_subject, planned_by_subject = [], []
+    for subject_id, dates, planned in calendars:
+        subject_index[subject_id] = len(held_by_subject)
+        held_by_subject.append(len(dates))
+        planned_by_subject.append(planned)
+    # Records without a calendar have no held sessions
+    subject_index.setdefault(None, len(held_by_subject))
+    held_by_subject.append(0)
+    planned_by_subject.append(0)
+
+    missing = subject_index[None]
+    subject_pos = np.array([subject_index.get(subject_id, missing) for subject_id in subject_ids.tolist()],
+                           dtype=np.int64)
+
+    return {
+        'term': term,
+        'profile_ids': profile_ids,
+        'subject_ids': subject_ids,
+        'attended': _popcounts(bitmaps),
+        'held': np.array(held_by_subject, dtype=np.int64)[subject_pos],
+        'planned': np.array(planned_by_subject, dtype=np.int64)[subject_pos],
+    }
+
+
+def compute_eligibility(cohort, target=None):
+    """
+    Vectorized eligibility for every record of a cohort
+    Adds percentage, eligible, classes_needed, classes_remaining,
+    max_percentage and can_recover arrays to the cohort dict.
+    """
+    target = threshold() if target is None else target
+    attended, held, planned = cohort['attended'], cohort['held'], cohort['planned']
+
+    percentage, eligible = eligibility(attended, held, target)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        total = np.maximum(planned, held)
+        remaining = total - held
+        max_percentage = np.where(total > 0, (attended + remaining) * 100.0 / total, 100.0)
+
+    # Consecutive classes needed: smallest x with (a + x) / (h + x) >= t
+    if target < 100:
+        shortfall = target * held - 100 * attended
+        needed = np.maximum(0, -(-shortfall // (100 - target)))
+    else:
+        needed = np.where(attended < held, remaining, 0)
+
+    cohort.update({
+        'target': target,
+        'percentage': percentage,
+        'eligible': eligible,
+        'classes_needed': needed,
+        'classes_remaining': remaining,
+        'max_percentage': np.round(max_percentage, 1),
+        'can_recover': needed <= remaining,
+    })
+    return cohort
+
+
+def _profile_details(profile_ids):
+    details = {}
+    ids = [int(pk) for pk in np.unique(profile_ids)]
+    for start in range(0, len(ids), 900):
+        rows = StudentProfile.objects.filter(pk__in=ids[start:start + 900]).values_list(
+            'id', 'enrollment_number', 'user__username', 'branch', 'semester',
+        )
+        for pk, enrollment, username, branch, semester in rows:
+            details[pk] = (enrollment or '', username, branch or '', semester)
+    return details
+
+
+def eligibility_report(term=None, target=None):
+    """
+    Students below the threshold, per subject, plus group summaries
+    Returns {'term', 'threshold', 'students': [...], 'groups': [...]}
+    Groups are keyed by (branch, semester, subject) and count all records.
+    """
+    term = term or current_term()
+    cohort = compute_eligibility(load_cohort(term), target)
+
+    subjects = dict(Subject.objects.values_list('id', 'code'))
+    details = _profile_details(cohort['profile_ids'])
+
+    students = []
+    for i in np.flatnonzero(~cohort['eligible']).tolist():
+        enrollment, username, branch, semester = details.get(int(cohort['profile_ids'][i]), ('', '', '', None))
+        students.append({
+            'enrollment_number': enrollment,
+            'username': username,
+            'branch': branch,
+            'semester': semester,
+            'subject': subjects.get(int(cohort['subject_ids'][i]), ''),
+            'attended': int(cohort['attended'][i]),
+            'held': int(cohort['held'][i]),
+            'planned': int(cohort['planned'][i]),
+            'percentage': float(cohort['percentage'][i]),
+            'classes_needed': int(cohort['classes_needed'][i]),
+            'classes_remaining': int(cohort['classes_remaining'][i]),
+            'max_percentage': float(cohort['max_percentage'][i]),
+            'can_recover': bool(cohort['can_recover'][i]),
+        })
+    students.sort(key=lambda row: (row['branch'], row['semester'] or 0, row['subject'], row['percentage']))
+
+    # Group summary: encode (branch, semester, subject) as integer columns,
+    # mapping per-profile codes onto records with searchsorted
+    unique_profiles = np.unique(cohort['profile_ids'])
+    branch_codes, semester_codes = {}, {}
+    profile_branch = np.empty(len(unique_profiles), dtype=np.int64)
+    profile_semester = np.empty(len(unique_profiles), dtype=np.int64)
+    for i, profile_id in enumerate(unique_profiles.tolist()):
+        _, _, branch, semester = details.get(profile_id, ('', '', '', 0))
+        profile_branch[i] = branch_codes.setdefault(branch, len(branch_codes))
+        profile_semester[i] = semester_codes.setdefault(semester, len(semester_codes))
+    position = np.searchsorted(unique_profiles, cohort['profile_ids'])
+    record_branch = profile_branch[position]
+    record_semester = profile_semester[position]
+
+    groups = []
+    if len(record_branch):
+        subject_values, record_subject = np.unique(cohort['subject_ids'], return_inverse=True)
+        n_semesters, n_subjects = len(semester_codes), len(subject_values)
+        keys = (record_branch * n_semesters + record_semester) * n_subjects + record_subject.reshape(-1)
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        totals = np.bincount(inverse)
+        below = np.bincount(inverse, weights=(~cohort['eligible']).astype(np.float64)).astype(np.int64)
+        mean_percentage = np.bincount(inverse, weights=cohort['percentage']) / totals
+        branches = {code: name for name, code in branch_codes.items()}
+        semesters = {code: value for value, code in semester_codes.items()}
+        for key, total, count, mean in zip(
+                unique_keys.tolist(), totals.tolist(), below.tolist(), mean_percentage.tolist()):
+            rest, subject = divmod(key, n_subjects)
+            branch, semester = divmod(rest, n_semesters)
+            groups.append({
+                'branch': branches[branch],
+                'semester': semesters[semester],
+                'subject': subjects.get(int(subject_values[subject]), ''),
+                'students': total,
+                'below_threshold': count,
+                'mean_percentage': round(mean, 1),
+            })
+
+    return {
+        'term': term,
+        'threshold': cohort['target'],
+        'students': students,
+        'groups': groups,
+    }
+
+
+def write_csv(report, out, summary=False):
+    """Write the student list (or the group summary) as CSV"""
+    rows = report['groups'] if summary else report['students']
+    fields = ['branch', 'semester', 'subject', 'students', 'below_threshold', 'mean_percentage'] if summary else FIELDS
+    writer = csv.DictWriter(out, fieldnames=fields)
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def write_json(report, out):
+    json.dump(report, out, indent=2)
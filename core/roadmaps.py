@@ -0,0 +1,76 @@
+"""
+Cached placement roadmaps
+The rendered roadmap fragment and the JSON API body live in the shared cache
+under keys that include a version number. Saving or deleting a roadmap
+(admin or otherwise) bumps the version, so every worker switches to fresh
+keys at once and the old entries simply expire. The version also drives the
+ETags, letting browsers revalidate with a 304.
+Cache fills read the primary: a lagging read replica would otherwise get its
+stale rows cached under the new version.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+
+from .models import PlacementRoadmap
+
+VERSION_KEY = 'core:roadmaps:version'
+
+
+def _cache():
+    return caches[settings.ROADMAP_CACHE_ALIAS]
+
+
+def version():
+    """Current roadmap version; a fresh one (never reused) if the key was evicted"""
+    current = _cache().get(VERSION_KEY)
+    if current is None:
+        _cache().add(VERSION_KEY, time.time_ns(), None)
+        current = _cache().get(VERSION_KEY)
+    return current
+
+
+def bump_version():
+    """Invalidate every cached roadmap rendering"""
+    _cache().set(VERSION_KEY, time.time_ns(), None)
+
+
+def roadmaps_json():
+    """JSON body of the roadmap API, rendered once per version"""
+    key = f'core:roadmaps:json:{version()}'
+    body = _cache().get(key)
+    if body is None:
+        body = json.dumps({'roadmaps': [
+            {
+                'career_path': roadmap.career_path,
+                'title': roadmap.title,
+                'description': roadmap.description,
+                'skills': roadmap.skills,
+                'tools': roadmap.tools,
+                'learning_order': roadmap.learning_order,
+                'estimated_duration': roadmap.estimated_duration,
+            }
+            for roadmap in PlacementRoadmap.objects.using('default').order_by('pk')
+        ]})
+        _cache().set(key, body, settings.ROADMAP_CACHE_SECONDS)
+    return body
+
+
+def api_etag(request):
+    return f'roadmaps-{version()}'
+
+
+def page_etag(request):
+    """
+    ETag of the roadmap page: the version plus what base.html shows of the user
+    None (no conditional handling) while flash messages are waiting.
+    """
+    if len(get_messages(request)):
+        return None
+    user = request.user
+    viewer = hashlib.md5(f'{user.pk}:{user.username}:{user.role}'.encode()).hexdigest()[:12]
+    return f'roadmaps-{version()}-{viewer}'
@@ -0,0 +1,151 @@
+"""
+Signal handlers for core app
+Maintains the SiteStats counters and usage rollups in the same transaction
+as the row change
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from . import analytics, events, roadmaps
+from .filecache import hot_files
+from .models import Note, Notice, NoteDownload, PlacementRoadmap, SiteStats, Subject, AttendanceRecord
+from .feeds import NOTICES_FEED_CACHE_KEY, SUBJECTS_CACHE_KEY
+from users.models import User, StudentProfile
+from ai_helper.models import AIQuery
+
+
+def _profile_semester(user):
+    try:
+        return user.student_profile.semester
+    except StudentProfile.DoesNotExist:
+        return None
+
+
+@receiver(post_save, sender=Note)
+def note_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        SiteStats.adjust(total_notes=1)
+
+
+@receiver(post_delete, sender=Note)
+def note_deleted(sender, instance, **kwargs):
+    SiteStats.adjust(total_notes=-1)
+
+
+@receiver([post_save, post_delete], sender=Note)
+def note_file_changed(sender, instance, raw=False, **kwargs):
+    """Drop this worker's cached copy (other workers notice the new mtime)"""
+    if not raw and instance.file:
+        hot_files.invalidate(instance.file.path)
+
+
+@receiver(post_save, sender=Notice)
+def notice_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        SiteStats.adjust(total_notices=1)
+
+
+@receiver(post_delete, sender=Notice)
+def notice_deleted(sender, instance, **kwargs):
+    SiteStats.adjust(total_notices=-1)
+
+
+@receiver([post_save, post_delete], sender=Notice)
+def notice_changed(sender, raw=False, **kwargs):
+    if not raw:
+        cache.delete(NOTICES_FEED_CACHE_KEY)
+        if kwargs.get('created'):
+            # Push it to this worker's stream listeners once it is visible
+            transaction.on_commit(events.hub.notify)
+
+
+@receiver([post_save, post_delete], sender=Subject)
+def subject_changed(sender, raw=False, **kwargs):
+    if not raw:
+        cache.delete(SUBJECTS_CACHE_KEY)
+
+
+@receiver([post_save, post_delete], sender=PlacementRoadmap)
+def roadmap_changed(sender, raw=False, **kwargs):
+    if not raw:
+        # After commit, so no request can cache the old rows under the new version
+        transaction.on_commit(roadmaps.bump_version)
+
+
+@receiver(post_save, sender=AIQuery)
+def ai_query_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        SiteStats.adjust(total_queries=1)
+        analytics.record('ai_query', instance.created_at, {
+            'intent': instance.intent or 'other',
+            'semester': _profile_semester(instance.user),
+        })
+
+
+@receiver(post_delete, sender=AIQuery)
+def ai_query_deleted(sender, instance, **kwargs):
+    SiteStats.adjust(total_queries=-1)
+
+
+@receiver(pre_save, sender=User)
+def remember_user_role(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Remember the stored role so post_save can tell if a student was promoted"""
+    instance._stats_old_role = None
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and 'role' not in update_fields:
+        return
+    instance._stats_old_role = (
+        User.objects.filter(pk=instance.pk).values_list('role', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        if instance.role == 'student':
+            SiteStats.adjust(total_students=1)
+            # The profile, and with it the semester, is counted when it is created
+            analytics.record('signup', instance.date_joined)
+        return
+    old_role = getattr(instance, '_stats_old_role', None)
+    if old_role and old_role != instance.role:
+        n = -1 if old_role == 'student' else 1 if instance.role == 'student' else 0
+        SiteStats.adjust(total_students=n)
+        analytics.record('signup', instance.date_joined, {'semester': _profile_semester(instance)}, n=n)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    if instance.role == 'student':
+        SiteStats.adjust(total_students=-1)
+
+
+@receiver(post_save, sender=StudentProfile)
+def student_signed_up(sender, instance, created, raw=False, **kwargs):
+    """Signups are student users by date_joined; this adds the semester dimension"""
+    if created and not raw and instance.user.role == 'student':
+        analytics.record('signup', instance.user.date_joined, {'semester': instance.semester}, total=False)
+
+
+@receiver(post_save, sender=NoteDownload)
+def note_downloaded(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        note = instance.note
+        analytics.record('download', instance.downloaded_at, {
+            'note': note.pk,
+            'subject': note.subject_id,
+            'semester': note.subject.semester,
+        })
+
+
+@receiver(post_save, sender=AttendanceRecord)
+def attendance_record_saved(sender, instance, raw=False, **kwargs):
+    """Keep StudentProfile.attendance_percentage in sync after single-row edits"""
+    if not raw:
+        from .attendance import refresh_attendance_percentage
+        refresh_attendance_percentage([instance.profile_id], instance.term)
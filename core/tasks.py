@@ -0,0 +1,39 @@
+"""
+Background jobs of the core app (see core/jobs.py)
+"""
+from datetime import date
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import jobs, recommendations
+from .jobs import job
+from .models import StudyPlan
+from .planner import generate_study_plan
+
+
+@job
+def update_recommendations(user_id, note_id):
+    """Re-score a note's neighbours after a student's first download of it (safe to repeat)"""
+    recommendations.record_download(user_id, note_id)
+
+
+@job
+def create_study_plan(user_id, course_name, exam_date, hours_per_day):
+    """Generate and save a study plan; exam_date is an ISO date"""
+    exam_date = date.fromisoformat(exam_date)
+    days = (exam_date - timezone.now().date()).days
+    plan_data = generate_study_plan(course_name, max(days, 1), hours_per_day)
+    job_id = jobs.current_job_id()
+    with transaction.atomic():
+        # A retry, or a second worker after the lease ran out, finds the plan
+        if job_id is not None and StudyPlan.objects.select_for_update().filter(job_id=job_id).exists():
+            return
+        StudyPlan.objects.create(
+            user_id=user_id,
+            course_name=course_name,
+            exam_date=exam_date,
+            hours_per_day=hours_per_day,
+            plan_data=plan_data,
+            job_id=job_id,
+        )
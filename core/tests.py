@@ -1,3 +1,1267 @@
-from django.test import TestCase
+"""
+Query-count budgets and index usage for the core views
+Every page is rendered against a seeded database; a budget that is exceeded
+usually means an N+1 query, an EXPLAIN that stops naming the index means a
+table scan crept back in.
+"""
+import csv
+import gzip
+import io
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import warnings
+from contextlib import closing
+from datetime import date, timedelta
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache, caches
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, connections, transaction
+from django.db.models import Count, Sum
+from django.http import HttpResponse
+from django.test import (
+    AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from . import analytics, async_views, events, jobs, metrics, profiling, tasks
+from . import attendance, reports
+from .attendance import record_session
+from .filecache import hot_files
+from . import recommendations
+from .models import (
+    AttendanceRecord, DailyRollup, HourlyRollup, Job, Note, NoteDownload, NoteSimilarity, Notice, PlacementRoadmap,
+    SiteStats, StudyPlan, Subject,
+)
+from ai_helper.models import AIQuery
+from randomproject import routers
+from randomproject.sqlite import base as sqlite_base
+from randomproject.staticfiles import StaticFilesWSGI, StaticIndex
+from users.backends import ProfileModelBackend
+from users.models import User, StudentProfile
+
+ROWS = 15
+
+
+@jobs.job(max_attempts=2)
+def failing_job():
+    raise RuntimeError('boom')
+
+
+def explain(queryset):
+    """SQLite's EXPLAIN QUERY PLAN for a queryset, as one string"""
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return ' | '.join(row[-1] for row in cursor.fetchall())
+
+
+# Sessions and request.user come straight from the DB so the per-request
+# overhead is a fixed two queries (session + user with profile).
+@override_settings(
+    SESSION_ENGINE='django.contrib.sessions.backends.db',
+    USER_PROFILE_CACHE_TIMEOUT=0,
+    READ_REPLICA_ENABLED=False,
+    ROADMAP_CACHE_ALIAS='default',
+)
+class QueryBudgetTestCase(TestCase):
+    """Seeds students, an admin, subjects, notes, notices, plans and queries"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', 'admin@example.com', 'pw', role='admin')
+        cls.student = User.objects.create_user('student', 'student@example.com', 'pw')
+        StudentProfile.objects.create(user=cls.student, semester=3, branch='CSE')
+        other = User.objects.create_user('other', 'other@example.com', 'pw')
+        StudentProfile.objects.create(user=other, semester=3, branch='CSE')
+        
+        cls.subjects = [
+            Subject.objects.create(name=f'Subject {i}', code=f'S{i}', semester=i % 4 + 1)
+            for i in range(4)
+        ]
+        for i in range(ROWS):
+            note = Note.objects.create(
+                title=f'Note {i}', subject=cls.subjects[i % 4], file=f'notes/note{i}.pdf', uploaded_by=cls.admin,
+            )
+            NoteDownload.objects.create(note=note, user=cls.student)
+            Notice.objects.create(title=f'Notice {i}', content='...', posted_by=cls.admin)
+            for user in (cls.student, other):
+                StudyPlan.objects.create(
+                    user=user, course_name=f'Course {i}', exam_date=date.today() + timedelta(days=i + 1),
+                    hours_per_day=2, plan_data=[],
+                )
+                AIQuery.objects.create(user=user, query=f'question {i}', response='answer', intent='study')
+        for career_path, title in PlacementRoadmap.CAREER_CHOICES:
+            PlacementRoadmap.objects.create(
+                career_path=career_path, title=title, description='...',
+                skills=['a'], tools=['b'], learning_order=['c'],
+            )
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = explain(queryset)
+        self.assertIn(index_name, plan, f'{queryset.model.__name__} query does not use {index_name}: {plan}')
+        return plan
+
+    def assertPageQueries(self, budget, url, user=None):
+        self.client.force_login(user or self.student)
+        with self.assertNumQueries(budget):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+
+class StudentPageQueryTests(QueryBudgetTestCase):
+
+    def test_dashboard(self):
+        self.assertPageQueries(5, reverse('core:dashboard'))
+
+    def test_attendance_estimate(self):
+        self.assertPageQueries(3, reverse('core:attendance'))
+
+    def test_attendance_from_bitmaps(self):
+        profile = self.student.student_profile
+        for subject in self.subjects:
+            for day in range(1, 6):
+                record_session(subject, date(2026, 1, day), [profile.pk], [])
+        response = self.assertPageQueries(4, reverse('core:attendance'))
+        self.assertEqual(len(response.context['subject_attendance']), len(self.subjects))
+
+    def test_notes(self):
+        response = self.assertPageQueries(5, reverse('core:notes'))
+        self.assertEqual(len(response.context['notes']), ROWS)
+
+    def test_notes_filtered(self):
+        subject = self.subjects[1]
+        self.assertPageQueries(5, reverse('core:notes') + f'?subject={subject.pk}')
+        self.assertPageQueries(5, reverse('core:notes') + f'?semester={subject.semester}')
+
+    def test_study_planner(self):
+        self.assertPageQueries(3, reverse('core:study_planner'))
+
+    def test_placement_guidance(self):
+        cache.clear()
+        self.assertPageQueries(3, reverse('core:placement_guidance'))
+        self.assertPageQueries(2, reverse('core:placement_guidance'))
+
+
+class AdminPageQueryTests(QueryBudgetTestCase):
+
+    def test_admin_panel(self):
+        self.assertPageQueries(4, reverse('core:admin_panel'), self.admin)
+
+    def test_upload_note_form(self):
+        self.assertPageQueries(3, reverse('core:admin_upload_note'), self.admin)
+
+    def test_analytics(self):
+        self.assertPageQueries(2, reverse('core:analytics'), self.admin)
+        self.assertPageQueries(5, reverse('core:analytics_api') + '?metric=download&dimension=note', self.admin)
+
+
+class IndexUsageTests(QueryBudgetTestCase):
+
+    def test_notes_by_subject(self):
+        self.assertUsesIndex(Note.objects.filter(subject=self.subjects[0]), 'core_note_subject_upl_idx')
+
+    def test_similar_notes(self):
+        plan = self.assertUsesIndex(NoteSimilarity.objects.filter(note_id=1), 'core_notesim_note_score_idx')
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_notes_listing(self):
+        plan = self.assertUsesIndex(Note.objects.all(), 'core_note_uploaded_idx')
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_study_plans_of_user(self):
+        plan = self.assertUsesIndex(StudyPlan.objects.filter(user=self.student), 'core_plan_user_created_idx')
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_latest_notices(self):
+        plan = self.assertUsesIndex(Notice.objects.all()[:5], 'core_notice_posted_idx')
+        self.assertNotIn('TEMP B-TREE', plan)
+
+
+class MetricsTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        metrics.reset()
+
+    def test_view_metrics(self):
+        self.client.force_login(self.student)
+        self.client.get(reverse('core:notes'))
+        self.client.get(reverse('core:notes'))
+        self.assertEqual(self.client.get(reverse('core:metrics')).status_code, 403)
+        
+        self.client.force_login(self.admin)
+        body = self.client.get(reverse('core:metrics')).content.decode()
+        self.assertIn('portal_request_duration_seconds_count{view="core:notes"} 2', body)
+        self.assertIn('portal_responses_total{view="core:notes",status="200"} 2', body)
+        self.assertIn('portal_sql_queries_total{view="core:notes"} 10', body)
+
+    def test_shared_dir_merges_workers(self):
+        with tempfile.TemporaryDirectory() as shared_dir, self.settings(METRICS_SHARED_DIR=shared_dir):
+            with open(os.path.join(shared_dir, 'metrics-1.json'), 'w') as f:
+                json.dump({'core:notes': {**metrics._new_entry(), 'count': 5, 'status': {'200': 5}}}, f)
+            metrics.record('core:notes', 200, 0.02, 3, 0.001, 100)
+            merged = metrics.collect()
+        self.assertEqual(merged['core:notes']['count'], 6)
+        self.assertEqual(merged['core:notes']['status'], {'200': 6})
+
+
+class SiteStatsTests(QueryBudgetTestCase):
+
+    def assertCounters(self, **expected):
+        stats = SiteStats.load()
+        self.assertEqual({name: getattr(stats, name) for name in expected}, expected)
+        self.assertEqual(SiteStats.live_counts(), {name: getattr(stats, name) for name in SiteStats.COUNTERS})
+
+    def test_counters_follow_inserts_and_deletes(self):
+        SiteStats.reconcile()
+        self.assertCounters(total_students=2, total_notes=ROWS, total_notices=ROWS, total_queries=2 * ROWS)
+        
+        Notice.objects.create(title='New', content='...', posted_by=self.admin)
+        AIQuery.objects.create(user=self.student, query='q', response='r', intent='study')
+        Note.objects.first().delete()
+        self.assertCounters(total_notes=ROWS - 1, total_notices=ROWS + 1, total_queries=2 * ROWS + 1)
+
+    def test_student_count_follows_role_changes(self):
+        SiteStats.reconcile()
+        User.objects.create_user('newcomer', 'newcomer@example.com', 'pw')
+        self.assertCounters(total_students=3)
+        self.student.role = 'admin'
+        self.student.save()
+        self.assertCounters(total_students=2)
+        User.objects.get(username='other').delete()
+        self.assertCounters(total_students=1)
+
+    def test_upload_commits_row_and_counter_together(self):
+        SiteStats.reconcile()
+        self.client.force_login(self.admin)
+        self.client.post(reverse('core:admin_upload_notice'), {'title': 'Exam', 'content': '...'})
+        self.assertCounters(total_notices=ROWS + 1)
+
+    def test_reconcile_reports_drift(self):
+        SiteStats.reconcile()
+        Notice.objects.bulk_create([Notice(title='Bulk', content='...', posted_by=self.admin)])
+        self.assertEqual(SiteStats.reconcile(), {'total_notices': 1})
+        self.assertEqual(SiteStats.reconcile(), {})
+
+    def test_adjust_creates_the_row(self):
+        SiteStats.objects.all().delete()
+        SiteStats.adjust(total_notes=1)
+        self.assertCounters(total_notes=ROWS)
+
+
+class RollupTests(QueryBudgetTestCase):
+
+    def rollups(self, metric):
+        return {
+            model.__name__: sorted(model.objects.filter(metric=metric).values_list('bucket', 'dimension', 'key', 'count'))
+            for model in (HourlyRollup, DailyRollup)
+        }
+
+    def test_live_rollups_match_backfill(self):
+        User.objects.create_user('staff', 'staff@example.com', 'pw', role='admin')
+        promoted = User.objects.create_user('promoted', 'promoted@example.com', 'pw', role='admin')
+        promoted.role = 'student'
+        promoted.save()
+        for metric in ('ai_query', 'download', 'signup'):
+            live = self.rollups(metric)
+            self.assertTrue(live['DailyRollup'], metric)
+            analytics.backfill(metric)
+            self.assertEqual(self.rollups(metric), live, metric)
+
+    def test_signups_are_student_users(self):
+        day = analytics.day_bucket(self.student.date_joined)
+        totals = DailyRollup.objects.filter(metric='signup', dimension='total', bucket=day)
+        self.assertEqual(totals.get().count, 2)
+        self.assertEqual(DailyRollup.objects.get(metric='signup', dimension='semester', key='3', bucket=day).count, 2)
+        
+        self.student.role = 'admin'
+        self.student.save()
+        self.assertEqual(totals.get().count, 1)
+        self.assertEqual(DailyRollup.objects.get(metric='signup', dimension='semester', key='3', bucket=day).count, 1)
+
+    def test_series_and_top_keys(self):
+        now = timezone.now()
+        buckets, data = analytics.series('ai_query', now - timedelta(days=1), now + timedelta(days=1), granularity='day')
+        self.assertEqual(len(buckets), 2)
+        self.assertEqual(data, {'': [0, 2 * ROWS]})
+        top = analytics.top_keys('download', 'note', now - timedelta(days=1), now, limit=3)
+        self.assertEqual([row['total'] for row in top], [1, 1, 1])
+
+
+class ExportTests(QueryBudgetTestCase):
+
+    def export(self, kind, **params):
+        self.client.force_login(self.admin)
+        return self.client.get(reverse('core:export_logs', args=[kind]), params)
+
+    def test_csv_streams_every_row(self):
+        response = self.export('ai_queries')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], ['id', 'created_at', 'username', 'intent', 'query', 'response'])
+        self.assertEqual(len(rows), 1 + 2 * ROWS)
+
+    def test_jsonl_filters_by_user_and_date(self):
+        today = timezone.localdate().isoformat()
+        response = self.export('downloads', format='jsonl', user='student', start=today, end=today)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), ROWS)
+        self.assertEqual({row['username'] for row in rows}, {'student'})
+        self.assertEqual(rows[0]['note_title'], 'Note 0')
+        
+        response = self.export('downloads', format='jsonl', end=(timezone.localdate() - timedelta(days=1)).isoformat())
+        self.assertEqual(b''.join(response.streaming_content), b'')
+
+    def test_rejects_bad_requests(self):
+        self.assertEqual(self.export('downloads', format='xml').status_code, 400)
+        self.assertEqual(self.export('downloads', start='01/02/2026').status_code, 400)
+        self.assertEqual(self.export('nothing').status_code, 404)
+        self.client.force_login(self.student)
+        response = self.client.get(reverse('core:export_logs', args=['downloads']))
+        self.assertRedirects(response, reverse('core:dashboard'), fetch_redirect_response=False)
+
+    def test_command_writes_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'queries.jsonl')
+            call_command('export_logs', 'ai_queries', '--format', 'jsonl', '--user', 'other', '-o', path,
+                         stderr=io.StringIO())
+            with open(path, encoding='utf-8') as f:
+                self.assertEqual(len(f.readlines()), ROWS)
+
+
+class AttendanceTests(QueryBudgetTestCase):
+    TERM = '2026-even'
+
+    def setUp(self):
+        self.profile = self.student.student_profile
+        self.other = User.objects.get(username='other').student_profile
+        self.subject = self.subjects[0]
+
+    def test_bitmap_helpers(self):
+        value = (1 << 0) | (1 << 9) | (1 << 70)
+        self.assertEqual(attendance.to_bytes(value), value.to_bytes(9, 'little'))
+        self.assertEqual(attendance.to_int(attendance.to_bytes(value)), value)
+        self.assertEqual(attendance.popcount(attendance.to_bytes(value)), 3)
+        self.assertEqual(attendance.to_bytes(0), b'')
+        self.assertEqual(attendance.popcount(None), 0)
+
+    def test_summarize(self):
+        summary = attendance.summarize(6, 10, 40, target=75)
+        self.assertEqual(summary['attendance_percentage'], 60.0)
+        self.assertFalse(summary['is_eligible'])
+        self.assertEqual(summary['can_miss'], 0)
+        self.assertEqual(summary['classes_needed'], 6)  # 12 of 16 is 75%
+        self.assertEqual(summary['classes_remaining'], 30)
+        
+        summary = attendance.summarize(9, 10, 40, target=75)
+        self.assertTrue(summary['is_eligible'])
+        self.assertEqual(summary['can_miss'], 2)  # 9 of 12 is 75%
+        self.assertEqual(summary['classes_needed'], 0)
+        
+        self.assertEqual(attendance.summarize(0, 0, 0)['attendance_percentage'], 100.0)
+
+    def test_sessions_and_corrections(self):
+        for day in range(1, 5):
+            record_session(self.subject, date(2026, 1, day), [self.profile.pk], [self.other.pk], term=self.TERM)
+        record_session(self.subject, date(2026, 1, 2), [self.other.pk], [self.profile.pk], term=self.TERM)
+        
+        overall, subjects = attendance.student_attendance(self.profile, self.TERM)
+        self.assertEqual((overall['attended_classes'], overall['held_classes']), (3, 4))
+        self.assertEqual(subjects[0]['subject'], self.subject)
+        record = AttendanceRecord.objects.get(profile=self.profile, subject=self.subject, term=self.TERM)
+        self.assertEqual(attendance.to_int(record.present), 0b1101)
+        
+        self.profile.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(self.profile.attendance_percentage, 75.0)
+        self.assertEqual(self.other.attendance_percentage, 25.0)
+        self.assertEqual(attendance.student_attendance(self.profile, '2025-odd'), (None, []))
+
+    def test_new_session_updates_unmarked_students(self):
+        record_session(self.subject, date(2026, 1, 1), [self.profile.pk, self.other.pk], term=self.TERM)
+        record_session(self.subject, date(2026, 1, 2), [self.profile.pk], term=self.TERM)
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.attendance_percentage, 50.0)
+
+    def test_bitmaps_grow_past_a_byte(self):
+        for day in range(1, 12):
+            record_session(self.subject, date(2026, 1, day), [self.profile.pk] if day % 2 else [], [self.other.pk],
+                           term=self.TERM)
+        record = AttendanceRecord.objects.get(profile=self.profile, subject=self.subject, term=self.TERM)
+        self.assertEqual(bytes(record.present), (0b10101010101).to_bytes(2, 'little'))
+        self.assertEqual(record.attended, 6)
+        record = AttendanceRecord.objects.get(profile=self.other, subject=self.subject, term=self.TERM)
+        self.assertEqual(bytes(record.present), b'')
+
+    def import_sheet(self, text, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return attendance.import_roll_call(io.StringIO(text), term=self.TERM, **kwargs)
+
+    def enroll(self):
+        StudentProfile.objects.filter(pk=self.profile.pk).update(enrollment_number='CS001')
+        StudentProfile.objects.filter(pk=self.other.pk).update(enrollment_number='CS002')
+
+    def test_import_roll_call(self):
+        self.enroll()
+        report = self.import_sheet(
+            'Enrollment_Number,Status,Subject,Date\n'
+            'CS001,P,s0,2026-01-05\n'
+            'CS002,absent,S0,2026-01-05\n'
+            'CS001,A,S1,2026-01-05\n'
+            'CS001,P,S1,2026-01-06\n'
+        )
+        self.assertEqual((report.rows, report.marks, report.skipped), (4, 4, 0))
+        overall, subjects = attendance.student_attendance(self.profile, self.TERM)
+        self.assertEqual((overall['attended_classes'], overall['held_classes']), (2, 3))
+        self.assertEqual([row['attended_classes'] for row in subjects], [1, 1])
+
+    def test_import_reports_bad_rows(self):
+        self.enroll()
+        report = self.import_sheet(
+            'enrollment_number,status,date\n'
+            'CS999,P,2026-01-05\n'
+            'CS001,late,2026-01-05\n'
+            'CS001,P,\n'
+            'CS001,P,05/01/2026\n'
+            'CS002,P,2026-01-05\n',
+            subject=self.subject,
+        )
+        self.assertEqual((report.rows, report.marks, report.skipped), (5, 1, 4))
+        self.assertEqual(report.errors, [
+            "line 2: unknown enrollment number 'CS999'",
+            "line 3: invalid status 'late'",
+            'line 4: missing date',
+            "line 5: invalid date '05/01/2026'",
+        ])
+        self.assertFalse(AttendanceRecord.objects.filter(profile=self.profile).exists())
+        
+        report = self.import_sheet('enrollment_number,status\nCS001,P\n', day=date(2026, 1, 5))
+        self.assertEqual(report.errors, ["line 2: unknown subject ''"])
+
+    def test_duplicate_marks_keep_the_last(self):
+        self.enroll()
+        report = self.import_sheet(
+            'enrollment_number,status\nCS001,P\nCS001,A\nCS002,A\nCS002,P\n',
+            subject=self.subject, day='2026-01-05',
+        )
+        self.assertEqual(report.marks, 4)
+        self.assertEqual(attendance.student_attendance(self.profile, self.TERM)[0]['held_classes'], 1)
+        self.assertEqual(attendance.student_attendance(self.profile, self.TERM)[0]['attended_classes'], 0)
+        self.assertEqual(attendance.student_attendance(self.other, self.TERM)[0]['attended_classes'], 1)
+
+    @override_settings(USER_PROFILE_CACHE_ALIAS='default', USER_PROFILE_CACHE_TIMEOUT=300)
+    def test_import_invalidates_cached_profiles(self):
+        self.enroll()
+        caches['default'].clear()
+        backend = ProfileModelBackend()
+        self.assertEqual(backend.get_user(self.student.pk).student_profile.attendance_percentage, 0.0)
+        self.import_sheet('enrollment_number,status\nCS001,P\n', subject=self.subject, day='2026-01-05')
+        self.assertEqual(backend.get_user(self.student.pk).student_profile.attendance_percentage, 100.0)
+
+    def test_import_command(self):
+        self.enroll()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'rollcall.csv')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('enrollment_number,status\nCS001,P\nCS002,A\n')
+            out = io.StringIO()
+            call_command('import_attendance', path, '--subject', 's0', '--date', '2026-01-05',
+                         '--term', self.TERM, stdout=out)
+        self.assertIn('imported 2 marks', out.getvalue())
+        self.assertEqual(AttendanceRecord.objects.filter(term=self.TERM).count(), 2)
+
+
+class EligibilityReportTests(QueryBudgetTestCase):
+    TERM = '2026-even'
+
+    def setUp(self):
+        self.profile = self.student.student_profile
+        self.other = User.objects.get(username='other').student_profile
+        StudentProfile.objects.filter(pk=self.profile.pk).update(enrollment_number='CS001')
+        for day in range(1, 5):
+            present = [self.other.pk] + ([self.profile.pk] if day == 1 else [])
+            record_session(self.subjects[0], date(2026, 1, day), present, term=self.TERM)
+            record_session(self.subjects[1], date(2026, 1, day), [self.profile.pk, self.other.pk], term=self.TERM)
+
+    def test_matches_summarize(self):
+        cases = [(attended, held, 12) for held in range(0, 13) for attended in range(0, held + 1)]
+        # just below the target, shown (and judged) as 75.0 or 74.9
+        cases += [(1874, 2500, 2500), (2999, 4000, 4000), (1873, 2500, 2500)]
+        for target in (0, 75, 100):
+            cohort = reports.compute_eligibility({
+                'attended': np.array([case[0] for case in cases]),
+                'held': np.array([case[1] for case in cases]),
+                'planned': np.array([case[2] for case in cases]),
+            }, target)
+            for i, (attended, held, planned) in enumerate(cases):
+                summary = attendance.summarize(attended, held, planned, target)
+                self.assertEqual(
+                    (cohort['percentage'][i], cohort['eligible'][i], cohort['classes_remaining'][i]),
+                    (summary['attendance_percentage'], summary['is_eligible'], summary['classes_remaining']),
+                    (attended, held, target),
+                )
+                if target < 100:
+                    self.assertEqual(cohort['classes_needed'][i], summary['classes_needed'], (attended, held, target))
+
+    def test_eligibility_is_judged_on_the_shown_percentage(self):
+        self.assertTrue(attendance.summarize(1874, 2500, 2500, 75)['is_eligible'])
+        cohort = reports.compute_eligibility(
+            {'attended': np.array([1874, 1873]), 'held': np.array([2500, 2500]), 'planned': np.array([2500, 2500])}, 75,
+        )
+        self.assertEqual(cohort['percentage'].tolist(), [75.0, 74.9])
+        self.assertEqual(cohort['eligible'].tolist(), [True, False])
+
+    def test_report(self):
+        report = reports.eligibility_report(self.TERM, target=75)
+        self.assertEqual(report['students'], [{
+            'enrollment_number': 'CS001', 'username': 'student', 'branch': 'CSE', 'semester': 3,
+            'subject': 'S0', 'attended': 1, 'held': 4, 'planned': 60, 'percentage': 25.0,
+            'classes_needed': 8, 'classes_remaining': 56, 'max_percentage': 95.0, 'can_recover': True,
+        }])
+        self.assertEqual(report['groups'], [
+            {'branch': 'CSE', 'semester': 3, 'subject': 'S0', 'students': 2, 'below_threshold': 1,
+             'mean_percentage': 62.5},
+            {'branch': 'CSE', 'semester': 3, 'subject': 'S1', 'students': 2, 'below_threshold': 0,
+             'mean_percentage': 100.0},
+        ])
+        self.assertEqual(reports.eligibility_report('2025-odd'), {
+            'term': '2025-odd', 'threshold': 75, 'students': [], 'groups': [],
+        })
+
+    def test_command(self):
+        err = io.StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'summary.csv')
+            call_command('attendance_report', '--term', self.TERM, '--summary', '-o', path, stderr=err)
+            with open(path, encoding='utf-8', newline='') as f:
+                rows = list(csv.DictReader(f))
+            self.assertEqual([(row['subject'], row['below_threshold']) for row in rows], [('S0', '1'), ('S1', '0')])
+            self.assertIn('1 of 4 student-subject records below 75%', err.getvalue())
+            
+            path = os.path.join(directory, 'report.json')
+            call_command('attendance_report', '--term', self.TERM, '--format', 'json', '--threshold', '20',
+                         '-o', path, stderr=io.StringIO())
+            with open(path, encoding='utf-8') as f:
+                self.assertEqual(json.load(f)['students'], [])
+
+
+class NoticesFeedTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feed_is_cached_until_a_notice_changes(self):
+        url = reverse('core:notices_feed')
+        feed = self.assertPageQueries(3, url).json()['notices']
+        self.assertEqual(feed[0]['title'], 'Notice 14')
+        self.assertPageQueries(2, url)
+        
+        Notice.objects.create(title='Fresh', content='...', posted_by=self.admin)
+        self.assertEqual(self.assertPageQueries(3, url).json()['notices'][0]['title'], 'Fresh')
+
+
+class AsyncViewTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.factory = AsyncRequestFactory()
+
+    def request(self, path, user):
+        request = self.factory.get(path)
+        request.user = user
+        return request
+
+    async def test_notes(self):
+        subject = self.subjects[1]
+        response = await async_views.notes_view(self.request(f'/notes/?subject={subject.pk}', self.student))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Note 1')
+        self.assertNotContains(response, 'Note 2<')
+
+    async def test_login_required(self):
+        response = await async_views.notes_view(self.request('/notes/', AnonymousUser()))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse('users:login'), response.url)
+
+    async def test_notices_feed_matches_sync_view(self):
+        response = await async_views.notices_feed(self.request('/notices/feed/', self.student))
+        await sync_to_async(self.client.force_login)(self.student)
+        sync_response = await sync_to_async(self.client.get)(reverse('core:notices_feed'))
+        self.assertEqual(json.loads(response.content), sync_response.json())
+
+    async def test_metrics_count_sql_of_worker_threads(self):
+        metrics.reset()
+        # As connection_created does for connections opened by worker threads
+        await sync_to_async(metrics._install)(connection)
+        middleware = metrics.MetricsMiddleware(async_views.notices_feed)
+        request = self.request('/notices/feed/', self.student)
+        await middleware(request)
+        entry = metrics.snapshot()['<unresolved>']
+        self.assertEqual(entry['sql_queries'], 1)
+
+
+@override_settings(NOTICE_STREAM_MAX_SECONDS=0)
+class NoticeStreamTests(QueryBudgetTestCase):
+
+    def test_hub_delivers_each_notice_once(self):
+        hub = events.NoticeHub()
+        received = []
+        hub._subscribers[1] = {'deliver': received.extend, 'cursor': events.latest_notice_id()}
+        hub._last_id = events.latest_notice_id()
+        self.assertEqual(hub.poll(), 0)
+        
+        notice = Notice.objects.create(title='Results out', content='...', posted_by=self.admin)
+        self.assertEqual(hub.poll(), 1)
+        self.assertEqual(hub.poll(), 0)
+        self.assertEqual([event['id'] for event in received], [notice.pk])
+
+    def test_late_subscriber_gets_recent_events(self):
+        hub = events.NoticeHub()
+        hub._thread = object()  # pretend the poller runs
+        since = events.latest_notice_id()
+        hub._last_id = since
+        Notice.objects.create(title='Results out', content='...', posted_by=self.admin)
+        hub.poll()
+        received = []
+        hub.subscribe(received.extend, since)
+        self.assertEqual([event['title'] for event in received], ['Results out'])
+
+    def test_stream_replays_since_last_event_id(self):
+        self.client.force_login(self.student)
+        first = Notice.objects.order_by('-id')[2]
+        response = self.client.get(reverse('core:notice_stream'), HTTP_LAST_EVENT_ID=str(first.pk))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join(response.streaming_content).decode()
+        self.assertTrue(body.startswith('retry: '))
+        self.assertEqual(body.count('event: notice'), 2)
+
+    async def test_async_stream(self):
+        request = AsyncRequestFactory().get('/notices/stream/', headers={'Last-Event-ID': '0'})
+        request.user = self.student
+        response = await async_views.notice_stream(request)
+        body = ''.join([chunk.decode() async for chunk in response.streaming_content])
+        self.assertEqual(body.count('event: notice'), 15)
+
+
+class RoadmapCacheTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.student)
+
+    def test_page_revalidates_with_etag(self):
+        url = reverse('core:placement_guidance')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        
+        self.client.force_login(self.admin)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_saving_a_roadmap_bumps_the_version(self):
+        url = reverse('core:placement_guidance')
+        etag = self.client.get(url)['ETag']
+        roadmap = PlacementRoadmap.objects.first()
+        roadmap.title = 'Renamed Roadmap'
+        with self.captureOnCommitCallbacks(execute=True):
+            roadmap.save()
+        
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Renamed Roadmap')
+
+    def test_api(self):
+        url = reverse('core:roadmaps_api')
+        response = self.client.get(url)
+        self.assertEqual(len(response.json()['roadmaps']), len(PlacementRoadmap.CAREER_CHOICES))
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            PlacementRoadmap.objects.first().delete()
+        self.assertEqual(len(self.client.get(url).json()['roadmaps']), len(PlacementRoadmap.CAREER_CHOICES) - 1)
+
+
+@override_settings(JOBS_ALWAYS_EAGER=False)
+class JobTests(QueryBudgetTestCase):
+
+    def test_study_plan_is_generated_by_a_job(self):
+        self.client.force_login(self.student)
+        exam_date = (date.today() + timedelta(days=30)).isoformat()
+        before = StudyPlan.objects.filter(user=self.student).count()
+        self.client.post(reverse('core:study_planner'),
+                         {'course_name': 'Algorithms', 'exam_date': exam_date, 'hours_per_day': 3})
+        self.assertEqual(StudyPlan.objects.filter(user=self.student).count(), before)
+        
+        self.assertEqual(jobs.run_pending(), 1)
+        plan = StudyPlan.objects.filter(user=self.student, course_name='Algorithms').get()
+        self.assertEqual(len(plan.plan_data), 30)
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+
+    def test_study_plan_is_saved_once_when_a_lease_runs_out(self):
+        exam_date = (date.today() + timedelta(days=10)).isoformat()
+        job_row = tasks.create_study_plan.delay(self.student.id, 'Algorithms', exam_date, 2)
+        first = jobs.claim('worker-1')
+        later = timezone.now() + timedelta(seconds=settings.JOB_LEASE_SECONDS + 1)
+        second = jobs.claim('worker-2', now=later)
+        # worker-1 finishes after its lease ran out, worker-2 repeats the job
+        jobs.run(first, 'worker-1')
+        self.assertTrue(jobs.run(second, 'worker-2'))
+        plan = StudyPlan.objects.get(course_name='Algorithms')
+        self.assertEqual(plan.job_id, job_row.id)
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+        self.assertIsNone(jobs.current_job_id())
+
+    def test_claim_is_exclusive_until_the_lease_expires(self):
+        job_row = tasks.update_recommendations.delay(self.student.id, Note.objects.first().id)
+        self.assertEqual(jobs.claim('worker-1').id, job_row.id)
+        self.assertIsNone(jobs.claim('worker-2'))
+        
+        later = timezone.now() + timedelta(seconds=settings.JOB_LEASE_SECONDS + 1)
+        reclaimed = jobs.claim('worker-2', now=later)
+        self.assertEqual((reclaimed.locked_by, reclaimed.attempts), ('worker-2', 2))
+        # worker-1 lost its lease, so its outcome is not recorded
+        jobs.run(job_row, 'worker-1')
+        self.assertEqual(Job.objects.get().status, Job.RUNNING)
+
+    def test_failures_retry_with_backoff_then_fail(self):
+        failing_job.delay()
+        with self.assertLogs('core.jobs', 'WARNING'):
+            self.assertEqual(jobs.run_pending(), 1)
+        job_row = Job.objects.get()
+        self.assertEqual((job_row.status, job_row.attempts), (Job.QUEUED, 1))
+        self.assertIn('RuntimeError: boom', job_row.last_error)
+        self.assertIsNone(jobs.claim('worker'))
+        
+        later = timezone.now() + timedelta(seconds=settings.JOB_RETRY_BACKOFF_SECONDS + 1)
+        with self.assertLogs('core.jobs', 'WARNING'):
+            jobs.run(jobs.claim('worker', now=later), 'worker')
+        self.assertEqual(Job.objects.get().status, Job.FAILED)
+
+
+class HotFileCacheTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        hot_files.clear()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        media_root = self.settings(MEDIA_ROOT=media.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+        os.makedirs(os.path.join(media.name, 'notes'))
+        self.note = Note.objects.get(title='Note 0')
+        self.write(self.note, b'x' * 1000)
+
+    def write(self, note, data):
+        with open(note.file.path, 'wb') as f:
+            f.write(data)
+
+    def download(self, user=None):
+        self.client.force_login(user or self.student)
+        response = self.client.get(reverse('core:download_note', args=[self.note.id]))
+        return b''.join(response.streaming_content)
+
+    def test_second_download_is_served_from_memory(self):
+        self.assertEqual(self.download(), b'x' * 1000)
+        self.assertEqual(self.download(), b'x' * 1000)
+        self.assertEqual(hot_files.stats(), {'hits': 1, 'misses': 1, 'evictions': 0, 'entries': 1, 'bytes': 1000})
+        
+        self.client.force_login(self.admin)
+        self.assertIn('portal_file_cache_hits_total{worker="%d"} 1' % os.getpid(),
+                      self.client.get(reverse('core:metrics')).content.decode())
+
+    def test_download_count_is_added_in_sql(self):
+        # self.note is stale, as a replica read would be; nothing saves it back
+        Note.objects.filter(pk=self.note.pk).update(download_count=5)
+        self.download()
+        self.download()
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.download_count, 7)
+
+    def test_only_first_downloads_queue_a_job(self):
+        self.download()  # the seeded student downloaded every note before
+        self.assertFalse(Job.objects.exists())
+        reader = User.objects.create_user('reader', 'reader@example.com', 'pw')
+        with self.settings(JOBS_ALWAYS_EAGER=False):
+            self.download(reader)
+            self.download(reader)
+        self.assertEqual(list(Job.objects.values_list('name', 'args')),
+                         [(tasks.update_recommendations.job_name, [reader.id, self.note.id])])
+        self.assertEqual(self.note.downloads.count(), 4)
+        self.assertEqual(DailyRollup.objects.get(metric='download', dimension='note', key=str(self.note.id)).count, 4)
+
+    def test_replaced_file_is_read_again(self):
+        self.download()
+        self.write(self.note, b'new contents')
+        os.utime(self.note.file.path, ns=(0, 0))
+        self.assertEqual(self.download(), b'new contents')
+        
+        self.download()
+        self.note.save()
+        self.assertEqual(hot_files.stats()['entries'], 0)
+
+    def test_byte_budget(self):
+        notes = list(Note.objects.filter(title__in=['Note 1', 'Note 2']))
+        for note in notes:
+            self.write(note, b'y' * 1000)
+        with self.settings(HOT_FILE_CACHE_BYTES=2500, HOT_FILE_MAX_FILE_BYTES=1500):
+            hot_files.get(self.note.file.path)
+            for note in notes:
+                hot_files.get(note.file.path)
+            self.assertEqual(hot_files.stats()['evictions'], 1)
+            self.assertEqual(hot_files.stats()['bytes'], 2000)
+            
+            self.write(self.note, b'z' * 2000)
+            self.assertEqual(hot_files.get(self.note.file.path), None)
+            self.assertEqual(self.download(), b'z' * 2000)
+
+
+class RecommendationTests(QueryBudgetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.notes = list(Note.objects.order_by('id')[:4])
+        cls.students = [User.objects.create_user(f'reader{i}', f'reader{i}@example.com', 'pw') for i in range(4)]
+        # with 'student', who downloaded every note: notes 0 and 1 are read
+        # together by four students, 0 and 2 by three, 3 with nothing twice
+        for student, indexes in zip(cls.students, [(0, 1, 2), (0, 1), (0, 1, 2), (3,)]):
+            for i in indexes:
+                NoteDownload.objects.create(note=cls.notes[i], user=student)
+
+    def neighbours(self, note):
+        return [(row.similar_id, row.co_downloads, round(row.score, 6)) for row in note.similar_notes.all()]
+
+    def test_build(self):
+        recommendations.build()
+        neighbours = self.neighbours(self.notes[0])
+        self.assertEqual([(note_id, co) for note_id, co, _ in neighbours],
+                         [(self.notes[1].id, 4), (self.notes[2].id, 3)])
+        self.assertEqual(neighbours[0][2], 1.0)  # same four readers
+        self.assertAlmostEqual(neighbours[1][2], 3 / (4 * 3) ** 0.5, places=6)
+        self.assertEqual(self.neighbours(self.notes[3]), [])
+
+    def test_incremental_update_matches_build(self):
+        recommendations.build()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        os.makedirs(os.path.join(media.name, 'notes'))
+        for note in self.notes:
+            with open(os.path.join(media.name, note.file.name), 'wb') as f:
+                f.write(b'x')
+        hot_files.clear()
+        self.client.force_login(self.students[3])
+        with self.settings(JOBS_ALWAYS_EAGER=True, MEDIA_ROOT=media.name):
+            for note in (self.notes[2], self.notes[0], self.notes[0]):  # repeat downloads change nothing
+                self.client.get(reverse('core:download_note', args=[note.id]))
+        # The downloaded note's row and its entries in the reader's other notes are exact
+        note_row = self.neighbours(self.notes[0])
+        back_link = NoteSimilarity.objects.get(note=self.notes[2], similar=self.notes[0])
+        recommendations.build()
+        self.assertEqual(note_row, self.neighbours(self.notes[0]))
+        rebuilt = NoteSimilarity.objects.get(note=self.notes[2], similar=self.notes[0])
+        self.assertEqual(back_link.co_downloads, rebuilt.co_downloads)
+        self.assertAlmostEqual(back_link.score, rebuilt.score)
+
+    def test_suggestions(self):
+        recommendations.build()
+        reader = self.students[3]
+        NoteDownload.objects.create(note=self.notes[2], user=reader)
+        # notes 0 and 1 tie as neighbours of note 2
+        self.assertCountEqual(recommendations.for_user(reader), [self.notes[0], self.notes[1]])
+        self.assertEqual(recommendations.for_user(self.students[0]), [])
+        
+        self.client.force_login(reader)
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('core:dashboard'))
+        self.assertCountEqual(response.context['suggested_notes'], [self.notes[0], self.notes[1]])
+        self.assertContains(self.client.get(reverse('core:notes')), 'also downloaded')
+
+
+@override_settings(READ_REPLICA_ENABLED=True, READ_REPLICA_MODELS=['core.Note'])
+class ReplicaRoutingTests(QueryBudgetTestCase):
+    """Routing decisions with the replica marked ready (its rows are not read)"""
+
+    def setUp(self):
+        saved = dict(routers._replica_status)
+        self.addCleanup(routers._replica_status.update, saved)
+        routers._replica_status.update(ready=True, checked_at=time.monotonic() + 3600)
+        self.factory = RequestFactory()
+        self.router = routers.ReplicaRouter()
+
+    def serve(self, request, view=None, session=None):
+        """Run a request through the middleware, returns {'read': alias of a Note read}"""
+        seen = {}
+
+        def get_response(request):
+            if view:
+                view()
+            seen['read'] = self.router.db_for_read(Note)
+            return HttpResponse()
+
+        request.session = {} if session is None else session
+        routers.ReplicaStickinessMiddleware(get_response)(request)
+        return seen
+
+    def test_get_reads_listed_models_from_the_replica(self):
+        self.assertEqual(self.serve(self.factory.get('/notes/'))['read'], routers.REPLICA)
+        token = routers._request_state.set({'pinned': False, 'wrote': False})
+        try:
+            self.assertEqual(self.router.db_for_read(User), 'default')
+        finally:
+            routers._request_state.reset(token)
+        # outside requests (commands, jobs) everything reads from default
+        self.assertEqual(self.router.db_for_read(Note), 'default')
+
+    def test_unsafe_methods_and_admin_read_from_default(self):
+        self.assertEqual(self.serve(self.factory.post('/notes/'))['read'], 'default')
+        self.assertEqual(self.serve(self.factory.get('/admin/core/note/1/change/'))['read'], 'default')
+
+    def test_writes_pin_the_request_and_session(self):
+        note = Note.objects.first()
+        session = {}
+        seen = self.serve(self.factory.get('/notes/'), lambda: self.router.db_for_write(Note, instance=note), session)
+        self.assertEqual(seen['read'], 'default')
+        self.assertGreater(session[routers.SESSION_KEY], time.time())
+        self.assertEqual(self.serve(self.factory.get('/notes/'), session=session)['read'], 'default')
+        
+        session[routers.SESSION_KEY] = time.time() - 1
+        self.assertEqual(self.serve(self.factory.get('/notes/'), session=session)['read'], routers.REPLICA)
+
+    def test_replica_with_other_migrations_is_not_used(self):
+        with tempfile.TemporaryDirectory() as directory, warnings.catch_warnings():
+            primary, replica = os.path.join(directory, 'primary.sqlite3'), os.path.join(directory, 'replica.sqlite3')
+            for path, names in ((primary, ['0001_initial', '0002_more']), (replica, ['0001_initial'])):
+                with closing(sqlite3.connect(path)) as conn, conn:
+                    conn.execute('CREATE TABLE django_migrations (app TEXT, name TEXT)')
+                    conn.executemany('INSERT INTO django_migrations VALUES (?, ?)', [('core', name) for name in names])
+            routers._replica_status['checked_at'] = 0.0
+            databases = {**settings.DATABASES}
+            databases['default'] = {**databases['default'], 'NAME': primary}
+            databases[routers.REPLICA] = {**databases[routers.REPLICA], 'NAME': replica}
+            # only the file names are read, the open connections are untouched
+            warnings.filterwarnings('ignore', 'Overriding setting DATABASES')
+            with self.settings(DATABASES=databases):
+                with self.assertLogs('randomproject.routers', 'WARNING'):
+                    self.assertFalse(routers.replica_ready())
+                self.assertEqual(self.serve(self.factory.get('/notes/'))['read'], 'default')
+                
+                with closing(sqlite3.connect(replica)) as conn, conn:
+                    conn.execute("INSERT INTO django_migrations VALUES ('core', '0002_more')")
+                routers._replica_status['checked_at'] = 0.0
+                self.assertTrue(routers.replica_ready())
+
+
+class ProfilingTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        override = self.settings(
+            PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=1.0, PROFILING_SLOW_SECONDS=None,
+            PROFILING_DIR=self.directory, PROFILING_KEEP=2,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        self.client.force_login(self.student)
+
+    def traces(self):
+        traces = []
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith('.sql.json'):
+                self.assertTrue(os.path.exists(os.path.join(self.directory, name[:-len('.sql.json')] + '.pstats')))
+                with open(os.path.join(self.directory, name), encoding='utf-8') as f:
+                    traces.append(json.load(f))
+        return traces
+
+    def test_sampled_request_is_dumped_with_its_sql(self):
+        self.client.get(reverse('core:dashboard'))
+        [trace] = self.traces()
+        self.assertEqual((trace['view'], trace['reason'], trace['status']), ('core:dashboard', 'sampled', 200))
+        self.assertEqual(len(trace['queries']), 5)
+        self.assertTrue(any(query['origin'].startswith('core/views.py:') for query in trace['queries']))
+        
+        self.client.get(reverse('core:dashboard'))
+        self.client.get(reverse('core:dashboard'))
+        self.assertEqual(len(self.traces()), 2)
+
+    def test_only_slow_requests_are_kept(self):
+        with self.settings(PROFILING_SAMPLE_RATE=0, PROFILING_SLOW_SECONDS=3600):
+            self.client.get(reverse('core:dashboard'))
+        self.assertEqual(self.traces(), [])
+        
+        self.client = self.client_class()
+        self.client.force_login(self.student)
+        with self.settings(PROFILING_SAMPLE_RATE=0, PROFILING_SLOW_SECONDS=1e-9):
+            self.client.get(reverse('core:dashboard'))
+        self.assertEqual([trace['reason'] for trace in self.traces()], ['slow'])
+
+    def test_requests_are_not_profiled_while_another_is(self):
+        with profiling._profile_lock:
+            response = self.client.get(reverse('core:dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.traces(), [])
+        self.client.get(reverse('core:dashboard'))
+        self.assertEqual(len(self.traces()), 1)
+
+    def test_profile_summary(self):
+        self.client.get(reverse('core:dashboard'))
+        self.client.get(reverse('core:notes'))
+        out = io.StringIO()
+        call_command('profile_summary', '--dir', self.directory, '--limit', '5', stdout=out)
+        output = out.getvalue()
+        self.assertIn('2 profiled requests', output)
+        self.assertIn('core:dashboard', output)
+        self.assertIn('Hottest functions by tottime', output)
+        self.assertIn('Hottest SQL by total time', output)
+        
+        out = io.StringIO()
+        call_command('profile_summary', '--dir', self.directory, '--view', 'core:notes', stdout=out)
+        self.assertIn('1 profiled requests', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('profile_summary', '--dir', self.directory, '--view', 'core:missing')
+
+
+class LoadDataTests(QueryBudgetTestCase):
+
+    def generate(self, prefix, *args):
+        out = io.StringIO()
+        call_command('generate_load_data', '--scale', '0.0002', '--seed', '7', '--prefix', prefix,
+                     '--batch-size', '16', '--no-files', *args, stdout=out)
+        return out.getvalue()
+
+    def test_volumes_counters_and_rollups(self):
+        output = self.generate('lt', '--backfill')
+        self.assertIn('students: 10 rows', output)
+        self.assertIn('note downloads: 100 rows', output)
+        students = User.objects.filter(username__startswith='lt_', role='student')
+        self.assertEqual(students.count(), 10)
+        self.assertEqual(StudentProfile.objects.filter(user__in=students).count(), 10)
+        notes = Note.objects.filter(file__startswith='notes/lt/')
+        self.assertEqual(notes.count(), 20)
+        # each note's counter matches its generated downloads
+        for note in notes.annotate(events=Count('downloads')):
+            self.assertEqual(note.download_count, note.events)
+        
+        # timestamps are spread over the past year, not all "now"
+        oldest = NoteDownload.objects.filter(note__in=notes).earliest('downloaded_at').downloaded_at
+        self.assertLess(oldest, timezone.now() - timedelta(days=300))
+        self.assertAlmostEqual(Notice.objects.create(title='t', content='c', posted_by=self.admin).posted_at,
+                               timezone.now(), delta=timedelta(minutes=1))
+        
+        stats = SiteStats.load()
+        self.assertEqual(SiteStats.live_counts()['total_students'], stats.total_students)
+        total = DailyRollup.objects.filter(metric='download', dimension='total').aggregate(n=Sum('count'))['n']
+        self.assertEqual(total, NoteDownload.objects.count())
+
+    def test_same_seed_same_data(self):
+        self.generate('a')
+        self.generate('b')
+        
+        def shape(prefix):
+            # the subjects to pick from differ (the first run added its own), the rest is seeded
+            notes = Note.objects.filter(file__startswith=f'notes/{prefix}/').order_by('id')
+            profiles = StudentProfile.objects.filter(user__username__startswith=f'{prefix}_').order_by('id')
+            queries = AIQuery.objects.filter(user__username__startswith=f'{prefix}_').order_by('id')
+            return (
+                list(notes.values_list('download_count', flat=True)),
+                list(profiles.values_list('semester', 'branch', 'attendance_percentage')),
+                list(queries.values_list('query', 'response', 'intent')),
+            )
+        
+        self.assertEqual(shape('a'), shape('b'))
+        with self.assertRaises(CommandError):
+            self.generate('a')
+
+
+# The load test serves the app from its own threads, so its rows must be committed
+@override_settings(
+    ALLOWED_HOSTS=['127.0.0.1'],
+    SESSION_ENGINE='django.contrib.sessions.backends.db',
+    USER_PROFILE_CACHE_TIMEOUT=0,
+    READ_REPLICA_ENABLED=False,
+    ROADMAP_CACHE_ALIAS='default',
+)
+class LoadTestCommandTests(TransactionTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def loadtest(self, *args):
+        out = io.StringIO()
+        call_command('loadtest', '--users', '2', '--duration', '0.3', *args, stdout=out, stderr=io.StringIO())
+        return out.getvalue()
+
+    def test_seeded_students_are_counted(self):
+        self.loadtest()
+        self.loadtest()
+        self.assertEqual(User.objects.filter(username__startswith='loadtest_').count(), 2)
+        stats = SiteStats.load()
+        self.assertEqual(SiteStats.live_counts()['total_students'], stats.total_students)
+        live = sorted(DailyRollup.objects.filter(metric='signup').values_list('bucket', 'dimension', 'key', 'count'))
+        self.assertEqual(sum(count for _, dimension, _, count in live if dimension == 'total'), 2)
+        analytics.backfill('signup')
+        self.assertEqual(
+            sorted(DailyRollup.objects.filter(metric='signup').values_list('bucket', 'dimension', 'key', 'count')),
+            live,
+        )
+
+    def test_report_and_baseline(self):
+        report_path = os.path.join(self.directory, 'report.json')
+        markdown = self.loadtest('-o', report_path, '--markdown', os.path.join(self.directory, 'report.md'))
+        self.assertIn('| dashboard |', markdown)
+        with open(report_path, encoding='utf-8') as f:
+            report = json.load(f)
+        self.assertEqual(report['errors'], 0)
+        self.assertGreater(report['requests'], 0)
+        self.assertNotIn('download_note', report['endpoints'])  # no note files on disk
+        self.assertEqual(report['endpoints']['dashboard']['sql_queries_per_request'], 5)
+        
+        baseline_path = os.path.join(self.directory, 'baseline.json')
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump({**report, 'throughput': report['throughput'] * 100}, f)
+        with self.assertRaisesMessage(CommandError, 'exceeds 50.0%'):
+            self.loadtest('--baseline', baseline_path, '--max-regression', '50')
+
+
+class StaticFilesTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.root = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(cls.root.cleanup)
+        with override_settings(STATIC_ROOT=cls.root.name):
+            call_command('collectstatic', interactive=False, verbosity=0)
+        cls.index = StaticIndex(cls.root.name, 'static/', 1024 * 1024)
+        with open(os.path.join(cls.root.name, 'staticfiles.json')) as f:
+            cls.hashed = json.load(f)['paths']['js/main.js']
+
+    def call(self, path, **environ):
+        started = []
+        application = StaticFilesWSGI(lambda environ, start_response: [b'django'], self.index)
+        body = b''.join(application({'REQUEST_METHOD': 'GET', 'PATH_INFO': path, **environ},
+                                    lambda status, headers: started.extend([status, dict(headers)])))
+        return started + [body] if started else [None, {}, body]
+
+    def test_collectstatic_writes_hashed_and_gzip_files(self):
+        self.assertRegex(self.hashed, r'^js/main\.[0-9a-f]{12}\.js$')
+        self.assertTrue(os.path.exists(os.path.join(self.root.name, self.hashed + '.gz')))
+
+    def test_hashed_file_is_immutable_and_gzipped(self):
+        status, headers, body = self.call('/static/' + self.hashed, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(status, '200 OK')
+        self.assertIn('immutable', headers['Cache-Control'])
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(headers['Vary'], 'Accept-Encoding')
+        with open(os.path.join(self.root.name, self.hashed), 'rb') as f:
+            self.assertEqual(gzip.decompress(body), f.read())
+        
+        status, headers, body = self.call('/static/' + self.hashed)
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertEqual(int(headers['Content-Length']), len(body))
+
+    def test_unhashed_file_revalidates(self):
+        status, headers, _ = self.call('/static/js/main.js')
+        self.assertNotIn('immutable', headers['Cache-Control'])
+        status, _, body = self.call('/static/js/main.js', HTTP_IF_NONE_MATCH=headers['ETag'])
+        self.assertEqual((status, body), ('304 Not Modified', b''))
+
+    def test_unknown_paths_fall_through(self):
+        self.assertEqual(self.call('/static/missing.js')[2], b'django')
+        self.assertEqual(self.call('/notes/')[2], b'django')
+
+
+class SQLiteBackendTests(SimpleTestCase):
+    """Writer lock and transaction start of randomproject.sqlite on a file database"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'db.sqlite3')
+        self.first = self.connect('sqlite_first')
+        self.second = self.connect('sqlite_second')
+        with self.first.cursor() as cursor:
+            cursor.execute('CREATE TABLE item (value INTEGER)')
+
+    def connect(self, alias):
+        settings_dict = {
+            **connections['default'].settings_dict,
+            'NAME': self.path,
+            'OPTIONS': {'timeout': 0.2, 'writer_lock': True},
+        }
+        wrapper = sqlite_base.DatabaseWrapper(settings_dict, alias)
+        connections[alias] = wrapper
+        self.addCleanup(wrapper.close)
+        self.addCleanup(connections.__delitem__, alias)
+        return wrapper
+
+    def execute(self, wrapper, sql):
+        with wrapper.cursor() as cursor:
+            cursor.execute(sql)
+            return cursor.fetchall()
+
+    def test_read_only_transactions_skip_the_lock(self):
+        with transaction.atomic(using='sqlite_first'):
+            self.execute(self.first, 'INSERT INTO item VALUES (1)')
+            self.assertTrue(self.first.writer_lock.held)
+            with transaction.atomic(using='sqlite_second'):
+                self.assertEqual(self.execute(self.second, 'SELECT COUNT(*) FROM item'), [(0,)])
+                self.assertFalse(self.second.writer_lock.held)
+        self.assertFalse(self.first.writer_lock.held)
+
+    def test_writers_wait_up_to_the_timeout(self):
+        with transaction.atomic(using='sqlite_first'):
+            self.execute(self.first, 'INSERT INTO item VALUES (1)')
+            started = time.perf_counter()
+            with self.assertRaisesMessage(OperationalError, 'writer lock'):
+                with transaction.atomic(using='sqlite_second'):
+                    self.execute(self.second, 'INSERT INTO item VALUES (2)')
+            self.assertGreaterEqual(time.perf_counter() - started, 0.2)
+            # A transaction that reads first waits at its first write
+            with self.assertRaisesMessage(OperationalError, 'writer lock'):
+                with transaction.atomic(using='sqlite_second'):
+                    self.execute(self.second, 'SELECT COUNT(*) FROM item')
+                    self.execute(self.second, 'INSERT INTO item VALUES (2)')
+        
+        with transaction.atomic(using='sqlite_second'):
+            self.execute(self.second, 'INSERT INTO item VALUES (2)')
+        self.assertEqual(self.execute(self.first, 'SELECT value FROM item ORDER BY value'), [(1,), (2,)])
+
+    def test_select_for_update_starts_a_writing_transaction(self):
+        with transaction.atomic(using='sqlite_second'):
+            self.assertEqual(self.execute(self.second, 'SELECT COUNT(*) FROM item FOR UPDATE'), [(0,)])
+            self.assertTrue(self.second.writer_lock.held)
+            with self.assertRaisesMessage(OperationalError, 'writer lock'):
+                with transaction.atomic(using='sqlite_first'):
+                    self.execute(self.first, 'SELECT COUNT(*) FROM item FOR UPDATE')
+            self.execute(self.second, 'INSERT INTO item VALUES (1)')
+        self.assertFalse(self.second.writer_lock.held)
+
+    def test_savepoints_before_the_first_statement(self):
+        with transaction.atomic(using='sqlite_first'):
+            with transaction.atomic(using='sqlite_first'):
+                self.execute(self.first, 'INSERT INTO item VALUES (1)')
+            try:
+                with transaction.atomic(using='sqlite_first'):
+                    self.execute(self.first, 'INSERT INTO item VALUES (2)')
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertEqual(self.execute(self.second, 'SELECT value FROM item'), [(1,)])
+        
+        with transaction.atomic(using='sqlite_first'):
+            with transaction.atomic(using='sqlite_first'):
+                pass
+        self.assertFalse(self.first.writer_lock.held)
@@ -1,20 +1,31 @@
 """
 URL configuration for core app
 """
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = 'core'
 
 urlpatterns = [
     path('', views.dashboard_view, name='dashboard'),
     path('attendance/', views.attendance_view, name='attendance'),
-    path('notes/', views.notes_view, name='notes'),
+    path('notes/', async_views.notes_view if settings.ASYNC_VIEWS else views.notes_view, name='notes'),
     path('notes/<int:note_id>/download/', views.download_note, name='download_note'),
+    path('notices/feed/', async_views.notices_feed if settings.ASYNC_VIEWS else views.notices_feed,
+         name='notices_feed'),
+    path('notices/stream/', async_views.notice_stream if settings.ASYNC_VIEWS else views.notice_stream,
+         name='notice_stream'),
     path('study-planner/', views.study_planner_view, name='study_planner'),
     path('placement-guidance/', views.placement_guidance_view, name='placement_guidance'),
+    path('placement-guidance/api/', views.roadmaps_api, name='roadmaps_api'),
     path('admin-panel/', views.admin_panel_view, name='admin_panel'),
     path('admin-panel/upload-note/', views.admin_upload_note, name='admin_upload_note'),
     path('admin-panel/upload-notice/', views.admin_upload_notice, name='admin_upload_notice'),
+    path('admin-panel/upload-attendance/', views.admin_upload_attendance, name='admin_upload_attendance'),
+    path('admin-panel/analytics/', views.analytics_view, name='analytics'),
+    path('admin-panel/analytics/api/', views.analytics_api, name='analytics_api'),
+    path('admin-panel/export/<str:kind>/', views.export_logs, name='export_logs'),
+    path('metrics', views.metrics_view, name='metrics'),
 ]
 
@@ -5,12 +5,28 @@ Dashboard, Notes, Study Planner, Placement Guidance, Admin Panel
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse, FileResponse
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.http import JsonResponse, FileResponse, HttpResponse, StreamingHttpResponse, Http404
 from django.utils import timezone
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 from datetime import datetime, timedelta
+import io
 import json
+import queue
+import time
 
-from .models import Note, StudyPlan, Notice, PlacementRoadmap, Subject
+from .models import (
+    Note, NoteDownload, StudyPlan, Notice, PlacementRoadmap, Subject, SiteStats, UsageRollup,
+)
+from . import analytics, events, exports, metrics, recommendations, roadmaps, tasks
+from .events import notice_feed_item
+from .feeds import NOTICES_FEED_CACHE_KEY, filter_notes, stream_response, stream_start
+from .filecache import hot_files
+from .attendance import student_attendance, import_roll_call, current_term
 from users.models import StudentProfile, User
 from ai_helper.models import AIQuery
 
@@ -31,23 +47,27 @@ def dashboard_view(request):
     # Get upcoming events (notices)
     upcoming_notices = Notice.objects.all()[:5]
     
-    # Get recent study plans
-    recent_plans = StudyPlan.objects.filter(user=user)[:3]
+    # Get recent study plans (evaluated once, the template iterates them too)
+    recent_plans = list(StudyPlan.objects.filter(user=user)[:3])
     
     # Calculate days until next exam (if study plan exists)
     next_exam = None
     days_until_exam = None
-    if recent_plans.exists():
-        next_plan = recent_plans.first()
+    if recent_plans:
+        next_plan = recent_plans[0]
         if next_plan.exam_date:
             days_until_exam = (next_plan.exam_date - timezone.now().date()).days
             next_exam = next_plan
     
+    # Notes downloaded by students with similar downloads (one indexed query)
+    suggested_notes = recommendations.for_user(user, limit=3)
+    
     context = {
         'user': user,
         'profile': profile,
         'upcoming_notices': upcoming_notices,
         'recent_plans': recent_plans,
+        'suggested_notes': suggested_notes,
         'next_exam': next_exam,
         'days_until_exam': days_until_exam,
     }
@@ -68,12 +88,24 @@ def attendance_view(request):
     except:
         profile = None
     
-    # Calculate attendance statistics
+    # Real per-subject attendance from the bitmaps, if any were recorded
+    overall, subject_attendance = student_attendance(profile) if profile else (None, [])
+    
+    if overall:
+        context = {
+            'user': user,
+            'profile': profile,
+            'subject_attendance': subject_attendance,
+            **overall,
+        }
+        return render(request, 'core/attendance.html', context)
+    
+    # No records for this term: estimate from the stored percentage
     attendance_percentage = profile.attendance_percentage if profile else 85.0
     is_eligible = attendance_percentage >= 75
     
     # Calculate how many classes can be missed
-    # Assuming 100 total classes (can be made dynamic)
+    # Assuming 100 total classes when no session calendar exists
     total_classes = 100
     
     if profile:
@@ -117,20 +149,13 @@ def notes_view(request):
     """
     Notes and Resources Hub
     """
-    notes = Note.objects.all()
+    notes, semester_filter, subject_filter = filter_notes(request)
     subjects = Subject.objects.all()
-    semester_filter = request.GET.get('semester')
-    subject_filter = request.GET.get('subject')
-    
-    if semester_filter:
-        notes = notes.filter(subject__semester=semester_filter)
-    
-    if subject_filter:
-        notes = notes.filter(subject_id=subject_filter)
     
     context = {
         'notes': notes,
         'subjects': subjects,
+        'also_downloaded': recommendations.for_user(request.user, limit=4, recent=1),
         'selected_semester': semester_filter,
         'selected_subject': subject_filter,
     }
@@ -138,16 +163,66 @@ def notes_view(request):
     return render(request, 'core/notes.html', context)
 
 
+@login_required
+def notices_feed(request):
+    """
+    Latest notices as JSON, cached for NOTICES_FEED_CACHE_SECONDS
+    """
+    feed = cache.get(NOTICES_FEED_CACHE_KEY)
+    if feed is None:
+        feed = [notice_feed_item(notice) for notice in Notice.objects.all()[:settings.NOTICES_FEED_SIZE]]
+        cache.set(NOTICES_FEED_CACHE_KEY, feed, settings.NOTICES_FEED_CACHE_SECONDS)
+    
+    return JsonResponse({'notices': feed})
+
+
+@login_required
+def notice_stream(request):
+    """
+    Server-sent events with new notices (sync fallback, one thread per listener)
+    The stream ends after NOTICE_STREAM_MAX_SECONDS and the browser reconnects.
+    """
+    lines, since = stream_start(request)
+    
+    def stream():
+        inbox = queue.SimpleQueue()
+        token = events.hub.subscribe(inbox.put, since)
+        try:
+            yield from lines
+            deadline = time.monotonic() + settings.NOTICE_STREAM_MAX_SECONDS
+            while time.monotonic() < deadline:
+                try:
+                    batch = inbox.get(timeout=settings.NOTICE_STREAM_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+                for event in batch:
+                    yield events.format_event(event)
+        finally:
+            events.hub.unsubscribe(token)
+    
+    return stream_response(stream())
+
+
 @login_required
 def download_note(request, note_id):
     """
     Download note file
     """
-    note = get_object_or_404(Note, id=note_id)
-    note.download_count += 1
-    note.save()
-    
-    return FileResponse(open(note.file.path, 'rb'), as_attachment=True, filename=note.file.name)
+    note = get_object_or_404(Note.objects.select_related('subject'), id=note_id)
+    with transaction.atomic():
+        # Bumped in SQL: the note may have been read from the replica
+        Note.objects.filter(pk=note.pk).update(download_count=F('download_count') + 1)
+        first = not NoteDownload.objects.filter(note=note, user=request.user).exists()
+        NoteDownload.objects.create(note=note, user=request.user)  # rollups via signals
+        # Only a student's first download changes the recommendations, the slow part
+        if first:
+            tasks.update_recommendations.delay(request.user.id, note.id)
+    
+    # Hot files come from this worker's memory, large ones straight from disk
+    data = hot_files.get(note.file.path)
+    content = io.BytesIO(data) if data is not None else open(note.file.path, 'rb')
+    return FileResponse(content, as_attachment=True, filename=note.file.name)
 
 
 @login_required
@@ -168,19 +243,13 @@ def study_planner_view(request):
                 messages.error(request, "Exam date must be in the future!")
                 return redirect('core:study_planner')
             
-            # Generate study plan
-            plan_data = generate_study_plan(course_name, days_until_exam, hours_per_day)
-            
-            # Save study plan
-            study_plan = StudyPlan.objects.create(
-                user=request.user,
-                course_name=course_name,
-                exam_date=exam_date,
-                hours_per_day=hours_per_day,
-                plan_data=plan_data
-            )
+            # Generate and save the study plan in a background job
+            queued = tasks.create_study_plan.delay(request.user.id, course_name, exam_date.isoformat(), hours_per_day)
             
-            messages.success(request, "Study plan created successfully!")
+            if queued:
+                messages.success(request, "Your study plan is being generated and will appear here shortly!")
+            else:
+                messages.success(request, "Study plan created successfully!")
             return redirect('core:study_planner')
         except Exception as e:
             messages.error(request, f"Error creating study plan: {str(e)}")
@@ -195,82 +264,36 @@ def study_planner_view(request):
     return render(request, 'core/study_planner.html', context)
 
 
-def generate_study_plan(course_name, days, hours_per_day):
-    """
-    Generate day-wise study plan
-    """
-    plan = []
-    total_hours = days * hours_per_day
-    
-    # Divide into phases
-    phase1_days = days // 3  # Learning phase
-    phase2_days = days // 3  # Practice phase
-    phase3_days = days - phase1_days - phase2_days  # Revision phase
-    
-    current_date = timezone.now().date()
-    
-    # Phase 1: Learning
-    for i in range(phase1_days):
-        plan.append({
-            'day': i + 1,
-            'date': str(current_date + timedelta(days=i)),
-            'phase': 'Learning',
-            'tasks': [
-                f"Study {course_name} fundamentals",
-                "Read textbook chapters",
-                "Watch video lectures",
-                "Take notes on key concepts"
-            ],
-            'hours': hours_per_day
-        })
-    
-    # Phase 2: Practice
-    for i in range(phase2_days):
-        plan.append({
-            'day': phase1_days + i + 1,
-            'date': str(current_date + timedelta(days=phase1_days + i)),
-            'phase': 'Practice',
-            'tasks': [
-                "Solve practice problems",
-                "Complete assignments",
-                "Take mock tests",
-                "Review previous topics"
-            ],
-            'hours': hours_per_day
-        })
-    
-    # Phase 3: Revision
-    for i in range(phase3_days):
-        plan.append({
-            'day': phase1_days + phase2_days + i + 1,
-            'date': str(current_date + timedelta(days=phase1_days + phase2_days + i)),
-            'phase': 'Revision',
-            'tasks': [
-                "Quick revision of all topics",
-                "Review notes and formulas",
-                "Solve previous year papers",
-                "Final preparation"
-            ],
-            'hours': hours_per_day
-        })
-    
-    return plan
-
-
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=roadmaps.page_etag)
 def placement_guidance_view(request):
     """
     Placement & Skill Guidance with roadmaps
     """
-    roadmaps = PlacementRoadmap.objects.all()
+    # Only evaluated when the cached fragment is missing; see core.roadmaps
+    roadmap_list = PlacementRoadmap.objects.using('default')
     
     context = {
-        'roadmaps': roadmaps,
+        'roadmaps': roadmap_list,
+        'roadmap_version': roadmaps.version(),
+        'roadmap_cache_alias': settings.ROADMAP_CACHE_ALIAS,
+        'roadmap_cache_seconds': settings.ROADMAP_CACHE_SECONDS,
     }
     
     return render(request, 'core/placement_guidance.html', context)
 
 
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=roadmaps.api_etag)
+def roadmaps_api(request):
+    """
+    Placement roadmaps as JSON (cached per roadmap version)
+    """
+    return HttpResponse(roadmaps.roadmaps_json(), content_type='application/json')
+
+
 @login_required
 def admin_panel_view(request):
     """
@@ -280,20 +303,17 @@ def admin_panel_view(request):
         messages.error(request, "Access denied! Admin only.")
         return redirect('core:dashboard')
     
-    # Get statistics
-    total_students = User.objects.filter(role='student').count()
-    total_notes = Note.objects.count()
-    total_notices = Notice.objects.count()
-    total_queries = AIQuery.objects.count()
+    # Get statistics (materialized counters, one row lookup)
+    stats = SiteStats.load()
     
     # Get recent AI queries
-    recent_queries = AIQuery.objects.all()[:10]
+    recent_queries = AIQuery.objects.select_related('user')[:10]
     
     context = {
-        'total_students': total_students,
-        'total_notes': total_notes,
-        'total_notices': total_notices,
-        'total_queries': total_queries,
+        'total_students': stats.total_students,
+        'total_notes': stats.total_notes,
+        'total_notices': stats.total_notices,
+        'total_queries': stats.total_queries,
         'recent_queries': recent_queries,
     }
     
@@ -317,13 +337,15 @@ def admin_upload_note(request):
         
         try:
             subject = Subject.objects.get(id=subject_id)
-            Note.objects.create(
-                title=title,
-                subject=subject,
-                file=file,
-                description=description,
-                uploaded_by=request.user
-            )
+            # One transaction for the row and its SiteStats counter
+            with transaction.atomic():
+                Note.objects.create(
+                    title=title,
+                    subject=subject,
+                    file=file,
+                    description=description,
+                    uploaded_by=request.user
+                )
             messages.success(request, "Note uploaded successfully!")
         except Exception as e:
             messages.error(request, f"Error: {str(e)}")
@@ -349,15 +371,172 @@ def admin_upload_notice(request):
         is_important = request.POST.get('is_important') == 'on'
         
         try:
-            Notice.objects.create(
-                title=title,
-                content=content,
-                file=file,
-                is_important=is_important,
-                posted_by=request.user
-            )
+            with transaction.atomic():
+                Notice.objects.create(
+                    title=title,
+                    content=content,
+                    file=file,
+                    is_important=is_important,
+                    posted_by=request.user
+                )
             messages.success(request, "Notice posted successfully!")
         except Exception as e:
             messages.error(request, f"Error: {str(e)}")
     
     return render(request, 'core/admin_upload_notice.html')
+
+
+@login_required
+def analytics_view(request):
+    """
+    Admin usage analytics dashboard (charts are drawn from analytics_api)
+    """
+    if not request.user.is_admin():
+        messages.error(request, "Access denied! Admin only.")
+        return redirect('core:dashboard')
+    
+    context = {
+        'metrics': UsageRollup.METRIC_CHOICES,
+        'dimensions': UsageRollup.DIMENSION_CHOICES,
+    }
+    
+    return render(request, 'core/analytics.html', context)
+
+
+@login_required
+def analytics_api(request):
+    """
+    JSON time series read from the usage rollups
+    GET params: metric, granularity (hour|day), dimension, days, limit
+    """
+    if not request.user.is_admin():
+        return JsonResponse({'success': False, 'error': 'Access denied'}, status=403)
+    
+    metric = request.GET.get('metric', 'ai_query')
+    granularity = request.GET.get('granularity', 'hour')
+    dimension = request.GET.get('dimension', 'total')
+    
+    if metric not in dict(UsageRollup.METRIC_CHOICES):
+        return JsonResponse({'success': False, 'error': 'Unknown metric'}, status=400)
+    if dimension not in dict(UsageRollup.DIMENSION_CHOICES):
+        return JsonResponse({'success': False, 'error': 'Unknown dimension'}, status=400)
+    if granularity not in ('hour', 'day'):
+        return JsonResponse({'success': False, 'error': 'Unknown granularity'}, status=400)
+    
+    try:
+        days = max(1, min(int(request.GET.get('days', 2 if granularity == 'hour' else 30)), 366))
+        limit = max(1, min(int(request.GET.get('limit', 5)), 50))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'days and limit must be integers'}, status=400)
+    
+    end = timezone.now()
+    if granularity == 'hour':
+        end = analytics.hour_bucket(end) + timedelta(hours=1)
+    else:
+        end = end + timedelta(days=1)
+    start = end - timedelta(days=days)
+    
+    keys = None
+    top = []
+    if dimension != 'total':
+        top = analytics.top_keys(metric, dimension, start, end, limit=limit)
+        keys = [row['key'] for row in top]
+    
+    buckets, data = analytics.series(metric, start, end, granularity, dimension, keys)
+    labels = analytics.key_labels(dimension, list(data) + (keys or []))
+    
+    return JsonResponse({
+        'success': True,
+        'metric': metric,
+        'granularity': granularity,
+        'dimension': dimension,
+        'buckets': [bucket.isoformat() for bucket in buckets],
+        'series': [
+            {'key': key, 'label': labels.get(key, key), 'counts': counts}
+            for key, counts in data.items()
+        ],
+        'top': [
+            {'key': row['key'], 'label': labels.get(row['key'], row['key']), 'count': row['total']}
+            for row in top
+        ],
+    })
+
+
+@login_required
+def export_logs(request, kind):
+    """
+    Stream the AI query log or note download events as CSV / JSONL
+    GET params: format (csv|jsonl), start, end (YYYY-MM-DD), user (username)
+    """
+    if not request.user.is_admin():
+        messages.error(request, "Access denied! Admin only.")
+        return redirect('core:dashboard')
+    
+    if kind not in exports.EXPORTS:
+        raise Http404("Unknown export")
+    
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in exports.FORMATS:
+        return JsonResponse({'success': False, 'error': 'format must be csv or jsonl'}, status=400)
+    
+    try:
+        start = exports.parse_date(request.GET.get('start'))
+        end = exports.parse_date(request.GET.get('end'))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Dates must be YYYY-MM-DD'}, status=400)
+    username = request.GET.get('user') or None
+    
+    response = StreamingHttpResponse(
+        exports.stream_export(kind, fmt, start, end, username),
+        content_type=exports.FORMATS[fmt],
+    )
+    filename = f"{kind}_{timezone.now():%Y%m%d_%H%M%S}.{fmt}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@login_required
+def admin_upload_attendance(request):
+    """
+    Admin upload of a roll-call CSV into the attendance bitmaps
+    """
+    if not request.user.is_admin():
+        messages.error(request, "Access denied!")
+        return redirect('core:dashboard')
+    
+    if request.method == 'POST':
+        file = request.FILES.get('file')
+        subject_id = request.POST.get('subject')
+        session_date = request.POST.get('date') or None
+        term = request.POST.get('term', '').strip() or None
+        
+        try:
+            subject = Subject.objects.get(id=subject_id) if subject_id else None
+            stream = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+            report = import_roll_call(stream, term=term, subject=subject, day=session_date)
+            
+            for error in report.errors:
+                messages.warning(request, error)
+            messages.success(
+                request,
+                f"Imported {report.marks} attendance marks ({report.skipped} rows skipped)."
+            )
+        except Exception as e:
+            messages.error(request, f"Error: {str(e)}")
+    
+    subjects = Subject.objects.all()
+    context = {'subjects': subjects, 'current_term': current_term()}
+    return render(request, 'core/admin_upload_attendance.html', context)
+
+
+def metrics_view(request):
+    """
+    Per-view request metrics in Prometheus text format (admin only)
+    """
+    if not request.user.is_authenticated or not request.user.is_admin():
+        return HttpResponse("Access denied", status=403, content_type='text/plain')
+    
+    return HttpResponse(
+        metrics.render_prometheus(metrics.collect()) + hot_files.render_prometheus(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
@@ -11,6 +11,9 @@ import os
 
 from django.core.asgi import get_asgi_application
 
+from .staticfiles import StaticFilesASGI
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'randomproject.settings')
 
-application = get_asgi_application()
+# Hashed, precompressed static files are answered from memory before Django
+application = StaticFilesASGI(get_asgi_application())
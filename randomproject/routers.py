@@ -0,0 +1,192 @@
+"""
+Read replica routing
+Reads of READ_REPLICA_MODELS made while serving a GET or HEAD request go to
+the 'replica' alias, a copy of db.sqlite3 refreshed with the SQLite online
+backup API (`manage.py refresh_replica`). Everything else, and every write,
+goes to 'default': other methods and READ_REPLICA_PRIMARY_PATHS (the admin)
+read and save what they read, and Django sends reads made to be saved
+(select_for_update(), get_or_create(), update_or_create()) through
+db_for_write. Once a request writes, the rest of that request and the same
+session for READ_REPLICA_STICKY_SECONDS read from 'default' again, so users
+always see their own changes. The replica is only used while its applied
+migrations match the primary's.
+"""
+import logging
+import os
+import sqlite3
+import time
+from contextlib import closing
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+
+REPLICA = 'replica'
+CACHE = 'cache'
+SESSION_KEY = '_replica_pinned_until'
+READ_METHODS = ('GET', 'HEAD')
+
+logger = logging.getLogger(__name__)
+
+# Per-request routing state: {'pinned': bool, 'wrote': bool}, None outside requests
+_request_state = ContextVar('replica_request_state', default=None)
+
+_replica_status = {'ready': False, 'checked_at': 0.0}
+
+
+def applied_migrations(path):
+    """{(app, name)} recorded in a database file, None if it has no migrations table"""
+    with closing(sqlite3.connect(f'{Path(path).as_uri()}?mode=ro', uri=True)) as conn:
+        try:
+            return set(conn.execute('SELECT app, name FROM django_migrations'))
+        except sqlite3.OperationalError:
+            return None
+
+
+def replica_ready():
+    """
+    Whether the replica exists and has the primary's migrations applied
+    Re-checked every 30 seconds, so a replica made before a migrate is left
+    alone until `refresh_replica` copies the migrated primary.
+    """
+    now = time.monotonic()
+    if now - _replica_status['checked_at'] > 30:
+        path = settings.DATABASES[REPLICA]['NAME']
+        ready = os.path.exists(path)
+        if ready:
+            ready = applied_migrations(path) == applied_migrations(settings.DATABASES['default']['NAME'])
+            if not ready:
+                logger.warning('Replica migrations differ from the primary, reading from default')
+        _replica_status['ready'] = ready
+        _replica_status['checked_at'] = now
+    return _replica_status['ready']
+
+
+def refresh_replica():
+    """
+    Copy the primary into the replica file with the online backup API
+    Readers of the replica keep their snapshot until the copy commits.
+    Returns the number of seconds the copy took.
+    """
+    started = time.perf_counter()
+    with closing(sqlite3.connect(settings.DATABASES['default']['NAME'])) as source, \
+            closing(sqlite3.connect(settings.DATABASES[REPLICA]['NAME'])) as target:
+        source.backup(target)
+    _replica_status['checked_at'] = 0.0
+    return time.perf_counter() - started
+
+
+class CacheRouter:
+    """
+    Keep DatabaseCache tables in the 'cache' database and nothing else there
+    Listed before ReplicaRouter, so cache writes don't pin sessions to default.
+    """
+
+    def _is_cache(self, model):
+        return model._meta.app_label == 'django_cache'
+
+    def db_for_read(self, model, **hints):
+        return CACHE if self._is_cache(model) else None
+
+    def db_for_write(self, model, **hints):
+        return CACHE if self._is_cache(model) else None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == CACHE or app_label == 'django_cache':
+            return db == CACHE and app_label == 'django_cache'
+        return None
+
+
+class ReplicaRouter:
+    """
+    Send request reads of selected models to the replica and writes to default
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        if (
+            state is None or state['pinned'] or state['wrote']
+            or not settings.READ_REPLICA_ENABLED
+            or model._meta.label not in settings.READ_REPLICA_MODELS
+            or not replica_ready()
+        ):
+            return 'default'
+        return REPLICA
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state['wrote'] = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as default
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Set up per-request routing state and pin the session to the primary
+    after a write; must come after SessionMiddleware
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.READ_REPLICA_ENABLED:
+            return self.get_response(request)
+        
+        session = getattr(request, 'session', None)
+        state = {'pinned': _reads_primary(request) or _pinned(session), 'wrote': False}
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        
+        _pin_after_write(state, session)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.READ_REPLICA_ENABLED:
+            return await self.get_response(request)
+        
+        # Reading the session may hit the database, keep it off the event loop.
+        # The state dict is shared with sync_to_async threads via the context.
+        session = getattr(request, 'session', None)
+        pinned = _reads_primary(request) or await sync_to_async(_pinned)(session)
+        state = {'pinned': pinned, 'wrote': False}
+        token = _request_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        
+        _pin_after_write(state, session)
+        return response
+
+
+def _reads_primary(request):
+    """Requests that may save what they read, and admin pages"""
+    return request.method not in READ_METHODS or request.path.startswith(tuple(settings.READ_REPLICA_PRIMARY_PATHS))
+
+
+def _pinned(session):
+    return session is not None and session.get(SESSION_KEY, 0) > time.time()
+
+
+def _pin_after_write(state, session):
+    # Only sets a key on the loaded session; SessionMiddleware saves it
+    if state['wrote'] and session is not None:
+        session[SESSION_KEY] = time.time() + settings.READ_REPLICA_STICKY_SECONDS
@@ -44,11 +44,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'randomproject.routers.ReplicaStickinessMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -76,14 +79,112 @@ WSGI_APPLICATION = 'randomproject.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
+# randomproject.sqlite applies WAL and the production pragmas on connect and
+# starts writing transactions with BEGIN IMMEDIATE (see randomproject/sqlite/base.py).
+# Connections are kept for CONN_MAX_AGE seconds and checked before reuse.
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'randomproject.sqlite',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': 20,
+            # Queue writers on a lock file instead of SQLite's busy polling
+            'writer_lock': True,
+        },
+        # Migrating default creates the cache table, so the cache test
+        # database has to exist first (randomproject.test_runner always
+        # sets it up)
+        'TEST': {
+            'DEPENDENCIES': ['cache'],
+        },
+    },
+    # Read-only copy of default, see randomproject/routers.py
+    'replica': {
+        'ENGINE': 'randomproject.sqlite',
+        'NAME': BASE_DIR / 'db.replica.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': 20,
+        },
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
+    # Table of the 'shared' cache, created by `manage.py migrate`
+    'cache': {
+        'ENGINE': 'randomproject.sqlite',
+        'NAME': BASE_DIR / 'cache.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': 20,
+        },
+        'TEST': {
+            'DEPENDENCIES': [],
+        },
+    },
 }
 
+DATABASE_ROUTERS = ['randomproject.routers.CacheRouter', 'randomproject.routers.ReplicaRouter']
+
+TEST_RUNNER = 'randomproject.test_runner.TestRunner'
+
+# GET/HEAD reads of these models use the replica once `manage.py refresh_replica`
+# has created it (run it from cron/with --interval, and again after migrate;
+# until then a replica with other migrations is ignored). Other methods and
+# READ_REPLICA_PRIMARY_PATHS always read from default. After a write the
+# session reads from default for READ_REPLICA_STICKY_SECONDS, which must
+# exceed the refresh interval.
+READ_REPLICA_ENABLED = True
+READ_REPLICA_MODELS = [
+    'core.Note',
+    'core.Subject',
+    'core.Notice',
+    'core.PlacementRoadmap',
+    'core.StudyPlan',
+    'core.NoteSimilarity',
+]
+READ_REPLICA_STICKY_SECONDS = 120
+READ_REPLICA_PRIMARY_PATHS = ['/admin/']
+
+
+# Caches
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# 'shared' is a database cache visible to every worker on this host. Its table
+# lives in cache.sqlite3, not db.sqlite3, so session and user lookups don't
+# compete with DB writers. A write is a COUNT(*) over the key index and an
+# upsert, where the file cache listed its whole directory; expired rows are
+# dropped when read or, past MAX_ENTRIES, culled on write.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'portal_shared_cache',
+        'TIMEOUT': 60 * 60 * 24 * 14,
+        'OPTIONS': {
+            'MAX_ENTRIES': 200000,
+        },
+    },
+}
+
+
+# Sessions
+# https://docs.djangoproject.com/en/4.2/topics/http/sessions/#configuring-the-session-engine
+# cached_db reads sessions from the shared cache and only falls back to the
+# django_session table on a miss. Alternatives: 'db' (stock), 'cache' (no DB
+# at all, sessions lost when the cache is cleared) or 'signed_cookies'.
+# Expired rows are removed by `manage.py cleanup_sessions`.
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'shared'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -123,13 +224,108 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# collectstatic writes content-hashed names plus '.gz' variants; wsgi.py and
+# asgi.py serve STATIC_ROOT from memory (randomproject/staticfiles.py).
+# Files larger than this are left to the web server / Django.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'randomproject.staticfiles.CompressedManifestStaticFilesStorage'},
+}
+STATIC_INDEX_MAX_FILE_BYTES = 1024 * 1024
+
 # Media files (Uploaded files)
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# AI query retention: older rows are moved to compressed monthly segments
+# by `manage.py archive_ai_queries`
+AIQUERY_RETENTION_DAYS = 365
+AIQUERY_ARCHIVE_DIR = BASE_DIR / 'archive' / 'ai_queries'
+
+# Attendance: term label used for bitmaps (None derives '<year>-odd/even')
+# and the eligibility threshold in percent
+ATTENDANCE_TERM = None
+ATTENDANCE_THRESHOLD = 75
+
+# Per-view request metrics served at /metrics (admins only). With several
+# worker processes set METRICS_SHARED_DIR (e.g. BASE_DIR / 'metrics') so each
+# worker flushes its numbers there and /metrics reports the sum.
+METRICS_ENABLED = True
+METRICS_SHARED_DIR = None
+
+# Request profiling (off by default): cProfile a PROFILING_SAMPLE_RATE share of
+# requests into PROFILING_DIR. Setting PROFILING_SLOW_SECONDS profiles every
+# request and also keeps the slower ones, so only use it while investigating.
+# Profiles never overlap: concurrent requests in a worker go unprofiled.
+PROFILING_ENABLED = False
+PROFILING_SAMPLE_RATE = 0.01
+PROFILING_SLOW_SECONDS = None
+PROFILING_DIR = BASE_DIR / 'profiles'
+PROFILING_KEEP = 200
+
+# Serve the AI query API, notes listing and notices feed with async views
+# (async ORM, cache.aget/aset). Only worth it under ASGI (randomproject.asgi);
+# under WSGI every async view spins up its own event loop. Under ASGI each
+# request runs its queries in a new thread, so also set CONN_MAX_AGE = 0.
+# Compare both stacks with `manage.py bench_async_views`.
+ASYNC_VIEWS = False
+
+# Notices feed: number of notices and seconds they stay cached (invalidated
+# by signals in this process, so other workers may lag by up to the timeout)
+NOTICES_FEED_SIZE = 20
+NOTICES_FEED_CACHE_SECONDS = 60
+
+# Notice stream (server-sent events, async with ASYNC_VIEWS): each worker polls
+# for new notices every NOTICE_STREAM_POLL_SECONDS while it has listeners.
+# Streams end after NOTICE_STREAM_MAX_SECONDS and browsers reconnect after
+# NOTICE_STREAM_RETRY_MS, resuming from the last notice they received. The
+# sync stream holds a thread per listener, so prefer ASGI with ASYNC_VIEWS.
+NOTICE_STREAM_POLL_SECONDS = 2
+NOTICE_STREAM_HEARTBEAT_SECONDS = 15
+NOTICE_STREAM_MAX_SECONDS = 300
+NOTICE_STREAM_RETRY_MS = 5000
+
+# Placement roadmaps: rendered fragment and JSON API cached per roadmap
+# version (bumped whenever a roadmap is saved or deleted) in a cache shared by
+# all workers; entries of old versions expire after ROADMAP_CACHE_SECONDS.
+ROADMAP_CACHE_ALIAS = 'shared'
+ROADMAP_CACHE_SECONDS = 60 * 60 * 24
+
+# Hot note files (core/filecache.py): each worker keeps recently downloaded
+# notes up to HOT_FILE_MAX_FILE_BYTES in memory, HOT_FILE_CACHE_BYTES in total
+# (0 disables). Hit rates are reported on /metrics.
+HOT_FILE_CACHE_BYTES = 64 * 1024 * 1024
+HOT_FILE_MAX_FILE_BYTES = 4 * 1024 * 1024
+
+# Note recommendations (core/recommendations.py): neighbours kept per note and
+# the students two notes must share before they count as related. Rebuild
+# with `manage.py build_recommendations` (e.g. nightly); downloads update
+# them in between.
+RECOMMENDATIONS_TOP_K = 10
+RECOMMENDATIONS_MIN_CO_DOWNLOADS = 2
+
+# Background jobs (core/jobs.py), run by `manage.py run_jobs`. A worker holds
+# a claimed job for JOB_LEASE_SECONDS, after which another worker may run it
+# again; failures are retried after JOB_RETRY_BACKOFF_SECONDS, doubling each
+# attempt. JOBS_ALWAYS_EAGER runs jobs inside the request instead (no worker).
+JOBS_ALWAYS_EAGER = DEBUG
+JOB_LEASE_SECONDS = 300
+JOB_MAX_ATTEMPTS = 3
+JOB_RETRY_BACKOFF_SECONDS = 30
+JOB_POLL_SECONDS = 1
+JOB_KEEP_DAYS = 7
+
 # Custom User Model
 AUTH_USER_MODEL = 'users.User'
 
+# Load request.user together with its student profile in one query
+AUTHENTICATION_BACKENDS = ['users.backends.ProfileModelBackend']
+
+# Seconds to cache the (user, profile) pair between requests (0 disables).
+# The alias must be shared by all workers, invalidation is signal based.
+USER_PROFILE_CACHE_TIMEOUT = 300
+USER_PROFILE_CACHE_ALIAS = 'shared'
+
 # Login URLs
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'core:dashboard'
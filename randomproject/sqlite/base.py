@@ -0,0 +1,226 @@
+"""
+SQLite backend tuned for several concurrent workers
+Applies WAL and the other production pragmas on every new connection and
+can serialize writers through a lock file, so concurrent writes wait their
+turn instead of failing with "database is locked".
+
+atomic() does not BEGIN right away: the transaction starts at its first
+statement. If that statement writes, it takes the writer lock and runs BEGIN
+IMMEDIATE; if it reads, a plain BEGIN, so read-only blocks never queue
+behind writers. select_for_update() counts as a write (the FOR UPDATE clause
+is dropped before SQLite sees it), so read-modify-write blocks should start
+with one: a transaction that begins with plain reads only takes the lock at
+its first write, and SQLite refuses that write with "database is locked" if
+another writer committed in between.
+
+Extra OPTIONS (removed before they reach sqlite3.connect):
+    'pragmas':     overrides for PRAGMAS, e.g. {'cache_size': -16000}
+    'writer_lock': True to hold an exclusive lock file for each writing
+                   transaction, waiting at most OPTIONS['timeout'] seconds
+"""
+import threading
+import time
+
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+from django.db.backends.sqlite3.features import DatabaseFeatures as SQLiteDatabaseFeatures
+from django.db.utils import OperationalError
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to a per-process lock
+    fcntl = None
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,        # ms, matches the 20s connect timeout
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64000,         # negative = KiB, i.e. 64 MB page cache
+    'temp_store': 'MEMORY',
+}
+
+# Writer lock wait statistics for this process (read by benchmarks)
+WRITER_LOCK_STATS = {'acquired': 0, 'wait_seconds': 0.0, 'max_wait_seconds': 0.0}
+
+_thread_lock = threading.Lock()
+
+READ_STATEMENTS = ('SELECT', 'EXPLAIN', 'PRAGMA')
+FOR_UPDATE = ' FOR UPDATE'
+
+
+class WriterLock:
+    """Exclusive lock on '<database>-writer.lock', one per connection"""
+
+    def __init__(self, path, timeout=20):
+        self.path = path
+        self.timeout = timeout
+        self.file = None
+        self.held = False
+
+    def acquire(self):
+        """Wait up to `timeout` seconds for the lock, then raise OperationalError"""
+        started = time.perf_counter()
+        if fcntl is None:
+            if not _thread_lock.acquire(timeout=self.timeout):
+                raise OperationalError('database is locked (timed out waiting for the writer lock)')
+        else:
+            if self.file is None:
+                self.file = open(self.path, 'a+b')
+            self._poll(started)
+        self.held = True
+        
+        waited = time.perf_counter() - started
+        WRITER_LOCK_STATS['acquired'] += 1
+        WRITER_LOCK_STATS['wait_seconds'] += waited
+        WRITER_LOCK_STATS['max_wait_seconds'] = max(WRITER_LOCK_STATS['max_wait_seconds'], waited)
+
+    def _poll(self, started):
+        delay = 0.001
+        while True:
+            try:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                remaining = self.timeout - (time.perf_counter() - started)
+                if remaining <= 0:
+                    raise OperationalError('database is locked (timed out waiting for the writer lock)')
+                time.sleep(min(delay, remaining))
+                delay = min(delay * 2, 0.05)
+
+    def release(self):
+        if not self.held:
+            return
+        self.held = False
+        if fcntl is None:
+            _thread_lock.release()
+        else:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+
+    def close(self):
+        self.release()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class DatabaseFeatures(SQLiteDatabaseFeatures):
+    # Only as a write marker, see DatabaseWrapper._begin_on_first_statement
+    has_select_for_update = True
+
+
+class DatabaseWrapper(SQLiteDatabaseWrapper):
+    features_class = DatabaseFeatures
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        kwargs.pop('pragmas', None)
+        kwargs.pop('writer_lock', None)
+        kwargs.setdefault('timeout', 20)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        pragmas = {**PRAGMAS, **self.settings_dict['OPTIONS'].get('pragmas', {})}
+        if self.is_in_memory_db():
+            pragmas.pop('journal_mode', None)
+        for name, value in pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def init_connection_state(self):
+        super().init_connection_state()
+        options = self.settings_dict['OPTIONS']
+        use_lock = options.get('writer_lock') and not self.is_in_memory_db()
+        self.writer_lock = (
+            WriterLock(f"{self.settings_dict['NAME']}-writer.lock", options.get('timeout', 20)) if use_lock else None
+        )
+        self._begin_pending = False
+        self._pending_savepoints = []
+        self._writing = False
+        if self._begin_on_first_statement not in self.execute_wrappers:
+            self.execute_wrappers.insert(0, self._begin_on_first_statement)
+
+    def _start_transaction_under_autocommit(self):
+        """Defer BEGIN to the first statement, which decides whether it writes"""
+        self._begin_pending = True
+        self._pending_savepoints = []
+        self._writing = False
+
+    def _begin_on_first_statement(self, execute, sql, params, many, context):
+        """
+        Execute wrapper: BEGIN (IMMEDIATE under the writer lock for writes)
+        before the transaction's first statement, and take the lock before
+        the first write of a transaction that began with reads
+        """
+        statement = sql.lstrip()[:20].upper()
+        writes = not statement.startswith(READ_STATEMENTS)
+        if statement.startswith('SELECT') and sql.rstrip().endswith(FOR_UPDATE):
+            sql = sql.rstrip()[:-len(FOR_UPDATE)]
+            writes = True
+        if self._begin_pending:
+            # Savepoints of nested atomic() blocks wait for the BEGIN
+            if statement.startswith('SAVEPOINT'):
+                self._pending_savepoints.append(sql)
+                return None
+            if statement.startswith(('RELEASE', 'ROLLBACK TO')):
+                name = sql.split()[-1]
+                names = [pending.split()[-1] for pending in self._pending_savepoints]
+                if statement.startswith('RELEASE') and name in names:
+                    del self._pending_savepoints[names.index(name):]
+                return None
+            self._begin(writes)
+        elif writes and not self._writing and not self.get_autocommit():
+            self._acquire_writer_lock()
+            self._writing = True
+        return execute(sql, params, many, context)
+
+    def _begin(self, writes):
+        self._begin_pending = False
+        if writes:
+            self._acquire_writer_lock()
+        try:
+            self.connection.execute('BEGIN IMMEDIATE' if writes else 'BEGIN')
+            for savepoint in self._pending_savepoints:
+                self.connection.execute(savepoint)
+        except Exception:
+            self._release_writer_lock()
+            raise
+        finally:
+            self._pending_savepoints = []
+        self._writing = writes
+
+    def _acquire_writer_lock(self):
+        if self.writer_lock:
+            self.writer_lock.acquire()
+
+    def _release_writer_lock(self):
+        self._begin_pending = False
+        self._writing = False
+        if getattr(self, 'writer_lock', None):
+            self.writer_lock.release()
+
+    def _commit(self):
+        try:
+            return super()._commit()
+        finally:
+            self._release_writer_lock()
+
+    def _rollback(self):
+        try:
+            return super()._rollback()
+        finally:
+            self._release_writer_lock()
+
+    def _close(self):
+        try:
+            return super()._close()
+        finally:
+            if getattr(self, 'writer_lock', None):
+                self.writer_lock.close()
+
+    def is_usable(self):
+        try:
+            self.connection.execute('SELECT 1')
+        except self.Database.Error:
+            return False
+        return True
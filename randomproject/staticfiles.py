@@ -0,0 +1,174 @@
+"""
+Static files: hashed, precompressed and served from memory
+CompressedManifestStaticFilesStorage names files by content hash at
+collectstatic and writes a '.gz' next to every compressible file.
+StaticFilesWSGI / StaticFilesASGI wrap the Django application and answer
+STATIC_URL requests from an index of STATIC_ROOT loaded into memory at
+startup: hashed names get a year-long immutable Cache-Control, the rest an
+ETag to revalidate against. Anything not in the index (e.g. collectstatic
+was never run) falls through to Django.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+COMPRESSIBLE = {'.css', '.js', '.json', '.map', '.svg', '.txt', '.html', '.xml', '.ico', '.eot', '.ttf'}
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'public, max-age=0, must-revalidate'
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage that also writes gzip variants, and that falls
+    back to the plain name for files missing from the manifest (collectstatic
+    not run, e.g. in tests) instead of raising
+    """
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        for name in set(paths) | set(self.hashed_files.values()):
+            if os.path.splitext(name)[1] in COMPRESSIBLE and self.exists(name):
+                self._write_gzip(self.path(name))
+
+    @staticmethod
+    def _write_gzip(path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        # Only worth keeping when it saves something
+        if len(compressed) < len(data) * 0.95:
+            with open(path + '.gz', 'wb') as f:
+                f.write(compressed)
+
+
+class StaticIndex:
+    """URL path -> preloaded response parts for every file under STATIC_ROOT"""
+
+    def __init__(self, root, url, max_file_bytes):
+        self.prefix = '/' + url.strip('/') + '/'
+        self.files = {}
+        if root and os.path.isdir(root):
+            self._load(str(root), max_file_bytes)
+
+    @classmethod
+    def from_settings(cls):
+        return cls(settings.STATIC_ROOT, settings.STATIC_URL, settings.STATIC_INDEX_MAX_FILE_BYTES)
+
+    def _load(self, root, max_file_bytes):
+        hashed = set()
+        manifest = os.path.join(root, ManifestStaticFilesStorage.manifest_name)
+        if os.path.exists(manifest):
+            with open(manifest, encoding='utf-8') as f:
+                hashed = set(json.load(f).get('paths', {}).values())
+
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, root).replace(os.sep, '/')
+                if name.endswith('.gz') or name == ManifestStaticFilesStorage.manifest_name:
+                    continue
+                if os.path.getsize(path) > max_file_bytes:
+                    continue
+                with open(path, 'rb') as f:
+                    body = f.read()
+                gzipped = None
+                if os.path.exists(path + '.gz'):
+                    with open(path + '.gz', 'rb') as f:
+                        gzipped = f.read()
+                content_type, _ = mimetypes.guess_type(filename)
+                if content_type and (content_type.startswith('text/') or content_type == 'application/javascript'):
+                    content_type += '; charset=utf-8'
+                self.files[self.prefix + name] = {
+                    'body': body,
+                    'gzip': gzipped,
+                    'content_type': content_type or 'application/octet-stream',
+                    'etag': '"%s"' % hashlib.md5(body).hexdigest(),
+                    'cache_control': IMMUTABLE if name in hashed else REVALIDATE,
+                }
+
+    def respond(self, method, path, accept_encoding='', if_none_match=''):
+        """(status, headers, body) for a GET/HEAD of a known file, else None"""
+        if method not in ('GET', 'HEAD'):
+            return None
+        entry = self.files.get(path)
+        if entry is None:
+            return None
+
+        headers = [
+            ('Cache-Control', entry['cache_control']),
+            ('ETag', entry['etag']),
+        ]
+        if entry['gzip'] is not None:
+            headers.append(('Vary', 'Accept-Encoding'))
+        if entry['etag'] in if_none_match:
+            return 304, headers, b''
+
+        body = entry['body']
+        if entry['gzip'] is not None and 'gzip' in accept_encoding:
+            body = entry['gzip']
+            headers.append(('Content-Encoding', 'gzip'))
+        headers += [
+            ('Content-Type', entry['content_type']),
+            ('Content-Length', str(len(body))),
+        ]
+        return 200, headers, b'' if method == 'HEAD' else body
+
+
+class StaticFilesWSGI:
+    """WSGI wrapper answering static file requests from a StaticIndex"""
+
+    def __init__(self, application, index=None):
+        self.application = application
+        self.index = index or StaticIndex.from_settings()
+
+    def __call__(self, environ, start_response):
+        found = self.index.respond(
+            environ['REQUEST_METHOD'], environ.get('PATH_INFO', ''),
+            environ.get('HTTP_ACCEPT_ENCODING', ''), environ.get('HTTP_IF_NONE_MATCH', ''),
+        )
+        if found is None:
+            return self.application(environ, start_response)
+        status, headers, body = found
+        start_response('200 OK' if status == 200 else '304 Not Modified', headers)
+        return [body]
+
+
+class StaticFilesASGI:
+    """ASGI wrapper answering static file requests from a StaticIndex"""
+
+    def __init__(self, application, index=None):
+        self.application = application
+        self.index = index or StaticIndex.from_settings()
+
+    async def __call__(self, scope, receive, send):
+        found = None
+        if scope['type'] == 'http':
+            request_headers = dict(scope['headers'])
+            found = self.index.respond(
+                scope['method'], scope['path'],
+                request_headers.get(b'accept-encoding', b'').decode('latin-1'),
+                request_headers.get(b'if-none-match', b'').decode('latin-1'),
+            )
+        if found is None:
+            return await self.application(scope, receive, send)
+        status, headers, body = found
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(name.lower().encode(), value.encode()) for name, value in headers],
+        })
+        await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,17 @@
+"""
+Test runner that always sets up the 'cache' test database
+Migrating default creates the shared cache table there (users.signals), so
+it must exist first, even when no selected test uses it; otherwise the
+test setup would write to the real cache.sqlite3.
+"""
+from django.test.runner import DiscoverRunner
+
+from .routers import CACHE
+
+
+class TestRunner(DiscoverRunner):
+
+    def get_databases(self, suite):
+        databases = super().get_databases(suite)
+        databases.setdefault(CACHE, False)
+        return databases
@@ -11,6 +11,9 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
+from .staticfiles import StaticFilesWSGI
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'randomproject.settings')
 
-application = get_wsgi_application()
+# Hashed, precompressed static files are answered from memory before Django
+application = StaticFilesWSGI(get_wsgi_application())
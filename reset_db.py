@@ -24,6 +24,11 @@ if os.path.exists(db_path):
 else:
     print(f"ℹ️  {db_path} does not exist")
 
+# WAL journal files and the writer lock file left next to the database
+for suffix in ('-wal', '-shm', '-writer.lock'):
+    if os.path.exists(db_path + suffix):
+        os.remove(db_path + suffix)
+
 print("\n✅ Database reset complete!")
 print("Now run: python manage.py migrate")
 
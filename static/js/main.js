@@ -262,6 +262,42 @@ function generateStudyPlan() {
 // Initialize study plan handler
 document.addEventListener('DOMContentLoaded', generateStudyPlan);
 
+// Live notices: prepend notices pushed by the server-sent event stream
+function initNoticeStream() {
+    const list = document.querySelector('[data-notice-stream]');
+    if (!list || !window.EventSource) return;
+
+    const source = new EventSource(list.dataset.noticeStream);
+    source.addEventListener('notice', function(e) {
+        const notice = JSON.parse(e.data);
+        const posted = new Date(notice.posted_at).toLocaleDateString(undefined, {month: 'short', day: '2-digit', year: 'numeric'});
+
+        const item = document.createElement('div');
+        item.className = 'notice-item';
+        item.style.cssText = 'padding: 1rem; margin-bottom: 1rem; background: var(--bg-glass-hover); border-radius: 12px; border-left: 3px solid var(--accent-primary); cursor: pointer; transition: all 0.3s ease;';
+        const title = document.createElement('h4');
+        title.textContent = notice.title;
+        const content = document.createElement('p');
+        content.style.cssText = 'color: var(--text-secondary); margin-top: 0.5rem;';
+        content.textContent = notice.content.split(/\s+/).slice(0, 20).join(' ');
+        const date = document.createElement('small');
+        date.style.color = 'var(--text-secondary)';
+        date.textContent = posted;
+        item.append(title, content, date);
+        item.addEventListener('click', () => showNotice(notice.title, notice.content, posted));
+
+        list.prepend(item);
+        while (list.children.length > 5) list.lastElementChild.remove();
+        document.getElementById('notices-section').style.display = '';
+
+        const escaped = document.createElement('span');
+        escaped.textContent = notice.title;
+        showNotification(`New notice: ${escaped.innerHTML}`, 'info');
+    });
+}
+
+document.addEventListener('DOMContentLoaded', initNoticeStream);
+
 // Smooth scroll to top
 function scrollToTop() {
     window.scrollTo({
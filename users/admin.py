@@ -17,3 +17,4 @@ class StudentProfileAdmin(admin.ModelAdmin):
     list_display = ['user', 'enrollment_number', 'semester', 'branch', 'attendance_percentage']
     list_filter = ['semester', 'branch']
     search_fields = ['user__username', 'enrollment_number']
+    readonly_fields = ['attendance_percentage']  # derived from core.AttendanceRecord bitmaps
@@ -0,0 +1,64 @@
+"""
+Authentication backends for Smart College Helper Portal
+Loads the user together with their student profile in a single query
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+from .models import User, StudentProfile
+
+
+def _cache():
+    return caches[getattr(settings, 'USER_PROFILE_CACHE_ALIAS', 'default')]
+
+
+def user_cache_key(user_id):
+    """Cache key holding the (user, profile) pair for a user id"""
+    return f"users:auth:{user_id}"
+
+
+def invalidate_cached_user(user_id):
+    """Drop the cached (user, profile) pair after the user or profile changes"""
+    if not getattr(settings, 'USER_PROFILE_CACHE_TIMEOUT', 0):
+        return
+    _cache().delete(user_cache_key(user_id))
+
+
+def invalidate_cached_profiles(profile_ids):
+    """Drop cached pairs for profiles updated in bulk (no post_save signal)"""
+    if not getattr(settings, 'USER_PROFILE_CACHE_TIMEOUT', 0):
+        return
+    profile_ids = list(profile_ids)
+    for start in range(0, len(profile_ids), 900):
+        user_ids = StudentProfile.objects.filter(pk__in=profile_ids[start:start + 900]).values_list('user_id', flat=True)
+        _cache().delete_many([user_cache_key(user_id) for user_id in user_ids])
+
+
+class ProfileModelBackend(ModelBackend):
+    """
+    ModelBackend whose get_user() joins student_profile, so views and
+    templates reading request.user.student_profile don't pay an extra query.
+
+    When USER_PROFILE_CACHE_TIMEOUT is set the loaded pair is also kept in the
+    cache and the lookup is skipped entirely until the user or profile is saved.
+    """
+
+    def get_user(self, user_id):
+        timeout = getattr(settings, 'USER_PROFILE_CACHE_TIMEOUT', 0)
+        key = user_cache_key(user_id)
+
+        if timeout:
+            user = _cache().get(key)
+            if user is not None:
+                return user if self.user_can_authenticate(user) else None
+
+        try:
+            user = User._default_manager.select_related('student_profile').get(pk=user_id)
+        except User.DoesNotExist:
+            return None
+
+        if timeout:
+            _cache().set(key, user, timeout)
+
+        return user if self.user_can_authenticate(user) else None
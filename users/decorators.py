@@ -0,0 +1,27 @@
+"""
+View decorators for async views
+Django 4.2's login_required only wraps sync views.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+
+
+def _is_authenticated(request):
+    # Resolves the lazy request.user (session + user lookup) in a worker thread
+    return request.user.is_authenticated
+
+
+def alogin_required(view):
+    """
+    login_required for `async def` views
+    Loads request.user off the event loop, so the view can use it freely.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if not await sync_to_async(_is_authenticated)(request):
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+    
+    return wrapper
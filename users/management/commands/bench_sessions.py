@@ -0,0 +1,95 @@
+"""
+Management command to compare per-request session/auth latency
+Runs SessionMiddleware + AuthenticationMiddleware for an existing user with
+every session engine, with and without the cached (user, profile) pair.
+Run: python manage.py bench_sessions --requests 2000
+"""
+import statistics
+import time
+from contextlib import ExitStack
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from randomproject.routers import CACHE
+
+from users.backends import invalidate_cached_user
+from users.models import User
+
+ENGINES = ['db', 'cached_db', 'cache', 'signed_cookies']
+
+
+def _view(request):
+    # Touch what the portal's templates read on every page
+    request.user.is_authenticated and request.user.student_profile.semester
+    return HttpResponse()
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks session + request.user loading across session engines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000, help='Requests per configuration')
+        parser.add_argument('--username', help='Student to authenticate as (default: first student)')
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(role='student', student_profile__isnull=False)
+        if options['username']:
+            users = users.filter(username=options['username'])
+        user = users.first()
+        if user is None:
+            raise CommandError('Need an existing student with a profile to benchmark')
+        
+        self.stdout.write(f"{'engine':<16}{'user cache':<12}{'mean µs':>10}{'p50 µs':>10}{'p95 µs':>10}{'db q':>7}{'cache q':>9}")
+        for engine in ENGINES:
+            for profile_cache in (0, 300):
+                with override_settings(SESSION_ENGINE=f'django.contrib.sessions.backends.{engine}',
+                                       USER_PROFILE_CACHE_TIMEOUT=profile_cache):
+                    timings, db_queries, cache_queries = self._run(user, options['requests'])
+                timings.sort()
+                self.stdout.write(
+                    f"{engine:<16}{'on' if profile_cache else 'off':<12}"
+                    f"{statistics.mean(timings):>10.0f}{timings[len(timings) // 2]:>10.0f}"
+                    f"{timings[int(len(timings) * 0.95)]:>10.0f}{db_queries:>7.1f}{cache_queries:>9.1f}"
+                )
+        
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
+
+    def _run(self, user, requests):
+        store_class = import_module(settings.SESSION_ENGINE).SessionStore
+        store = store_class()
+        store[SESSION_KEY] = str(user.pk)
+        store[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        store[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        store.save()
+        invalidate_cached_user(user.pk)
+        
+        handler = SessionMiddleware(AuthenticationMiddleware(_view))
+        factory = RequestFactory()
+        factory.cookies[settings.SESSION_COOKIE_NAME] = store.session_key
+        
+        handler(factory.get('/'))  # warm caches
+        timings = []
+        # Sessions and the cached user live in the 'cache' database, so every
+        # connection is captured and that one is reported on its own
+        with ExitStack() as stack:
+            contexts = {
+                conn.alias: stack.enter_context(CaptureQueriesContext(conn)) for conn in connections.all()
+            }
+            for _ in range(requests):
+                started = time.perf_counter()
+                handler(factory.get('/'))
+                timings.append((time.perf_counter() - started) * 1e6)
+        
+        store.delete()
+        counts = {alias: len(context.captured_queries) / requests for alias, context in contexts.items()}
+        cache_queries = counts.pop(CACHE, 0)
+        return timings, sum(counts.values()), cache_queries
@@ -0,0 +1,44 @@
+"""
+Management command to delete expired sessions in small batches
+Replaces `clearsessions` for the db/cached_db engines, whose single DELETE
+holds the SQLite write lock for the whole table scan. Cached copies need no
+cleanup: the shared database cache drops expired rows itself.
+Run (e.g. hourly from cron): python manage.py cleanup_sessions
+"""
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired session rows in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--pause', type=float, default=0.05,
+            help='Seconds to sleep between batches so writers can get the lock',
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        deleted = 0
+        
+        while True:
+            keys = list(
+                Session.objects.filter(expire_date__lt=now)
+                .values_list('session_key', flat=True)[:options['batch_size']]
+            )
+            if not keys:
+                break
+            # Sessions have no signals or relations, so this is a single DELETE
+            with transaction.atomic():
+                Session.objects.filter(session_key__in=keys).delete()
+            deleted += len(keys)
+            time.sleep(options['pause'])
+        
+        self.stdout.write(f'Deleted {deleted} expired session rows')
+        self.stdout.write(self.style.SUCCESS('Session cleanup complete'))
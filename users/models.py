@@ -4,6 +4,7 @@ Extended User model with role-based access
 """
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Lower
 
 
 class User(AbstractUser):
@@ -20,6 +21,13 @@ class User(AbstractUser):
     phone = models.CharField(max_length=15, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=['role'], name='users_user_role_idx'),
+            # Case-insensitive email lookups: filter on Lower('email')
+            models.Index(Lower('email'), name='users_user_email_lower_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.username} ({self.role})"
     
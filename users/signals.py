@@ -0,0 +1,35 @@
+"""
+Signal handlers for users app
+Keeps the cached (user, profile) pair in sync with the database and
+creates the shared cache table on migrate
+"""
+from django.core.management import call_command
+from django.db.models.signals import post_migrate, post_save, post_delete
+from django.dispatch import receiver
+
+from randomproject.routers import CACHE
+
+from .backends import invalidate_cached_user
+from .models import User, StudentProfile
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=StudentProfile)
+def invalidate_profile_cache(sender, instance, **kwargs):
+    invalidate_cached_user(instance.user_id)
+
+
+@receiver(post_migrate)
+def create_cache_table(sender, plan=None, **kwargs):
+    """
+    Create the 'shared' cache table (sessions live there) on every migrate
+    createcachetable skips existing tables; flush sends post_migrate without
+    a plan and is left alone.
+    """
+    if sender.label != 'users' or plan is None:
+        return
+    call_command('createcachetable', database=CACHE, verbosity=0)
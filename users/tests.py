@@ -1,3 +1,266 @@
-from django.test import TestCase
+"""
+Query-count budgets for the auth pages, index usage for User lookups, the
+profile-loading auth backend and bulk onboarding
+"""
+import csv
+import io
+import os
+import tempfile
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth.tokens import default_token_generator
+from django.contrib.sessions.backends.cached_db import KEY_PREFIX
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connections, router
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from core import analytics
+from core.models import DailyRollup, SiteStats
+from core.tests import QueryBudgetTestCase
+from randomproject import routers
+from .backends import ProfileModelBackend, user_cache_key
+from .models import User, StudentProfile
+
+
+class AuthPageQueryTests(QueryBudgetTestCase):
+
+    def test_login_page(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('users:login'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_login(self):
+        with self.assertNumQueries(9):
+            response = self.client.post(reverse('users:login'), {'username': 'student', 'password': 'pw'})
+        self.assertRedirects(response, reverse('core:dashboard'), fetch_redirect_response=False)
+
+    def test_signup(self):
+        # Includes the SAVEPOINT/RELEASE of the user + profile transaction and
+        # the signup rollups, counted for the user and again for the semester
+        with self.assertNumQueries(15):
+            response = self.client.post(reverse('users:signup'), {
+                'username': 'newcomer', 'email': 'newcomer@example.com', 'password': 'pw', 'password2': 'pw',
+                'semester': 2, 'branch': 'CSE',
+            })
+        self.assertRedirects(response, reverse('users:login'), fetch_redirect_response=False)
+        self.assertTrue(StudentProfile.objects.filter(user__username='newcomer', semester=2).exists())
+
+
+class UserIndexTests(QueryBudgetTestCase):
+
+    def test_users_by_role(self):
+        self.assertUsesIndex(User.objects.filter(role='student'), 'users_user_role_idx')
+
+    def test_users_by_lowercase_email(self):
+        queryset = User.objects.annotate(email_lower=Lower('email')).filter(
+            Q(username__in=['a', 'b']) | Q(email_lower__in=['a@example.com', 'b@example.com']))
+        self.assertUsesIndex(queryset, 'users_user_email_lower_idx')
+
+
+@override_settings(USER_PROFILE_CACHE_ALIAS='default', USER_PROFILE_CACHE_TIMEOUT=300)
+class ProfileBackendTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('student', 'student@example.com', 'pw')
+        cls.profile = StudentProfile.objects.create(user=cls.user, semester=3, branch='CSE')
+
+    def setUp(self):
+        caches['default'].clear()
+        self.backend = ProfileModelBackend()
+
+    def test_profile_is_loaded_with_the_user(self):
+        with self.settings(USER_PROFILE_CACHE_TIMEOUT=0), self.assertNumQueries(1):
+            user = self.backend.get_user(self.user.pk)
+            self.assertEqual(user.student_profile.semester, 3)
+        self.assertIsNone(caches['default'].get(user_cache_key(self.user.pk)))
+
+    def test_cached_pair_skips_the_query(self):
+        self.backend.get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            user = self.backend.get_user(self.user.pk)
+            self.assertEqual(user.student_profile.branch, 'CSE')
+
+    def test_saving_the_profile_or_user_invalidates(self):
+        self.backend.get_user(self.user.pk)
+        self.profile.semester = 4
+        self.profile.save()
+        self.assertEqual(self.backend.get_user(self.user.pk).student_profile.semester, 4)
+        
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(self.backend.get_user(self.user.pk))
+
+    def test_unknown_user(self):
+        self.assertIsNone(self.backend.get_user(0))
+
+
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db', SESSION_CACHE_ALIAS='shared')
+class SharedCacheTests(TestCase):
+    databases = {'default', 'cache'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('student', 'student@example.com', 'pw')
+
+    def test_cache_table_lives_in_its_own_database(self):
+        model = caches['shared'].cache_model_class
+        self.assertEqual(router.db_for_write(model), 'cache')
+        self.assertEqual(router.db_for_read(model), 'cache')
+        self.assertTrue(router.allow_migrate('cache', 'django_cache'))
+        self.assertFalse(router.allow_migrate('default', 'django_cache'))
+        self.assertFalse(router.allow_migrate('cache', 'users'))
+
+    def test_cache_writes_do_not_pin_the_session(self):
+        state = {'pinned': False, 'wrote': False}
+        token = routers._request_state.set(state)
+        try:
+            caches['shared'].set('key', 'value')
+        finally:
+            routers._request_state.reset(token)
+        self.assertFalse(state['wrote'])
+        self.assertEqual(caches['shared'].get('key'), 'value')
+
+    def test_sessions_are_read_from_the_cache(self):
+        self.client.force_login(self.user)
+        key = self.client.session.session_key
+        self.assertIsNotNone(caches['shared'].get(KEY_PREFIX + key))
+        with self.assertNumQueries(0):
+            self.client.session.load()
+
+    def test_cleanup_sessions(self):
+        Session.objects.bulk_create([
+            Session(session_key=f'expired{i}', session_data='', expire_date=timezone.now() - timedelta(days=1))
+            for i in range(5)
+        ] + [Session(session_key='live', session_data='', expire_date=timezone.now() + timedelta(days=1))])
+        out = io.StringIO()
+        call_command('cleanup_sessions', '--batch-size', '2', '--pause', '0', stdout=out)
+        self.assertIn('Deleted 5 expired session rows', out.getvalue())
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['live'])
+
+
+class MigrateCacheTableTests(TransactionTestCase):
+    databases = {'default', 'cache'}
+
+    def test_migrate_creates_the_cache_table(self):
+        table = caches['shared'].cache_model_class._meta.db_table
+        with connections['cache'].cursor() as cursor:
+            cursor.execute(f'DROP TABLE {table}')
+        self.assertNotIn(table, connections['cache'].introspection.table_names())
+
+        call_command('migrate', verbosity=0)
+        self.assertIn(table, connections['cache'].introspection.table_names())
+
+        user = User.objects.create_user('student', 'student@example.com', 'pw')
+        StudentProfile.objects.create(user=user, semester=3)
+        self.assertTrue(self.client.login(username='student', password='pw'))
+        self.assertEqual(self.client.get(reverse('core:dashboard')).status_code, 200)
+
+
+class BulkOnboardTests(QueryBudgetTestCase):
+
+    def onboard(self, text, *args):
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, 'admissions.csv')
+            output = os.path.join(directory, 'credentials.csv')
+            with open(source, 'w', encoding='utf-8') as f:
+                f.write(text)
+            err = io.StringIO()
+            call_command('bulk_onboard_students', source, '-o', output, '--workers', '1', *args, stderr=err)
+            with open(output, encoding='utf-8', newline='') as f:
+                return list(csv.DictReader(f)), err.getvalue()
+
+    def test_creates_students_and_skips_taken_rows(self):
+        User.objects.create_user('mixed', 'Mixed.Case@Example.com', 'pw')
+        SiteStats.reconcile()
+        rows, log = self.onboard(
+            'Username,Email,Enrollment_Number,Semester,Branch\n'
+            'new1,New1@example.com,CS101,2,CSE\n'
+            'new2,mixed.case@example.com,CS102,2,CSE\n'
+            'student,new3@example.com,CS103,2,CSE\n'
+            'new4,new1@example.com,CS104,2,CSE\n'
+            'new5,new5@example.com,CS101,2,CSE\n'
+            'new6,new6@example.com,CS106,second,CSE\n'
+            'new7,new7@example.com,,5,ECE\n'
+        )
+        self.assertEqual([row['username'] for row in rows], ['new1', 'new7'])
+        self.assertIn("line 3: email 'mixed.case@example.com' already registered", log)
+        self.assertIn("line 4: username 'student' already exists", log)
+        self.assertIn("line 5: email 'new1@example.com' already registered", log)
+        self.assertIn("line 6: enrollment number 'CS101' already exists", log)
+        self.assertIn("line 7: invalid semester 'second'", log)
+        self.assertIn('Created 2 students (5 rows skipped)', log)
+        
+        user = User.objects.get(username='new1')
+        self.assertEqual(user.email, 'new1@example.com')
+        self.assertTrue(user.check_password(rows[0]['password']))
+        self.assertEqual(user.student_profile.enrollment_number, 'CS101')
+        
+        # bulk_create skips the signals, the command keeps counters and rollups in step
+        stats = SiteStats.load()
+        self.assertEqual(SiteStats.live_counts()['total_students'], stats.total_students)
+        live = sorted(DailyRollup.objects.filter(metric='signup').values_list('bucket', 'dimension', 'key', 'count'))
+        analytics.backfill('signup')
+        self.assertEqual(
+            sorted(DailyRollup.objects.filter(metric='signup').values_list('bucket', 'dimension', 'key', 'count')),
+            live,
+        )
+
+    def test_csv_passwords_are_validated(self):
+        rows, log = self.onboard(
+            'username,email,first_name,password\n'
+            'new1,new1@example.com,Asha,password\n'
+            'new2,new2@example.com,Ravi,new2@example.com\n'
+            'new3,new3@example.com,Meera,short\n'
+            'new4,new4@example.com,Kiran,quiet-harbour-42\n'
+        )
+        self.assertEqual([(row['username'], row['password']) for row in rows], [('new4', 'quiet-harbour-42')])
+        self.assertIn('line 2: password rejected: This password is too common.', log)
+        self.assertIn('line 3: password rejected: The password is too similar to the email address.', log)
+        self.assertIn('line 4: password rejected: This password is too short.', log)
+        self.assertIn('Created 1 students (3 rows skipped)', log)
+        # reset links ignore the column
+        rows, _ = self.onboard('username,email,password\nnew5,new5@example.com,password\n', '--reset-links')
+        self.assertEqual([row['username'] for row in rows], ['new5'])
+
+    def test_reset_links(self):
+        rows, _ = self.onboard('username,email\nnew1,new1@example.com\n', '--reset-links')
+        user = User.objects.get(username='new1')
+        self.assertFalse(user.has_usable_password())
+        self.assertEqual(rows[0]['reset_link'], reverse('users:password_reset_confirm', kwargs={
+            'uidb64': urlsafe_base64_encode(force_bytes(user.pk)),
+            'token': default_token_generator.make_token(user),
+        }))
+
+
+class SetPasswordTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        self.url = reverse('users:password_reset_confirm', kwargs={
+            'uidb64': urlsafe_base64_encode(force_bytes(self.student.pk)),
+            'token': default_token_generator.make_token(self.student),
+        })
+
+    def test_weak_password_is_rejected_on_the_form(self):
+        response = self.client.post(self.url, {'password': 'student1', 'password2': 'student1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['password_errors'])
+        self.assertContains(response, 'This password is too common.')
+        self.student.refresh_from_db()
+        self.assertTrue(self.student.check_password('pw'))
+
+    def test_valid_password_is_set_once(self):
+        data = {'password': 'quiet-harbour-42', 'password2': 'quiet-harbour-42'}
+        response = self.client.post(self.url, data)
+        self.assertRedirects(response, reverse('users:login'))
+        self.student.refresh_from_db()
+        self.assertTrue(self.student.check_password('quiet-harbour-42'))
+        self.assertRedirects(self.client.get(self.url), reverse('users:login'))
@@ -10,5 +10,6 @@ urlpatterns = [
     path('signup/', views.signup_view, name='signup'),
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
+    path('set-password/<uidb64>/<token>/', views.set_password_view, name='password_reset_confirm'),
 ]
 
@@ -1,11 +1,16 @@
 """
 Authentication views for Smart College Helper Portal
-Handles signup, login, and logout
+Handles signup, login, logout and setting an initial password
 """
 from django.shortcuts import render, redirect
 from django.contrib.auth import login, authenticate
+from django.contrib.auth.tokens import default_token_generator
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.password_validation import password_validators_help_texts, validate_password
 from django.contrib import messages
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.http import urlsafe_base64_decode
 from django.views.decorators.http import require_http_methods
 from .models import User, StudentProfile
 
@@ -41,20 +46,22 @@ def signup_view(request):
         
         # Create user
         try:
-            user = User.objects.create_user(
-                username=username,
-                email=email,
-                password=password,
-                role='student',
-                phone=phone
-            )
-            
-            # Create student profile
-            StudentProfile.objects.create(
-                user=user,
-                semester=int(semester),
-                branch=branch
-            )
+            # User, profile and their counters commit together
+            with transaction.atomic():
+                user = User.objects.create_user(
+                    username=username,
+                    email=email,
+                    password=password,
+                    role='student',
+                    phone=phone
+                )
+                
+                # Create student profile
+                StudentProfile.objects.create(
+                    user=user,
+                    semester=int(semester),
+                    branch=branch
+                )
             
             messages.success(request, "Account created successfully! Please login.")
             return redirect('users:login')
@@ -96,3 +103,39 @@ def logout_view(request):
     logout(request)
     messages.success(request, "You have been logged out successfully!")
     return redirect('users:login')
+
+
+def set_password_view(request, uidb64, token):
+    """
+    Set a password from a reset link (issued by bulk_onboard_students)
+    """
+    try:
+        user = User.objects.get(pk=urlsafe_base64_decode(uidb64).decode())
+    except (TypeError, ValueError, OverflowError, User.DoesNotExist):
+        user = None
+    
+    if user is None or not default_token_generator.check_token(user, token):
+        messages.error(request, "This link is invalid or has already been used!")
+        return redirect('users:login')
+    
+    context = {'reset_user': user, 'help_texts': password_validators_help_texts()}
+    if request.method == 'POST':
+        password = request.POST.get('password')
+        password2 = request.POST.get('password2')
+        
+        if not password or password != password2:
+            messages.error(request, "Passwords don't match!")
+            return render(request, 'users/set_password.html', context)
+        
+        try:
+            validate_password(password, user)
+        except ValidationError as e:
+            context['password_errors'] = e.messages
+            return render(request, 'users/set_password.html', context)
+        
+        user.set_password(password)
+        user.save(update_fields=['password'])
+        messages.success(request, "Password set successfully! Please login.")
+        return redirect('users:login')
+    
+    return render(request, 'users/set_password.html', context)